@@ -0,0 +1,257 @@
+#!/usr/bin/python
+#
+# Purpose: Rack aggregator that merges the map results of its rack
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# In the master shuffle mode, every map worker sends the output of every
+# map task to the master. With many map workers on racks other than the
+# master's, all of these messages cross the links between the switches
+# and arrive on the single results socket of the master.
+#
+# A rack aggregator is an optional worker, one per rack, which turns this
+# fan-in into a tree. A job that asks for it (-g option of mr_wordcount.py)
+# tells each of its map workers to send the results of the task to the
+# aggregator on the rack of the worker instead (see mr_racks.py for the
+# racks; without a topology file, all the workers are on one rack). The
+# aggregator merges the results of several map tasks of a job, partition
+# by partition, using the combiner of the job, so that a key that many map
+# tasks emitted goes upstream once. It then sends the master one merged
+# result with a single block per partition, which names the map tasks it
+# covers and carries their metrics.
+#
+# A merged result is sent once it covers as many map tasks as the batch
+# size (-n option), or once the oldest of them has waited for the window
+# (-w option) so that the end of a phase is not held up for long. If the
+# aggregator dies, the master runs the map tasks it held again.
+#
+# The aggregator comes up and sends heartbeats just like the map and reduce
+# workers, telling the master its host (by which the topology file knows
+# its rack) and where the map workers reach it.
+#
+
+# system and time
+import os
+import sys
+import time
+import json
+
+import argparse   # argument parser
+import zmq        # ZeroMQ library
+
+from mr_wire import encode_message, encode_trailer, decode_message  # wire format of the records
+from mr_combiner import COMBINE_FUNCS  # merging of the combined vals
+from mr_heartbeat import MR_Heartbeat, worker_name, worker_host  # tell the master we are alive
+from mr_compress import available_codecs, compressor_for  # compression of the frames
+from mr_metrics import frames_size, now  # metrics of the merged results
+
+# ------------------------------------------------
+# The map results of one iteration of a job being merged
+#
+class MR_Batch ():
+    """ Merged map results waiting to go upstream """
+
+    def __init__ (self, header, num_blocks):
+        self.first = now ()                    # when the first result came
+        self.job = header.get ('job', 0)       # the job of the results
+        self.iter = header['iter']             # and its iteration
+        self.wire = header['wire']             # wire format of the job
+        self.compress = header.get ('compress')  # and its compression
+        self.combine_func = COMBINE_FUNCS[header['combiner']]
+        self.ids = []                          # the map tasks merged
+        self.tasks = []                        # their ids, times and metrics
+        self.records_in = 0                    # entries merged
+        self.bytes_in = 0                      # bytes of the results merged
+        # one table (or list, without a combine function) per partition
+        self.parts = [[] if self.combine_func is None else {} for r in range (num_blocks)]
+
+    # -----------------------------------------------------------------------
+    # merge the output of a map task into ours
+    def add (self, header, blocks):
+        """ merge the blocks of a map result """
+        self.ids.append (header['id'])
+        self.tasks.append ({'id': header['id'], 'elapsed': header.get ('elapsed', 0), 'metrics': header.get ('metrics')})
+        func = self.combine_func
+        for r in range (len (blocks)):
+            self.records_in = self.records_in + len (blocks[r])
+            if (func is None):
+                self.parts[r].extend (blocks[r])
+                continue
+            table = self.parts[r]
+            for key, val in blocks[r]:
+                table[key] = func (table[key], val) if (key in table) else val
+
+    # -----------------------------------------------------------------------
+    def blocks (self):
+        """ the merged entries, one list per partition """
+        return [list (p.items ()) if isinstance (p, dict) else p for p in self.parts]
+
+# ------------------------------------------------
+# Main aggregator class
+class MR_Aggregator ():
+    """ The rack aggregator class """
+    def __init__ (self, args):
+        """ constructor """
+        self.name = worker_name ("aggregate")  # our unique name
+        self.master_ip = args.masterip
+        self.master_port = args.masterport
+        self.host = worker_host (args.advertise)  # the host we run on
+        self.data_port = args.dataport   # port on which map workers reach us
+        self.batch_size = args.batch     # map results per merged result
+        self.window = args.window / 1000.0  # secs a result may wait
+        self.context = None   # the ZeroMQ context
+        self.receiver = None  # map results from the map workers
+        self.init_sender = None     # for indicating we are up
+        self.results_sender = None  # for sending merged results
+        self.heartbeat = None       # thread that tells master we are alive
+        self.batches = {}     # (job, iter) -> results being merged
+        self.compressor = None  # (de)compresses the records we merge
+
+    #------------------------------------------
+    def init_worker (self):
+        """ rack aggregator initialization """
+        print("initializing rack aggregator")
+
+        context = zmq.Context()
+        self.context = context
+
+        # the map workers of our rack push us their results. A data port
+        # of 0 means any free port.
+        self.receiver = context.socket (zmq.PULL)
+        self.receiver.setsockopt (zmq.RCVHWM, 0)
+        if (self.data_port == 0):
+            self.data_port = self.receiver.bind_to_random_port ("tcp://*")
+        else:
+            self.receiver.bind ("tcp://*:" + str (self.data_port))
+        endpoint = "tcp://" + self.host + ":" + str (self.data_port)
+        print("Using PULL, rack aggregator receiving map results at ", endpoint)
+
+        # we tell the master that we are up and where to find us on the
+        # workers up channel, 2 more than the base port of the master,
+        # and keep sending heartbeats
+        self.init_sender = context.socket (zmq.PUSH)
+        self.init_sender.setsockopt (zmq.LINGER, -1)
+        connect_addr = "tcp://" + self.master_ip + ":" + str (self.master_port+2)
+        print("Using PUSH, rack aggregator connecting to worker up barrier at ", connect_addr)
+        self.init_sender.connect (connect_addr)
+        self.init_sender.send_json ({'worker': self.name, 'role': "aggregate", 'state': "up", 'codecs': available_codecs (),
+                                     'host': self.host, 'endpoint': endpoint})
+        self.heartbeat = MR_Heartbeat (context, connect_addr, self.name, "aggregate")
+        self.heartbeat.start ()
+
+        # the merged results go where the map results used to go, 3 more
+        # than the base port of the master
+        self.results_sender = context.socket (zmq.PUSH)
+        self.results_sender.setsockopt (zmq.LINGER, -1)
+        self.results_sender.setsockopt (zmq.SNDHWM, 0)
+        connect_addr = "tcp://" + self.master_ip + ":" + str (self.master_port+3)
+        print("Using PUSH, rack aggregator connecting to map results barrier at ", connect_addr)
+        self.results_sender.connect (connect_addr)
+
+    #------------------------------------------
+    # the compressor for the settings of the job a result is of
+    def compressor_of (self, header):
+        """ compressor named in a header """
+        self.compressor = compressor_for (header.get ('compress'), self.compressor)
+        return self.compressor
+
+    #------------------------------------------
+    def do_work (self):
+        """ merge the map results that arrive and send them on when due """
+
+        # wait for the next map result, but only until the oldest batch
+        # is due
+        timeout = None
+        if (self.batches):
+            oldest = min (b.first for b in self.batches.values ())
+            timeout = max (0, int ((oldest + self.window - now ()) * 1000))
+
+        if (self.receiver.poll (timeout)):
+            frames = self.receiver.recv_multipart (copy=False)
+            header, blocks = decode_message (frames, compressor=self.compressor_of)
+
+            # the results of an iteration of a job are merged together. A
+            # backup copy of a task we already have is dropped.
+            key = (header.get ('job', 0), header['iter'])
+            if (key not in self.batches):
+                self.batches[key] = MR_Batch (header, len (blocks))
+            batch = self.batches[key]
+            if (header['id'] not in batch.ids):
+                batch.add (header, blocks)
+                batch.bytes_in = batch.bytes_in + frames_size (frames)
+
+            if (len (batch.ids) >= self.batch_size):
+                self.forward (key)
+
+        # send on the batches that have waited long enough
+        for key in [k for k, b in self.batches.items () if now () - b.first >= self.window]:
+            self.forward (key)
+
+    #------------------------------------------
+    def forward (self, key):
+        """ send the master a merged result """
+
+        start = now ()
+        batch = self.batches.pop (key)
+        blocks = batch.blocks ()
+        compressor = compressor_for (batch.compress, self.compressor)
+        header = {'id': batch.ids[0], 'ids': batch.ids, 'job': batch.job, 'iter': batch.iter}
+        frames = encode_message (header, blocks, batch.wire, compressor)
+
+        # what we did goes in the trailer, along with the metrics of the
+        # map tasks
+        merge = {'worker': self.name, 'tasks': len (batch.ids),
+                 'records_in': batch.records_in, 'records_out': sum (len (b) for b in blocks),
+                 'bytes_in': batch.bytes_in, 'bytes_out': frames_size (frames),
+                 'elapsed': now () - start}
+        frames.append (encode_trailer ({'tasks': batch.tasks, 'merge': merge}))
+        self.results_sender.send_multipart (frames, copy=False)
+        print("rack aggregator merged map tasks ", batch.ids, " of job ", batch.job, ": records in = ", merge['records_in'],
+              ", records out = ", merge['records_out'])
+
+##################################
+# Command line parsing
+##################################
+def parseCmdLineArgs ():
+    # parse the command line
+    parser = argparse.ArgumentParser ()
+
+    # add positional arguments in that order
+    parser.add_argument ("masterip", help="IP addr of master")
+    parser.add_argument ("masterport", type=int, help="Port number of master")
+
+    # add optional arguments
+    parser.add_argument ("-a", "--advertise", default=None, help="Address at which map workers reach us, and by which the topology file of the master knows our rack, default IP of our hostname")
+    parser.add_argument ("-d", "--dataport", type=int, default=6100, help="Port on which we receive map results (0 for any free port), default 6100")
+    parser.add_argument ("-n", "--batch", type=int, default=8, help="Num of map results merged into one result, default 8")
+    parser.add_argument ("-w", "--window", type=float, default=50, help="Msecs a map result may wait to be merged with others, default 50")
+
+    # parse the args
+    args = parser.parse_args ()
+
+    return args
+
+#-----------------------------------------------------------------------
+# main function
+def main ():
+    """ Main program for the rack aggregator """
+
+    print("MapReduce Rack Aggregator program")
+    parsed_args = parseCmdLineArgs ()
+
+    # invoke the aggregator logic
+    aggobj = MR_Aggregator (parsed_args)
+
+    # initialize the network connections
+    aggobj.init_worker ()
+
+    # we merge the map results of our rack forever
+    while True:
+        aggobj.do_work ()
+
+#----------------------------------------------
+if __name__ == '__main__':
+    main ()
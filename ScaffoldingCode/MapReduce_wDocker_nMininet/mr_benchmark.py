@@ -0,0 +1,309 @@
+#!/usr/bin/python
+#
+# Purpose: Reproducible benchmark suite on synthetic Zipfian corpora
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Rerunning the job on big.txt or small.txt says little about how a change
+# to the framework behaves at scale. This harness does two things:
+#
+# (1) It generates deterministic synthetic corpora: the vocabulary is a
+#     fixed list of made-up words whose frequencies follow a Zipf law of
+#     the given skew (word of rank k occurs in proportion to 1/k^skew),
+#     laid out in lines of about the given number of words. The same
+#     size, vocabulary, skew, line length and seed always give the very
+#     same file, which is cached in the work directory.
+#
+# (2) It sweeps the number of map and reduce workers, the corpus sizes and
+#     any combination of options of mr_wordcount.py (the engine, the
+#     shuffle, the wire format, the compression, ...). Every run starts a
+#     master and its map and reduce workers as local processes in a fresh
+#     directory, and the phase times of its metrics file are averaged over
+#     its iterations.
+#
+# The results are printed as a comparison table and saved as a csv file,
+# with the throughput in MB/s and words (records) per second. E.g.,
+#
+#   python mr_benchmark.py -s 100M,1G -M 2,4 -R 2 -c "" -c="-s p2p" -c="-e local"
+#
+# runs every corpus size with 2 and 4 map workers, 2 reduce workers, and
+# each of the three sets of options.
+#
+
+# system and time
+import os
+import sys
+import time
+import argparse   # argument parser
+
+import csv                   # the results table
+import json                  # the corpus metadata
+import shlex                 # split the option strings
+import shutil                # clean up the run directories
+import itertools             # the sweep
+import subprocess            # the master and the workers
+
+import numpy as np           # Zipf sampling
+
+# directory of our sources, from which the master and workers are started
+SRC_DIR = os.path.dirname (os.path.abspath (__file__))
+
+# num of words generated at a time
+WORDS_PER_BLOCK = 1000000
+
+# the columns of the results table
+COLUMNS = ["size_mb", "M", "R", "options", "map", "shuffle", "reduce", "finalize", "total", "mb_per_sec", "records_per_sec"]
+
+# -----------------------------------------------------------------------
+# parse a size like 100M or 1G into bytes
+def parse_size (size):
+    """ num of bytes of a size with an optional K, M or G suffix """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    size = size.strip ().upper ()
+    if (size and size[-1] in units):
+        return int (float (size[:-1]) * units[size[-1]])
+    return int (size)
+
+# -----------------------------------------------------------------------
+# the made-up vocabulary: distinct lower case words of 2 to 10 letters
+def make_vocabulary (vocab, rng):
+    """ list of vocab distinct words """
+    letters = np.array (list ("abcdefghijklmnopqrstuvwxyz"))
+    words = set ()
+    while (len (words) < vocab):
+        length = int (rng.integers (2, 11))
+        words.add ("".join (letters[rng.integers (0, 26, length)]))
+    return sorted (words)
+
+# ------------------------------------------------
+# The synthetic corpus generator
+#
+class MR_Corpus ():
+    """ Deterministic Zipf distributed text corpus """
+
+    def __init__ (self, size, vocab=50000, skew=1.1, line_words=12, seed=0):
+        self.size = size               # bytes of text to generate
+        self.vocab = vocab             # num of distinct words
+        self.skew = skew               # Zipf exponent
+        self.line_words = line_words   # average num of words per line
+        self.seed = seed               # seed of the generator
+
+    # -----------------------------------------------------------------------
+    # the file name encodes all the parameters, so that a cached corpus is
+    # only reused when it is the same
+    def filename (self, workdir):
+        """ path of the corpus in the work directory """
+        name = "zipf_{}_{}_{}_{}_{}.txt".format (self.size, self.vocab, self.skew, self.line_words, self.seed)
+        return os.path.join (workdir, name)
+
+    # -----------------------------------------------------------------------
+    # generate the corpus unless we already have it. Returns its path and
+    # the num of words in it.
+    def generate (self, workdir):
+        """ write the corpus file """
+
+        path = self.filename (workdir)
+        if (os.path.exists (path) and os.path.exists (path + ".json")):
+            with open (path + ".json") as f:
+                return path, json.load (f)['words']
+
+        print("MR::benchmark - generating ", path)
+        rng = np.random.default_rng (self.seed)
+        # the ranks of the words are shuffled so that the frequent ones are
+        # not all at the start of the alphabet
+        words = rng.permutation (np.array (make_vocabulary (self.vocab, rng)))
+
+        # the cumulative Zipf distribution over the ranks of the words
+        weights = 1.0 / np.arange (1, self.vocab + 1) ** self.skew
+        cdf = np.cumsum (weights / weights.sum ())
+
+        num_words = 0
+        written = 0
+        with open (path + ".tmp", "w") as f:
+            while (written < self.size):
+                block = words[np.minimum (np.searchsorted (cdf, rng.random (WORDS_PER_BLOCK)), self.vocab - 1)]
+
+                # cut the block into lines of 1 to 2*line_words words
+                lengths = rng.integers (1, 2 * self.line_words, WORDS_PER_BLOCK // self.line_words + 1)
+                ends = np.cumsum (lengths)
+                ends = ends[ends < len (block)]
+                lines = [" ".join (line) for line in np.split (block, ends)]
+                text = "\n".join (lines) + "\n"
+
+                # the last block is cut at a whole line to fit the size, or
+                # else at a whole word, so that every word of the corpus is
+                # one of the vocabulary
+                if (written + len (text) > self.size):
+                    cut = text.rfind ("\n", 0, self.size - written) + 1
+                    if (cut == 0):
+                        cut = text.rfind (" ", 0, self.size - written) + 1
+                    text = text[:cut]
+                    if (not text):
+                        break
+                f.write (text)
+                written = written + len (text)
+                num_words = num_words + len (text.split ())
+
+        os.rename (path + ".tmp", path)
+        with open (path + ".json", "w") as f:
+            json.dump ({'size': written, 'words': num_words, 'vocab': self.vocab,
+                        'skew': self.skew, 'line_words': self.line_words, 'seed': self.seed}, f)
+        return path, num_words
+
+# ------------------------------------------------
+# The benchmark runner
+#
+class MR_Benchmark ():
+    """ Runs the wordcount job over a sweep of configurations """
+
+    def __init__ (self, args):
+        self.workdir = os.path.abspath (args.workdir)  # corpora and runs
+        self.iters = args.iters                 # iterations of each run
+        self.port = args.masterport             # base port of the first run
+        self.timeout = args.timeout             # secs before a run is killed
+        self.outfile = args.outfile             # the results table
+        self.sizes = [parse_size (s) for s in args.sizes.split (",")]
+        self.maps = [int (m) for m in args.maps.split (",")]
+        self.reduces = [int (r) for r in args.reduces.split (",")]
+        self.configs = args.config or [""]      # options of mr_wordcount.py
+        self.corpus_args = {'vocab': args.vocab, 'skew': args.skew,
+                            'line_words': args.linewords, 'seed': args.seed}
+        self.results = []                       # one row per run
+
+    # -----------------------------------------------------------------------
+    # run the job once with the given configuration
+    def run (self, datafile, M, R, options):
+        """ returns the average phase times of a run, None if it failed """
+
+        rundir = os.path.join (self.workdir, "run")
+        shutil.rmtree (rundir, ignore_errors=True)
+        os.makedirs (rundir)
+
+        # every run gets ports of its own, so that a lingering socket of
+        # the previous run does not get in the way
+        port = self.port
+        self.port = self.port + 10
+        options = shlex.split (options)
+        local = ("-e" in options and options[options.index ("-e") + 1] == "local") or "--engine=local" in options
+
+        master = subprocess.Popen ([sys.executable, os.path.join (SRC_DIR, "mr_wordcount.py"),
+                                    "-p", str (port), "-i", str (self.iters), "-M", str (M), "-R", str (R)]
+                                   + options + [datafile],
+                                   cwd=rundir, stdout=open (os.path.join (rundir, "master.out"), "w"),
+                                   stderr=subprocess.STDOUT)
+        workers = []
+        if (not local):
+            for role, num, extra in [("mr_mapworker.py", M, ["-d", "0", "-a", "127.0.0.1"]),
+                                     ("mr_reduceworker.py", R, [])]:
+                for i in range (num):
+                    out = open (os.path.join (rundir, role + "." + str (i) + ".out"), "w")
+                    workers.append (subprocess.Popen ([sys.executable, os.path.join (SRC_DIR, role)] + extra + ["127.0.0.1", str (port)],
+                                                      cwd=rundir, stdout=out, stderr=subprocess.STDOUT))
+
+        try:
+            status = master.wait (timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            print("MR::benchmark - run timed out")
+            master.kill ()
+            status = None
+        finally:
+            for w in workers:
+                w.kill ()
+                w.wait ()
+
+        if (status != 0):
+            print("MR::benchmark - run failed, see ", rundir)
+            return None
+
+        # average the phase times over the iterations
+        with open (os.path.join (rundir, "metrics.csv")) as f:
+            rows = [[float (v) for v in line.split (",")] for line in f.readlines ()[1:] if line.strip ()]
+        return [sum (col) / len (col) for col in list (zip (*rows))[:5]]
+
+    # -----------------------------------------------------------------------
+    # run the whole sweep
+    def sweep (self):
+        """ run every configuration and collect the results """
+
+        os.makedirs (self.workdir, exist_ok=True)
+        for size in self.sizes:
+            datafile, num_words = MR_Corpus (size, **self.corpus_args).generate (self.workdir)
+            size_mb = os.path.getsize (datafile) / (1024 * 1024)
+
+            for M, R, options in itertools.product (self.maps, self.reduces, self.configs):
+                print("MR::benchmark - {:.1f} MB, M = {}, R = {}, options = '{}'".format (size_mb, M, R, options))
+                times = self.run (datafile, M, R, options)
+                if (times is None):
+                    continue
+                total = times[4]
+                row = dict (zip (COLUMNS, [round (size_mb, 1), M, R, options] + times
+                                 + [size_mb / total, num_words / total]))
+                self.results.append (row)
+                print("MR::benchmark - total {:.3f} secs, {:.2f} MB/s, {:.0f} records/s".format (total, row['mb_per_sec'], row['records_per_sec']))
+
+    # -----------------------------------------------------------------------
+    # print the comparison table and save it as csv
+    def write_table (self):
+        """ output the results """
+
+        with open (self.outfile, "w", newline='') as f:
+            writer = csv.DictWriter (f, fieldnames=COLUMNS)
+            writer.writeheader ()
+            writer.writerows (self.results)
+
+        fmt = "{:>9} {:>3} {:>3}  {:<24} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8} {:>11}"
+        print(fmt.format ("size (MB)", "M", "R", "options", "map", "shuffle", "reduce", "finalize", "total", "MB/s", "records/s"))
+        for row in self.results:
+            print(fmt.format (row['size_mb'], row['M'], row['R'], row['options'] or "(default)",
+                              *["{:.3f}".format (row[c]) for c in COLUMNS[4:9]],
+                              "{:.2f}".format (row['mb_per_sec']), "{:.0f}".format (row['records_per_sec'])))
+
+##################################
+# Command line parsing
+##################################
+def parseCmdLineArgs ():
+    # parse the command line
+    parser = argparse.ArgumentParser ()
+
+    # add optional arguments
+    parser.add_argument ("-s", "--sizes", default="10M", help="Comma separated corpus sizes (with K, M or G suffix), default 10M")
+    parser.add_argument ("-M", "--maps", default="2", help="Comma separated numbers of map workers, default 2")
+    parser.add_argument ("-R", "--reduces", default="2", help="Comma separated numbers of reduce workers, default 2")
+    parser.add_argument ("-c", "--config", action="append", help="Options of mr_wordcount.py for one configuration, given as -c=\"<options>\" (repeat to compare several), default none")
+    parser.add_argument ("-i", "--iters", type=int, default=3, help="Number of iterations of each run, default 3")
+    parser.add_argument ("-V", "--vocab", type=int, default=50000, help="Num of distinct words of the corpus, default 50000")
+    parser.add_argument ("-z", "--skew", type=float, default=1.1, help="Zipf exponent of the word frequencies, default 1.1")
+    parser.add_argument ("-l", "--linewords", type=int, default=12, help="Average num of words per line, default 12")
+    parser.add_argument ("-S", "--seed", type=int, default=0, help="Seed of the corpus generator, default 0")
+    parser.add_argument ("-d", "--workdir", default="bench", help="Directory of the corpora and the runs, default bench")
+    parser.add_argument ("-p", "--masterport", type=int, default=7556, help="Master port of the first run, default 7556")
+    parser.add_argument ("-t", "--timeout", type=float, default=3600, help="Secs after which a run is killed, default 3600")
+    parser.add_argument ("-o", "--outfile", default="benchmark.csv", help="Output file of the comparison table, default benchmark.csv")
+
+    # parse the args
+    args = parser.parse_args ()
+
+    return args
+
+#------------------------------------------
+# main function
+def main ():
+    """ Main program """
+
+    print("MapReduce Benchmark program")
+    parsed_args = parseCmdLineArgs ()
+
+    try:
+        bench = MR_Benchmark (parsed_args)
+        bench.sweep ()
+        bench.write_table ()
+    except:
+        print("Unexpected error in benchmark:", sys.exc_info()[0])
+        raise
+
+#----------------------------------------------
+if __name__ == '__main__':
+    main ()
@@ -0,0 +1,229 @@
+#!/usr/bin/python
+#
+# Purpose: Content-addressed cache of the map outputs and the job results
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Without a cache, the master recomputes the whole map, shuffle and reduce
+# pipeline in every iteration and in every run, even when the data file
+# has not changed at all. With the job cache (-K option), the master keeps
+# on disk
+#
+#   - the output of every map task, keyed by the contents of its split and
+#     by everything else that decides the output: the code of the job
+#     functions, the partitioner (and so R) and the combiner, and
+#   - the final results of the job, keyed by the contents of all the
+#     splits, the code, the num of map tasks and of reducers, the
+#     partitioner, the combiner and the reduce aggregation.
+#
+# When the results of a job are in the cache, the iteration just copies
+# them. Otherwise only the map tasks of the splits that changed are run;
+# the outputs of the unchanged splits are taken from the cache.
+#
+# The contents of a split are identified by a hash of its bytes. Hashing
+# a large file takes time, so the hashes of the splits of a file are
+# themselves cached, keyed by the path, size and modification time of the
+# file; a file whose size and modification time are unchanged is not read
+# again. (As with make, a file rewritten within the resolution of its
+# modification time without changing its size is not noticed.)
+#
+# Every entry is a file of the cache directory, named by the hash of its
+# key. The modification time of a file is the last time it was used, so
+# that the least recently used entries are evicted first once the cache
+# grows beyond its size budget, across runs too.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import json                  # the keys are hashed in their json form
+import pickle                # serialization of the cached objects
+import shutil                # copying of the cached files
+import hashlib               # content hashes
+import inspect               # source of the job functions
+import importlib             # the modules of the job functions
+
+from mr_compress import open_spill  # the entries may be compressed
+
+# the modules whose code decides the outputs of the map and reduce tasks
+JOB_MODULES = ["mr_functions", "mr_combiner", "mr_partitioner", "mr_columnar"]
+
+# suffix of the files being written, which are not entries yet
+TMP_SUFFIX = ".tmp"
+
+# -----------------------------------------------------------------------
+# hash of a byte string
+def content_digest (data):
+    """ hex digest of some bytes """
+    return hashlib.blake2b (data, digest_size=16).hexdigest ()
+
+# -----------------------------------------------------------------------
+# hash of a json-able key
+def key_digest (key):
+    """ hex digest of a key """
+    return content_digest (json.dumps (key, sort_keys=True).encode ('utf-8'))
+
+# -----------------------------------------------------------------------
+# identity of the job functions: a hash of the source of their modules
+def code_digest (modules=JOB_MODULES):
+    """ hex digest of the code of the job """
+    source = ""
+    for name in modules:
+        source = source + inspect.getsource (importlib.import_module (name))
+    return content_digest (source.encode ('utf-8'))
+
+# ------------------------------------------------
+# The job cache
+#
+class MR_JobCache ():
+    """ Content-addressed on-disk cache with LRU eviction """
+
+    def __init__ (self, cachedir, max_bytes, compressor=None):
+        self.cachedir = cachedir          # directory of the entries
+        self.max_bytes = max_bytes        # size budget of the cache
+        self.compressor = compressor      # compresses the cached objects
+        self.code = code_digest ()        # identity of the job functions
+        self.entries = {}                 # name -> (size, last use)
+        self.hits = 0                     # num of lookups found
+        self.misses = 0                   # num of lookups not found
+        self.evictions = 0                # num of entries evicted
+
+        # the entries left by earlier runs, with the time they were last
+        # used. Files half written by a run that died are removed.
+        os.makedirs (cachedir, exist_ok=True)
+        for name in os.listdir (cachedir):
+            path = os.path.join (cachedir, name)
+            if (name.endswith (TMP_SUFFIX)):
+                os.remove (path)
+                continue
+            st = os.stat (path)
+            self.entries[name] = (st.st_size, st.st_mtime)
+
+    # -----------------------------------------------------------------------
+    def total_bytes (self):
+        """ bytes held by the cache """
+        return sum (size for size, used in self.entries.values ())
+
+    # -----------------------------------------------------------------------
+    # the entry of a key, marked as just used if it is there
+    def lookup (self, key):
+        """ path of the entry of key, None if not cached """
+
+        name = key_digest (key)
+        path = os.path.join (self.cachedir, name)
+        if (name not in self.entries or not os.path.exists (path)):
+            self.entries.pop (name, None)
+            self.misses = self.misses + 1
+            return None
+
+        used = time.time ()
+        os.utime (path, (used, used))
+        self.entries[name] = (self.entries[name][0], used)
+        self.hits = self.hits + 1
+        return path
+
+    # -----------------------------------------------------------------------
+    # add the entry of a key. The writer function writes the contents into
+    # the file it is given, which then atomically becomes the entry.
+    def store (self, key, writer):
+        """ add or replace the entry of key """
+
+        name = key_digest (key)
+        path = os.path.join (self.cachedir, name)
+        tmp = path + TMP_SUFFIX
+        writer (tmp)
+        size = os.path.getsize (tmp)
+        if (size > self.max_bytes):
+            # it would evict everything else and then itself
+            os.remove (tmp)
+            return
+        os.replace (tmp, path)
+        self.entries[name] = (size, time.time ())
+        self.evict ()
+
+    # -----------------------------------------------------------------------
+    # remove the least recently used entries until we are within budget
+    def evict (self):
+        """ enforce the size budget """
+
+        total = self.total_bytes ()
+        for name in sorted (self.entries, key=lambda n: self.entries[n][1]):
+            if (total <= self.max_bytes):
+                break
+            total = total - self.entries.pop (name)[0]
+            self.evictions = self.evictions + 1
+            try:
+                os.remove (os.path.join (self.cachedir, name))
+            except FileNotFoundError:
+                pass
+
+    # -----------------------------------------------------------------------
+    # cached python objects, pickled into (possibly compressed) spill files
+    def get (self, key):
+        """ the object cached under key, None if not cached """
+        path = self.lookup (key)
+        if (path is None):
+            return None
+        with open_spill (path, "rb") as f:
+            return pickle.load (f)
+
+    def put (self, key, obj):
+        """ cache an object under key """
+        def writer (tmp):
+            data = pickle.dumps (obj, protocol=pickle.HIGHEST_PROTOCOL)
+            with open_spill (tmp, "wb", self.compressor, data) as f:
+                f.write (data)
+        self.store (key, writer)
+
+    # -----------------------------------------------------------------------
+    # cached files, e.g., the results of a job
+    def get_file (self, key, filename):
+        """ copy the file cached under key to filename; False if not cached """
+        path = self.lookup (key)
+        if (path is None):
+            return False
+        shutil.copyfile (path, filename)
+        return True
+
+    def put_file (self, key, filename):
+        """ cache a copy of a file under key """
+        self.store (key, lambda tmp: shutil.copyfile (filename, tmp))
+
+    # -----------------------------------------------------------------------
+    # the content hashes of the splits of the data file. They are only
+    # computed when the file is new to us or its size or modification
+    # time changed since we last hashed it.
+    def fingerprint (self, splitter):
+        """ list of the content hashes of the splits """
+
+        st = os.stat (splitter.datafile)
+        key = ["input", splitter.datafile, st.st_size, st.st_mtime_ns, splitter.splits]
+        hashes = self.get (key)
+        if (hashes is None):
+            hashes = []
+            for i in range (len (splitter.splits)):
+                with splitter.view (i) as view:
+                    hashes.append (content_digest (view))
+            self.put (key, hashes)
+        return hashes
+
+    # -----------------------------------------------------------------------
+    # the keys of the map output of a split and of the results of a job
+    def map_key (self, split_hash, partitioner, combiner, form="records"):
+        """ key of the output of a map task, kept in the given form """
+        return ["map", form, self.code, split_hash, partitioner, combiner]
+
+    def result_key (self, split_hashes, R, partitioner, combiner, aggregate):
+        """ key of the results of a job """
+        return ["results", self.code, split_hashes, R, partitioner, combiner, aggregate]
+
+    # -----------------------------------------------------------------------
+    def stats (self):
+        """ summary line of the cache activity """
+        return "{} hits, {} misses, {} evictions, {} entries, {} bytes".format (
+            self.hits, self.misses, self.evictions, len (self.entries), self.total_bytes ())
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+#
+# Purpose: Columnar reduce engine using NumPy
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Instead of grouping the (key, val) entries of a reduce task as Python
+# lists and adding up each group in a Python loop, the reduce engine here
+# holds the entries as columns:
+#   - every unique key is dictionary-encoded to an integer id, which is
+#     cheap since the binary wire format already sends each block with a
+#     dictionary of its unique keys (see mr_wire.py),
+#   - the key ids and the vals are kept in NumPy arrays,
+#   - the entries are sorted by key id once, and all the groups are then
+#     aggregated in one go with the reduceat of a NumPy ufunc.
+#
+# The aggregation is pluggable. Besides the sum needed by wordcount, the
+# numeric (e.g., energy data) workloads can ask for min, max, mean or count.
+#
+
+# system and time
+import os
+import sys
+
+import numpy as np           # the columns and their aggregation
+
+# -----------------------------------------------------------------------
+# the aggregations, each of which takes the vals sorted by key id and the
+# start index of every group, and returns one result per group
+def _agg_sum (vals, starts, counts):
+    return np.add.reduceat (vals, starts)
+
+def _agg_min (vals, starts, counts):
+    return np.minimum.reduceat (vals, starts)
+
+def _agg_max (vals, starts, counts):
+    return np.maximum.reduceat (vals, starts)
+
+def _agg_mean (vals, starts, counts):
+    return np.add.reduceat (vals, starts) / counts
+
+def _agg_count (vals, starts, counts):
+    return counts
+
+AGGREGATES = {'sum': _agg_sum,
+              'min': _agg_min,
+              'max': _agg_max,
+              'mean': _agg_mean,
+              'count': _agg_count}
+
+# ------------------------------------------------
+# The columnar reduce engine used by the reduce workers
+#
+class MR_ColumnarReduce ():
+    """ Dictionary-encoded, NumPy based reduce engine """
+
+    def __init__ (self, aggregate="sum"):
+        self.agg_func = AGGREGATES[aggregate]  # how the vals of a key combine
+        self.key_ids = {}                      # key -> its integer id
+        self.keys = []                         # id -> its key
+        self.id_cols = []                      # key id columns of the blocks
+        self.val_cols = []                     # val columns of the blocks
+
+    # -----------------------------------------------------------------------
+    # the id of a key, assigning the next id to a new key
+    def key_id (self, key):
+        """ dictionary encoding of a key """
+        kid = self.key_ids.get (key)
+        if (kid is None):
+            kid = len (self.keys)
+            self.key_ids[key] = kid
+            self.keys.append (key)
+        return kid
+
+    # -----------------------------------------------------------------------
+    # add a block of entries given as its dictionary of keys, the index
+    # into that dictionary of every entry (None when the i'th entry has
+    # the i'th key) and the column of vals
+    def add_block (self, keys, ids, vals):
+        """ add the columns of a block of entries """
+
+        if (len (vals) == 0):
+            return
+
+        # translate the block's dictionary into our own key ids
+        lookup = np.fromiter ((self.key_id (k) for k in keys), dtype=np.int64, count=len (keys))
+        if (ids is not None):
+            lookup = lookup[np.asarray (ids, dtype=np.int64)]
+        self.id_cols.append (lookup)
+        self.val_cols.append (np.asarray (vals))
+
+    # -----------------------------------------------------------------------
+    # add a list of (key, val) entries
+    def add_pairs (self, pairs):
+        """ add a block of entries given as (key, val) pairs """
+        self.add_block ([k for k, v in pairs], None, [v for k, v in pairs])
+
+    # -----------------------------------------------------------------------
+    # aggregate the vals of every key
+    def results (self):
+        """ list of (key, aggregate) sorted by key """
+
+        if (not self.keys):
+            return []
+
+        ids = np.concatenate (self.id_cols)
+        vals = np.concatenate (self.val_cols)
+
+        # bring the entries of each key together. The groups then start
+        # wherever the key id changes, and every key has at least one
+        # entry since ids are only handed out for keys we have seen.
+        order = np.argsort (ids, kind='stable')
+        ids = ids[order]
+        vals = vals[order]
+        starts = np.flatnonzero (np.concatenate (([True], ids[1:] != ids[:-1])))
+        counts = np.diff (np.append (starts, len (ids)))
+
+        aggregates = self.agg_func (vals, starts, counts).tolist ()
+
+        # the groups are in key id order, i.e., the order in which we first
+        # saw the keys. The output is sorted by key like the shuffle does.
+        by_key = sorted (range (len (self.keys)), key=self.keys.__getitem__)
+        return [(self.keys[i], aggregates[i]) for i in by_key]
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+#
+# Purpose: Map-side combiner that pre-aggregates intermediate key/val pairs
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Without a combiner, the map worker emits one (word, 1) entry for
+# every single occurrence of a word. For a commutative and
+# associative operation like the addition in wordcount, we can instead
+# aggregate the values per key inside the map worker and send just one
+# entry per unique key, which cuts the bytes sent to the master and the
+# input to the shuffle by orders of magnitude.
+#
+# The aggregation table is bounded: when it holds max_keys distinct keys,
+# its contents are moved into the per-reducer output buckets and the
+# table starts afresh. The buckets are bounded too: once they hold
+# max_keys entries, each of them is sorted and spilled to disk as a run
+# (see mr_shuffle.py) in a local temporary directory. At the end, the
+# runs of every partition are merged by key and the vals of each key are
+# combined again, so the output has one entry per unique key (or every
+# entry, without a combine function) and the duplicates of the spills do
+# not pile up in memory. The output itself, which is sent in one piece,
+# is then the only thing that grows with the input.
+#
+
+# system and time
+import os
+import sys
+
+import operator              # the combine functions
+import functools             # reduce
+import shutil                # remove the temporary directory
+import tempfile              # local temporary directory of the runs
+
+# the combine functions the master may ask for by name. The value "none"
+# disables the combiner so that every occurrence is emitted as is.
+COMBINE_FUNCS = {'sum': operator.add,
+                 'min': min,
+                 'max': max,
+                 'none': None}
+
+# default bound on the number of distinct keys held in the table, and on
+# the number of entries held in the buckets
+DEFAULT_MAX_KEYS = 1000000
+
+# ------------------------------------------------
+# The combiner used by the map workers
+#
+class MR_Combiner ():
+    """ Bounded map-side combiner """
+
+    def __init__ (self, partitioner, combiner="sum", max_keys=DEFAULT_MAX_KEYS, tmpdir=None):
+        self.partitioner = partitioner              # decides the reducer of a key
+        self.combiner = combiner                    # name of the combine function
+        self.combine_func = COMBINE_FUNCS[combiner] # how two vals are combined
+        self.max_keys = max_keys                    # bound on the table and buckets
+        self.tmpdir = tmpdir                        # where the temporary directory goes
+        self.workdir = None                         # our temporary directory, once needed
+        self.runs = None                            # per partition runs on disk, once needed
+        self.table = {}                             # the aggregation table
+        self.records_in = 0                         # num of entries added
+        self.records_out = 0                        # num of entries output
+        self.num_spills = 0                         # num of times table spilled
+        self.num_runs = 0                           # num of times buckets spilled
+
+        # the output entries, one list per reducer partition
+        self.buckets = [[] for r in range (partitioner.R)]
+        self.held = 0                               # num of entries in the buckets
+
+    # -----------------------------------------------------------------------
+    # add one intermediate key and val, which stands for n entries when
+    # the caller has already added up the vals of n of them
+    def add (self, key, val, n=1):
+        """ add an entry to the combiner """
+        self.records_in = self.records_in + n
+
+        # no combining needed, so emit the entry right away
+        if (self.combine_func is None):
+            self.emit (key, val)
+            return
+
+        if (key in self.table):
+            self.table[key] = self.combine_func (self.table[key], val)
+        else:
+            # make room if the table is full
+            if (len (self.table) >= self.max_keys):
+                self.spill ()
+            self.table[key] = val
+
+    # -----------------------------------------------------------------------
+    # save an entry into the bucket of the reducer that owns it
+    def emit (self, key, val):
+        """ emit an entry into its reducer bucket """
+        self.buckets[self.partitioner.partition (key)].append ((key, val))
+        self.held = self.held + 1
+        if (self.held >= self.max_keys):
+            self.spill_buckets ()
+
+    # -----------------------------------------------------------------------
+    # move all the entries of the table to the reducer buckets
+    def spill (self):
+        """ spill the aggregation table """
+        table = self.table
+        self.table = {}
+        for key, val in table.items ():
+            self.emit (key, val)
+        self.num_spills = self.num_spills + 1
+
+    # -----------------------------------------------------------------------
+    # sort the entries of every bucket and write them as the next run of
+    # its partition, combined by key
+    def spill_buckets (self):
+        """ spill the reducer buckets to disk """
+
+        # the shuffle engine imports our combine functions, hence the late import
+        from mr_shuffle import MR_Shuffle
+
+        if (self.runs is None):
+            self.workdir = tempfile.mkdtemp (prefix="combiner_", dir=self.tmpdir)
+            self.runs = [MR_Shuffle (0, r, self.combiner, None, self.workdir) for r in range (self.partitioner.R)]
+        for r, bucket in enumerate (self.buckets):
+            if (bucket):
+                self.runs[r].spill_run ([[k, v] for k, v in bucket])
+        self.buckets = [[] for r in range (self.partitioner.R)]
+        self.held = 0
+        self.num_runs = self.num_runs + 1
+
+    # -----------------------------------------------------------------------
+    # the entries of a partition merged from its runs, with the vals of
+    # each key combined
+    def merge_partition (self, shuffle):
+        """ list of the (key, val) entries of the runs of a partition """
+        shuffle.reduce_fanin ()
+        entries = []
+        for k, g in shuffle.merge_runs (shuffle.runs):
+            if (self.combine_func is None):
+                entries.extend ((k, v) for k, v in g)
+            else:
+                entries.append ((k, functools.reduce (self.combine_func, (v for k, v in g))))
+        return entries
+
+    # -----------------------------------------------------------------------
+    # flush whatever remains and return the per-reducer buckets
+    def results (self):
+        """ the combined entries, one list per reducer """
+        if (self.table):
+            self.spill ()
+
+        # the runs, if any, are merged back into the buckets
+        if (self.runs is not None):
+            try:
+                self.spill_buckets ()
+                self.buckets = [self.merge_partition (shuffle) for shuffle in self.runs]
+            finally:
+                shutil.rmtree (self.workdir, ignore_errors=True)
+                self.workdir = None
+                self.runs = None
+
+        self.records_out = sum (len (bucket) for bucket in self.buckets)
+        print("Combiner: records in = ", self.records_in, ", records out = ", self.records_out, ", spills = ", self.num_spills, ", runs = ", self.num_runs)
+        return self.buckets
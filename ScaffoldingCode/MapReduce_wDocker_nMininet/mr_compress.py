@@ -0,0 +1,286 @@
+#!/usr/bin/python
+#
+# Purpose: Adaptive compression of the intermediate data
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The intermediate key/val records cross the network several times (map
+# results, the p2p shuffle, reduce tasks and results) and are spilled to
+# disk by the master (the Map csv files, the sorted runs and the shuffle
+# files). On bandwidth limited links, e.g., the TCLink topologies of
+# mr_topology.py, moving these bytes is what takes the time.
+#
+# Here we compress the frames of the binary wire format (see mr_wire.py)
+# and the spill files. The codecs are zlib and lzma from the standard
+# library, plus lz4 and zstd when their packages are installed.
+#
+# In the "auto" mode, the codec of a block is picked by measuring what
+# each codec does to a sample of the block: we estimate the time to
+# compress, move and decompress the block as
+#
+#     compress time + decompress time + compressed size / bandwidth
+#
+# and pick the cheapest, which may well be no compression at all for
+# incompressible data or fast links. Since the intermediate data of a job
+# tends to look alike, we only measure every PROBE_EVERY blocks and reuse
+# the choice in between. The choice is made per kind of block, since the
+# keys of a block, its numeric columns and the spill files compress quite
+# differently.
+#
+# Each compressor also counts the raw and compressed bytes it has seen, so
+# that the master can report the bytes saved in every phase.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import zlib                  # fast general purpose codec
+import lzma                  # slow but strong codec
+import gzip                  # zlib compressed spill files
+import builtins              # the plain open
+import threading             # the counts are shared by threads
+
+# the codecs: name -> (compress, decompress). Optional faster codecs are
+# added if their packages happen to be installed.
+CODECS = {'zlib': (lambda data: zlib.compress (data, 1), zlib.decompress),
+          'lzma': (lambda data: lzma.compress (data, preset=0), lzma.decompress)}
+
+try:
+    import lz4.frame
+    CODECS['lz4'] = (lz4.frame.compress, lz4.frame.decompress)
+except ImportError:
+    pass
+
+try:
+    import zstandard
+    CODECS['zstd'] = (zstandard.ZstdCompressor (level=1).compress, zstandard.ZstdDecompressor ().decompress)
+except ImportError:
+    pass
+
+# blocks smaller than this are not worth compressing
+MIN_BLOCK = 1024
+
+# bytes of a block we compress to measure the codecs
+SAMPLE_SIZE = 65536
+
+# num of blocks after which we measure the codecs again
+PROBE_EVERY = 32
+
+# assumed bandwidth (bytes/sec) of the network, 100 Mbps by default
+DEFAULT_BANDWIDTH = 100 * 1000 * 1000 / 8
+
+# -----------------------------------------------------------------------
+# the codecs this process can use
+def available_codecs ():
+    """ names of the codecs we have """
+    return ["none"] + sorted (CODECS)
+
+# -----------------------------------------------------------------------
+# a compressor with the settings the master sent us in a task, reusing the
+# one we already have (and what it has measured) if they are the same
+def compressor_for (settings, compressor=None):
+    """ compressor for the given settings, None for no settings """
+    if (settings is None):
+        return None
+    if (compressor is not None and compressor.settings () == settings):
+        return compressor
+    return MR_Compressor (**settings)
+
+# ------------------------------------------------
+# The compressor, used on both ends of a connection
+#
+class MR_Compressor ():
+    """ Adaptive per-block compressor """
+
+    def __init__ (self, mode="auto", codecs=None, bandwidth=DEFAULT_BANDWIDTH):
+        self.mode = mode                 # none, auto or the codec to use
+        self.bandwidth = bandwidth       # bytes/sec assumed for the cost
+        # the codecs auto may choose from, i.e., those that every process
+        # of the job has
+        self.codecs = [c for c in (CODECS if codecs is None else codecs) if c in CODECS]
+        self.best = {}                   # kind -> codec chosen by its last probe
+        self.since_probe = {}            # kind -> num of blocks since that probe
+        self.raw_bytes = 0               # bytes before compression
+        self.packed_bytes = 0            # bytes after compression
+        # the master compresses and decompresses on several threads
+        self.lock = threading.Lock ()
+
+    # -----------------------------------------------------------------------
+    # the settings of this compressor, which the master sends the workers
+    def settings (self):
+        """ json-able settings of this compressor """
+        return {'mode': self.mode, 'codecs': self.codecs, 'bandwidth': self.bandwidth}
+
+    # -----------------------------------------------------------------------
+    # measure the cost of every codec on a sample of the data
+    def probe (self, data, kind):
+        """ pick the cheapest codec for data of this kind """
+
+        sample = memoryview (data).cast ('B')[:SAMPLE_SIZE]
+        best_cost = len (sample) / self.bandwidth
+        self.best[kind] = "none"
+        for name in self.codecs:
+            compress, decompress = CODECS[name]
+            start_time = time.perf_counter ()
+            packed = compress (sample)
+            decompress (packed)
+            cost = time.perf_counter () - start_time + len (packed) / self.bandwidth
+            if (cost < best_cost):
+                self.best[kind] = name
+                best_cost = cost
+        self.since_probe[kind] = 0
+
+    # -----------------------------------------------------------------------
+    # the codec for a block of data of the given kind
+    def choose (self, data, kind="data"):
+        """ name of the codec to use for this block """
+
+        if (self.mode != "auto"):
+            return self.mode
+        if (len (memoryview (data).cast ('B')) < MIN_BLOCK):
+            return "none"
+        if (self.since_probe.get (kind, PROBE_EVERY) >= PROBE_EVERY):
+            self.probe (data, kind)
+        self.since_probe[kind] = self.since_probe[kind] + 1
+        return self.best[kind]
+
+    # -----------------------------------------------------------------------
+    # compress a block; returns the codec used and the (compressed) block
+    def compress (self, data, kind="data"):
+        """ returns (codec, packed data) """
+
+        codec = self.choose (data, kind)
+        size = len (memoryview (data).cast ('B'))
+        if (codec == "none"):
+            self.account (size, size)
+            return codec, data
+
+        packed = CODECS[codec][0] (data)
+        if (len (packed) >= size):
+            # it did not pay off this time
+            self.account (size, size)
+            return "none", data
+
+        self.account (size, len (packed))
+        return codec, packed
+
+    # -----------------------------------------------------------------------
+    # decompress a block that was compressed with the given codec
+    def decompress (self, codec, data):
+        """ returns the raw block """
+
+        if (codec == "none"):
+            size = len (memoryview (data).cast ('B'))
+            self.account (size, size)
+            return data
+
+        raw = CODECS[codec][1] (data)
+        self.account (len (raw), len (memoryview (data).cast ('B')))
+        return raw
+
+    # -----------------------------------------------------------------------
+    def account (self, raw, packed):
+        """ count the bytes before and after compression """
+        with self.lock:
+            self.raw_bytes = self.raw_bytes + raw
+            self.packed_bytes = self.packed_bytes + packed
+
+    def bytes_saved (self):
+        """ bytes saved by compression so far """
+        return self.raw_bytes - self.packed_bytes
+
+    def reset (self):
+        """ start counting afresh """
+        with self.lock:
+            self.raw_bytes = 0
+            self.packed_bytes = 0
+
+# ------------------------------------------------
+# A spill file being written, which counts its raw bytes so that the
+# bytes saved can be accounted for when it is closed
+#
+class MR_SpillFile ():
+    """ Write side of a (compressed) spill file """
+
+    def __init__ (self, filename, f, codec, compressor):
+        self.filename = filename         # name of the file
+        self.f = f                       # the (compressing) file object
+        self.codec = codec               # the codec of the file
+        self.compressor = compressor     # where we account the bytes
+        self.raw_bytes = 0               # bytes written before compression
+
+    def write (self, data):
+        # the bytes of an uncompressed file are simply its size
+        if (self.codec != "none"):
+            self.raw_bytes = self.raw_bytes + len (data.encode ('utf-8') if isinstance (data, str) else data)
+        return self.f.write (data)
+
+    def writelines (self, lines):
+        for line in lines:
+            self.write (line)
+
+    def close (self):
+        self.f.close ()
+        if (self.compressor is not None):
+            size = os.path.getsize (self.filename)
+            self.compressor.account (size if self.codec == "none" else self.raw_bytes, size)
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc):
+        self.close ()
+
+# the magic bytes at the start of the compressed files of each codec
+MAGIC = {b'\x1f\x8b': 'zlib',
+         b'\xfd7zXZ\x00': 'lzma',
+         b'\x04"M\x18': 'lz4',
+         b'(\xb5/\xfd': 'zstd'}
+
+# -----------------------------------------------------------------------
+# open a file with the given codec
+def _open (filename, mode, codec):
+    text = ('b' not in mode)
+    kwargs = {'newline': ''} if text else {}
+    mode = mode if (not text or 't' in mode) else mode + 't'
+    if (codec == "zlib"):
+        return gzip.open (filename, mode, compresslevel=1, **kwargs)
+    elif (codec == "lzma"):
+        return lzma.open (filename, mode, preset=0 if 'w' in mode else None, **kwargs)
+    elif (codec == "lz4"):
+        return lz4.frame.open (filename, mode, **kwargs)
+    elif (codec == "zstd"):
+        return zstandard.open (filename, mode, **kwargs)
+    return builtins.open (filename, mode.replace ('t', ''), **kwargs)
+
+# -----------------------------------------------------------------------
+# open a spill file for writing ("w" or "wb") or reading ("r" or "rb").
+# For writing, the codec is the one the compressor picks for the sample of
+# data given, or its latest choice. For reading, it is found from the
+# magic bytes at the start of the file.
+def open_spill (filename, mode, compressor=None, sample=None):
+    """ open a possibly compressed spill file """
+
+    if ('w' in mode):
+        codec = "none"
+        if (compressor is not None):
+            if (compressor.mode != "auto"):
+                codec = compressor.mode
+            elif (sample is not None):
+                codec = compressor.choose (sample, "spill")
+            else:
+                codec = compressor.best.get ("spill", "none")
+        return MR_SpillFile (filename, _open (filename, mode, codec), codec, compressor)
+
+    with builtins.open (filename, "rb") as f:
+        head = f.read (6)
+    codec = "none"
+    for magic, name in MAGIC.items ():
+        if (head.startswith (magic)):
+            codec = name
+    return _open (filename, mode, codec)
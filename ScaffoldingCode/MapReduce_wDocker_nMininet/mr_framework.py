@@ -28,9 +28,31 @@ import zmq                   # ZeroMQ library
 import json                  # json
 import pickle                # serialization
 
+import asyncio               # the event loop of the master
+import concurrent.futures    # threads for the blocking work
+
 import subprocess as sp      # unused in this impl
 
-from mr_thread import MR_Thread  # our Map Reduce threading class
+from mr_shuffle import MR_Shuffle, MR_ShuffleReader  # external sort shuffle
+from mr_partitioner import MR_HashPartitioner, MR_RangePartitioner, sample_boundaries, skew_partitioner, merge_salted
+from mr_functions import MERGE_FUNCS, parse_val  # merging of partial aggregates
+from mr_wire import encode_message  # wire format of the records
+from mr_split import MR_InputSplitter  # memory-mapped input splits
+from mr_scheduler import MR_Scheduler  # on-demand map task scheduling
+from mr_local import MR_LocalEngine  # process pool engine for a single node
+from mr_service import MR_Service  # runs the tasks on the workers
+from mr_compress import MR_Compressor, available_codecs, open_spill  # adaptive compression
+from mr_metrics import MR_IterReport, now  # per-task metrics and the iteration report
+from mr_cache import MR_JobCache  # cache of the map outputs and the job results
+from mr_incremental import MR_Increment  # incremental mode for append-only inputs
+from mr_racks import MR_Placement  # rack-aware task placement
+
+#--------------------------------------------------------------------------
+# write a line to a file and flush it
+def write_line (f, line):
+    "write and flush a line"
+    f.write (line)
+    f.flush ()
 
 #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
 # @NOTE@: changes will be needed here for Assignment
@@ -41,95 +63,56 @@ from mr_thread import MR_Thread  # our Map Reduce threading class
 #
 #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
 #--------------------------------------------------------------------------
-# barrier function for map and reduce phases. It is used in two scenarios.
-# (1) as a barrier to ensure that all map and reduce workers are up
-# (2) as a barrier to ensure that results from map and reduce workers arrive
+# save the results of a map task.
 #
-# This function is executed by a thread in parallel to the main program, where
-# the main program will block until all desired responses are received.
+# when a map worker completes its job, it is going to send us the stream of
+# intermediate keys and the value. We are going to save it in a local csv
+# file for use in our shuffle phase.  The csv approach is done because the
+# original code had assumed that the map results are in a csv file.
 #
-def barrier_sink (args):
-    "map or reduce phase barrier"
-
-    try:
-        # The master serves as a sink to receive the appropriate number of
-        # responses from workers under two conditions: to make sure they
-        # are up and running, and to receive results from the map and
-        # reduce phases.
-        #
-        # To do that, we start the ZeroMQ sink task. When the required number
-        # of map or reduce responses are received, the thread terminates
-        # doing any processing that is needed (e.g., saving the data in
-        # a file for results from map and reduce phases).
-        
-        print("Barrier sink thread starting with args: ", args)
-        receiver = args['receiver']
-
-        # The logic here is that we wait until the required number of
-        # ACKs are received 
-        i = 0
-        while (i < args['cond']):
-            # wait until all responses received from workers. For different
-            # operations we have a different behavior
-            if (args['op'] == "workers_up"):
-                # when the map and reduce worker are initialized the first
-                # time, they just send a single byte to let us know they
-                # are up. We just receive that byte and ignore it but make
-                # a note of the count
-                s = receiver.recv ()
-                
-            elif (args['op'] == "map_results"):
-                # when a map worker completes its job, it is going to send
-                # us the stream of intermediate keys and the value. We are
-                # going to save it in a local csv file for use in our shuffle
-                # phase.  The csv approach is done because the original code
-                # had assumed that the map results are in a csv file.
-                #
-                # We could possibly be doing this in a simpler way but for
-                # now it is done this way.
-                #
-                # Note that our map worker sends us json-ified response. So
-                # receive a json response.
-                map_resp = receiver.recv_json ()
-
-                # save this into a csv file. Number it based on the iteration
-                # we are in.
-                map_file = open ("Map"+str(i)+".csv", "w")
-
-                # write all the entries into the csv file
-                for j in range (len(map_resp)):
-                    map_file.write (map_resp[j]['token'] + str (",") + str(map_resp[j]['val']) + "\n")
-                # close the file
-                map_file.close ()
-                
-            elif (args['op'] == "reduce_results"):
-                # results from the reduce phase are also in json format
-                reduce_resp = receiver.recv_json ()
-
-                # Each reduce task saves its results in a file
-                reduce_file = open ("Reduce"+str(i)+".csv", "wt")
-
-                # write the csv entries to the file.
-                for j in range (len(reduce_resp)):
-                    reduce_file.write (reduce_resp[j]['token'] + str (",") + str(reduce_resp[j]['val']) + "\n")
-                    
-                # close the file
-                reduce_file.close ()
+# Note that our map worker sends us a header and one block of (key, val)
+# entries per reducer partition, in the binary or json wire format (see
+# mr_wire.py). The map worker has already partitioned its entries by reducer.
+#
+def save_map_results (map_resp, partitions, map_locations, compressor=None, workdir=""):
+    "save the output of a map task"
+
+    # In the peer-to-peer shuffle mode, the map worker keeps its
+    # output and serves it to the reducers directly. It only
+    # tells us where to find it and how big each partition is.
+    if ('endpoint' in map_resp):
+        map_locations[map_resp['id']] = {'endpoint': map_resp['endpoint'], 'sizes': map_resp['sizes']}
+        return
 
-            else:
-                print("Unknown operation. Should be aborted")
+    # save each partition into its own csv file. Number it
+    # based on the map task id and the partition. The file is compressed
+    # with the codec the compressor picks for its contents.
+    for r in range (len (partitions)):
+        data = "".join (k + "," + str (v) + "\n" for k, v in partitions[r])
+        map_file = open_spill (os.path.join (workdir, "Map"+str(map_resp['id'])+"_"+str(r)+".csv"), "w", compressor, data.encode ('utf-8'))
 
-            # increment the number of acks received
-            i = i + 1
-            # while this is good for debugging, I think this
-            # eats up time.
-            # print ("Barrier Ack# {} received".format(i))
+        # write all the entries into the csv file
+        map_file.write (data)
+        # close the file
+        map_file.close ()
 
-        print("Barrier received required number of ACKS = ", args['cond'])
-        return
-    
-    except:
-        print("Unexpected error in barrier thread: ", sys.exc_info()[0])
+#--------------------------------------------------------------------------
+# save the results of a reduce task.
+#
+# Each reduce task saves its results in a csv file which is assembled into
+# the final results by the finalize phase
+#
+def save_reduce_results (reduce_resp, blocks, workdir=""):
+    "save the output of a reduce task"
+
+    # Each reduce task saves its results in a file
+    reduce_file = open (os.path.join (workdir, "Reduce"+str(reduce_resp['id'])+".csv"), "wt")
+
+    # write the csv entries to the file.
+    reduce_file.writelines (k + "," + str (v) + "\n" for k, v in blocks[0])
+        
+    # close the file
+    reduce_file.close ()
 
 # ------------------------------------------------
 # The master for map-reduce. We capture its features in a class 
@@ -148,158 +131,118 @@ class MR_Framework ():
     # constructor
     #################################################################
     def __init__ (self, args):
-        self.M = args.map                     # num of map jobs
+        self.args = args                      # the options of the job
+        self.M = args.map                     # num of map workers
         self.R = args.reduce                  # num of reduce jobs
-        self.masterport = args.masterport     # port on which we push to workers
         self.iters = args.iters               # number of iterations
         self.metricsfile = args.metricsfile   # name of the big data file
+        self.reportfile = args.reportfile     # name of the per-task report file
+        self.report = None                    # report of the current iteration
+        self.dispatch_times = {}              # (phase, task) -> our time sending it
         self.datafile = args.datafile         # name of the big data file
-        self.uniquekeys = []                  # num of unique keys
-        self.groups = []                      # num of groups per unique key
-
-        self.sender4map = None                # used to send push messages
-        self.sender4reduce = None             # used to send push messages
-        self.rcv4barrier = None               # used to receive worker up signals
-        self.rcv4map_res = None               # used to receive map results
-        self.rcv4reduce_res = None            # used to receive reduce results
-        
-        # for the map and reduce barrier threads (to ensure the workers
-        # are up or they have produced result), we maintain a thread object
-        self.thr_obj_dict = {'workers_up': None, 'map_results': None, 'reduce_results': None}  
-        
-    # -----------------------------------------------------------------------
-    # Initialize the network connections and the barriers
-    def init_server (self):
-        """Initialize the networking part of the server"""
-
-        try:
-            # obtain the ZeroMQ context
-            context = zmq.Context().instance ()
-
-            # Socket to send messages on. Note, we use the divide-conquer
-            # pattern using PUSH and PULL
-            #
-            # Note that we create two such PUSH-PULL workflows:
-            # one for master to map, and other for master to reduce
-            #
-            # It had to be done this way due to the choice of comm pattern we
-            # made in Zero MQ. The * indicates any interface
-
-            #           This is our protocol
-            # base port + 0 to push args to map workers
-            # base port + 1 to push args to reduce workers
-            # base port + 2 to pull barrier signals indicating workers are up
-            # base port + 3 to pull results from map workers
-            # base port + 4 to pull results from reduce workers
-
-            # first, the push to map workers
-            self.sender4map = context.socket (zmq.PUSH)
-            # set high water mark and LINGER option to ensure messages
-            # get sent.
-            self.sender4map.setsockopt (zmq.LINGER, -1)
-            self.sender4map.setsockopt (zmq.SNDHWM, 0)
-            bind_addr = "tcp://*:" + str (self.masterport)
-            print("For master->map PUSH, bind addr is: ", bind_addr)
-            self.sender4map.bind  (bind_addr)
-
-            # next, the push to reduce workers
-            self.sender4reduce = context.socket (zmq.PUSH)
-            # set high water mark and LINGER option to ensure messages
-            # get sent.
-            self.sender4reduce.setsockopt (zmq.LINGER, -1)
-            self.sender4reduce.setsockopt (zmq.SNDHWM, 0)
-            bind_addr = "tcp://*:" + str (self.masterport+1)
-            print("For master->reduce PUSH, bind addr is: ", bind_addr)
-            self.sender4reduce.bind  (bind_addr)
-
-            # next, the pull from workers to indicate they are up
-            self.rcv4barrier = context.socket (zmq.PULL)
-            # set high water mark as unlimited
-            self.rcv4barrier.setsockopt (zmq.RCVHWM, 0)
-            bind_addr = "tcp://*:" + str (self.masterport+2)
-            print("For workers up->master PULL, bind addr is: ", bind_addr)
-            self.rcv4barrier.bind (bind_addr)
-
-            # next, the pull from map workers for results
-            self.rcv4map_res = context.socket (zmq.PULL)
-            # set high water mark as unlimited
-            self.rcv4map_res.setsockopt (zmq.RCVHWM, 0)
-            bind_addr = "tcp://*:" + str (self.masterport+3)
-            print("For map results->master PULL, bind addr is: ", bind_addr)
-            self.rcv4map_res.bind (bind_addr)
-
-            # next, the pull from reduce workers for results
-            self.rcv4reduce_res = context.socket (zmq.PULL)
-            # set high water mark as unlimited
-            self.rcv4reduce_res.setsockopt (zmq.RCVHWM, 0)
-            bind_addr = "tcp://*:" + str (self.masterport+4)
-            print("For reduce results->master PULL, bind addr is: ", bind_addr)
-            self.rcv4reduce_res.bind (bind_addr)
-
-        except:
-            print("Unexpected error in init_server:", sys.exc_info()[0])
-            raise
+        self.sharedfs = args.sharedfs         # workers can read the datafile
+        self.engine = args.engine             # distributed or local execution
+        self.procs = args.procs or os.cpu_count ()  # pool size of the local engine
+        self.num_splits = args.splits or 4 * (self.procs if self.engine == "local" else self.M)  # num of map tasks (splits)
+        self.specfactor = args.specfactor     # straggler threshold for backups
+        self.tasktimeout = args.tasktimeout   # secs before a task is re-executed
+        self.task_overheads = []              # dispatch overheads of the tasks
+        self.last_iter_end = None             # when the last iteration ended
+        self.splitter = None                  # input splits of the datafile
+        self.shufflemem = args.shufflemem * 1024 * 1024  # shuffle memory budget in bytes
+        self.partitioner_type = args.partitioner  # hash or range partitioning
+        self.partitioner = None               # decides which reducer owns a key
+        self.aggregate = args.aggregate       # reduce aggregation of the vals
+        self.combiner = args.combiner         # map-side combine function
+
+        # the map-side combiner (and the combining in the shuffle runs)
+        # must agree with the reduce aggregation: min and max combine with
+        # themselves, while partial means or counts cannot be combined
+        if (self.combiner != "none" and self.aggregate != "sum"):
+            self.combiner = self.aggregate if self.aggregate in ("min", "max") else "none"
+        self.shuffle = args.shuffle           # master or p2p shuffle
+        self.wire = args.wire                 # binary or json wire format
+        self.pipeline = args.pipeline         # overlap shuffle/reduce with map
+        # compression of the intermediate frames and spill files, and the
+        # bytes it saved in each phase of the iteration
+        self.compressor = MR_Compressor (args.compress, bandwidth=args.bandwidth * 1000 * 1000 / 8)
+        self.bytes_saved = {}
+        # the job cache of the map outputs and the results, with its own
+        # compressor so that it does not count towards the bytes saved
+        self.cache = None
+        if (args.cachedir):
+            self.cache = MR_JobCache (args.cachedir, args.cachesize * 1024 * 1024,
+                                      MR_Compressor (args.compress, bandwidth=args.bandwidth * 1000 * 1000 / 8))
+        self.split_hashes = None              # content hashes of the splits
+        # in the incremental mode, only the bytes appended to the datafile
+        # since the last run are mapped and merged into the results
+        self.increment = MR_Increment (args.incremental, self.aggregate) if args.incremental else None
+        self.shufflers = None                 # streaming shuffles when pipelined
+        self.iteration = 0                    # the iteration we are in
+        self.map_locations = {}               # where map outputs live for p2p
+        self.map_racks = {}                   # rack of each map output
+        self.map_outputs = []                 # map outputs saved to files
+        # in the master shuffle mode, the map results may go through the
+        # rack aggregators, which merge those of several map tasks
+        self.rackagg = args.rackagg and self.shuffle == "master"
+        self.routed = {}                      # map task -> its aggregator
+        self.merged = [0, 0, 0, 0]            # merged results, tasks, records in and out
+        self.num_uniquekeys = 0               # num of unique keys
+        self.partition_chunks = {}            # num of chunks of each shuffle file
+        self.shuffle_readers = {}             # reducer -> (partition, reader) it streams
+        self.remapping = asyncio.Lock ()      # one re-execution of lost map outputs at a time
+
+        # the service that runs our tasks on the workers, possibly along
+        # with other jobs, and what sets us apart from them
+        if (args.weight <= 0):
+            raise ValueError ("The share of a job must be positive")
+        self.weight = args.weight             # our share of the workers
+        self.service = None                   # runs our tasks
+        self.job_id = 0                       # our id in the service
+        self.workdir = ""                     # directory of our files
+
+        # the event loop of the master, the thread that does our disk
+        # writes, and the spills handed to it in this phase
+        self.loop = None                      # the asyncio event loop
+        self.spiller = None                   # writes to disk, in order
+        self.spills = []                      # futures of the pending spills
 
     # -----------------------------------------------------------------------
     # reset data structures for the next iteration
     def reset_master (self):
         """reset data structures"""
-        self.uniquekeys = []
-        self.groups = []
-        
-    # -----------------------------------------------------------------------
-    # Create the barrier sink (either for map or reduce) as a separate process 
-    # or thread. We are using the thread approach as it is easier.
-    def start_barrier_sink (self, op):
-        """Start a barrier thread to ensure all expected replies are received"""
+        self.num_uniquekeys = 0
+        self.map_locations.clear ()
+        self.map_racks.clear ()
+        self.map_outputs = []
+        self.routed.clear ()
+        self.close_readers ()
+        self.task_overheads = []
+        self.dispatch_times.clear ()
+        self.iteration = self.iteration + 1
 
-        try:
-            # The process-based approach of creating a child barrier process
-            # is working fine. But we will use thread-based as it is easier
-
-            #--------------- this part works fine ----------------------
-            # create the apparatus to start a child process
-            #operation = os.getcwd () + "/mr_barriersink.py"
-            #args = ['/usr/bin/python', operation, '-p', str(self.masterport+1), barrier_cond]
-            #print "MR::start_barrier_sink invoking child with args: ", args
-            # start the process
-            #p = sp.Popen (args)
-            #-------------------------------------------------------------------
-
-            # Note that barriers start at base port of master + 2, +3, and +4
-            # for map and reduce barriers, respectively. There are three
-            # possible operations; to check if the map and reduce workers
-            # are up or not; and then the map and reduce results themselves.
-            if (op == "workers_up"):
-                # need to receive response from these many workers
-                barrier_cond = self.M + self.R
-                port = self.masterport + 2
-                receiver = self.rcv4barrier
-            elif (op == "map_results"):
-                # need to receive response from these many workers
-                barrier_cond = self.M
-                port = self.masterport + 3
-                receiver = self.rcv4map_res
-            elif (op == "reduce_results"):
-                # need to receive response from these many workers
-                barrier_cond = self.R
-                port = self.masterport + 4
-                receiver = self.rcv4reduce_res
-            else:
-                print("bad op in starting barrier process")
-                return None
-
-            # create the args to send to the thread
-            args = {'op': op, 'port': port, 'cond': barrier_cond, 'receiver': receiver}
-            
-            # instantiate a thread obj and start the thread
-            print("MR::solve - start_barrier_sink with args: ", args)
-            self.thr_obj_dict[op] = MR_Thread (barrier_sink, args)
-            self.thr_obj_dict[op].start ()
+    # -----------------------------------------------------------------------
+    # the path of a file of the job, in its working directory
+    def path (self, name):
+        """path of a file of ours"""
+        return os.path.join (self.workdir, name)
 
-        except:
-            print("Unexpected error in init_server:", sys.exc_info()[0])
-            raise
+    # -----------------------------------------------------------------------
+    # blocking work is done off the event loop. The spill thread does the
+    # writes one after the other, in the order they are handed to it, so
+    # that, e.g., the shuffle of a partition sees every map output before.
+    def offload (self, func, *args):
+        """run func on the spill thread; returns an awaitable"""
+        return self.loop.run_in_executor (self.spiller, func, *args)
+
+    def spill (self, func, *args):
+        """run func on the spill thread, to be waited for by the phase"""
+        self.spills.append (self.offload (func, *args))
+
+    async def flush_spills (self):
+        """wait for all the spills so far"""
+        spills, self.spills = self.spills, []
+        await asyncio.gather (*spills)
 
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     # @NOTE@: changes will be needed here for the Assignment
@@ -311,72 +254,220 @@ class MR_Framework ():
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
 
     ###################################################################
-    # This method splits the initial document into almost equal sized
-    # chunks and distributes it to the map workers
+    # This method splits the initial document into many almost equal sized
+    # chunks and hands them out to the map workers on demand
     ###################################################################
-    def distribute_map_tasks (self):
-        "create the json object to be sent to all map tasks"
+    async def send_map_task (self, worker, i):
+        "send map task i to the given idle map worker"
+
+        start = now ()
+
+        # create the argument to send to the task
+        map_arg = {'id': i,
+                   'size': self.splitter.splits[i][1],
+                   'partitioner': self.partitioner.to_dict (),
+                   'combiner': self.combiner,
+                   'shuffle': self.shuffle,
+                   'wire': self.wire,
+                   'compress': self.compressor.settings (),
+                   'job': self.job_id,
+                   'iter': self.iteration}
+
+        # in the p2p mode, the map workers keep the outputs of the jobs
+        # that are still running only
+        if (self.shuffle == "p2p"):
+            map_arg['live'] = sorted (self.service.jobs)
+
+        # the results go to the rack aggregator of the worker, if it has
+        # one, and straight to us otherwise
+        self.routed.pop (i, None)
+        if (self.rackagg):
+            aggregator = self.service.aggregator_for (worker)
+            if (aggregator is not None):
+                self.routed[i], map_arg['aggregator'] = aggregator
+
+        # the ROUTER pattern needs the identity of the worker and an empty
+        # delimiter in front of the message
+        if (self.sharedfs):
+            # the worker reads the chunk from the shared file system
+            map_arg['split'] = self.splitter.descriptor (i)
+            await self.service.sender4map.send_multipart ([worker, b'', json.dumps (map_arg).encode ('utf-8')])
+        else:
+            # the chunk itself goes as a raw frame straight out of
+            # the memory-mapped file, without copying or decoding it
+            await self.service.sender4map.send_multipart ([worker, b'', json.dumps (map_arg).encode ('utf-8'),
+                                                           self.splitter.view (i)], copy=False)
+
+        self.note_dispatch ("map", i, now () - start)
+
+    # -----------------------------------------------------------------------
+    # the time we spent handing a task out (all its copies) counts towards
+    # the master time of the task in the report
+    def note_dispatch (self, phase, task, elapsed):
+        "add to the time spent dispatching a task"
+        self.dispatch_times[(phase, task)] = self.dispatch_times.get ((phase, task), 0) + elapsed
+
+    # -----------------------------------------------------------------------
+    # a rack aggregator has died along with the map results it held, so the
+    # map tasks we routed to it run again unless they are done
+    def aggregator_lost (self, name):
+        "re-execute the map tasks routed to a dead aggregator"
+        scheduler = self.service.schedulers["map"].get (self.job_id)
+        if (scheduler is None):
+            return
+        for i in [i for i, agg in self.routed.items () if agg == name]:
+            del self.routed[i]
+            if (i not in scheduler.done):
+                scheduler.retry (i)
+
+    # -----------------------------------------------------------------------
+    # in the p2p mode, a reducer could not fetch the outputs of some map
+    # tasks, e.g., since their map worker was restarted. The outputs are
+    # mapped again, after which the reduce task is re-executed. The
+    # location of an output is forgotten only if it is the one the reducer
+    # tried, since another reducer may have had it mapped again meanwhile.
+    def map_outputs_lost (self, scheduler, resp):
+        "re-execute the map tasks whose outputs are lost"
+        if (resp['id'] in scheduler.done):
+            return
+        scheduler.hold (resp['id'])
+        for m, endpoint in resp['lost']:
+            if (self.map_locations.get (m, {}).get ('endpoint') == endpoint):
+                del self.map_locations[m]
+        asyncio.ensure_future (self.remap (scheduler, resp['id'], [m for m, endpoint in resp['lost']]))
+
+    async def remap (self, scheduler, task, lost):
+        "map the lost outputs again, then retry the reduce task"
+        try:
+            async with self.remapping:
+                missing = [m for m in lost if m not in self.map_locations]
+                if (missing):
+                    print("MR::solve - mapping again the lost outputs of map tasks ", missing)
+                    await self.service.run_phase (self, "map", MR_Scheduler (len (missing), self.specfactor, pending=missing,
+                                                                             task_timeout=self.tasktimeout,
+                                                                             placement=self.new_placement ("map")))
+            scheduler.retry (task)
+            await self.service.dispatch ("reduce")
+        except Exception as e:
+            self.service.fail_phase ("reduce", self.job_id, e)
+
+    # -----------------------------------------------------------------------
+    # the partitioner of the map tasks of this iteration
+    def new_partitioner (self):
+        "create the partitioner asked for"
+
+        # For range partitioning, we sample the input to find the key
+        # ranges of the reducers. For skew partitioning, we sample it to
+        # estimate the records of the frequent keys. With a combiner, a
+        # map task emits a key about once, and so the records of a key are
+        # at most the num of map tasks. Hot keys are split across reducers
+        # only if their partial aggregates can be merged.
+        if (self.partitioner_type == "range"):
+            return MR_RangePartitioner (self.R, sample_boundaries (self.datafile, self.R))
+        elif (self.partitioner_type == "skew"):
+            return skew_partitioner (self.datafile, self.R, self.num_splits if self.combiner != "none" else None,
+                                     self.aggregate in MERGE_FUNCS)
+        return MR_HashPartitioner (self.R)
+
+    # -----------------------------------------------------------------------
+    # the partitioner and the splits of the map tasks of this iteration
+    def prepare_map_tasks (self):
+        "set up the partitioner and split the document"
+
+        # the map workers partition their output by reducer using the
+        # partitioner we describe to them
+        self.partitioner = self.new_partitioner ()
+
+        # memory-map the datafile and create (almost) equal sized
+        # chunks. Each chunk ends at a whitespace so that no valid word
+        # gets split into two nonsensical words.
+        # In the incremental mode, the chunks only cover the whole words
+        # appended since the bytes we have processed already.
+        self.splitter = MR_InputSplitter (self.datafile, self.num_splits)
+        start = 0
+        if (self.increment is not None):
+            start = self.increment.resume (self.datafile)
+        self.splitter.open (start, complete=(self.increment is not None))
+        print("doc size = ", os.path.getsize (self.datafile), ", bytes to map = ", self.splitter.end - start, ", num of chunks = ", self.num_splits)
+
+        # the contents of the splits decide what we find in the job cache
+        if (self.cache is not None):
+            self.split_hashes = self.cache.fingerprint (self.splitter)
 
-        # find the file size and break it into (almost) equal sized chunks
+    # -----------------------------------------------------------------------
+    # the job cache keys of the output of map task i and of the results
+    def map_key (self, i, form="records"):
+        "job cache key of the output of a map task"
+        return self.cache.map_key (self.split_hashes[i], self.partitioner.to_dict (), self.combiner, form)
+
+    def result_key (self):
+        "job cache key of the results of the job"
+        return self.cache.result_key (self.split_hashes, self.R, self.partitioner.to_dict (), self.combiner, self.aggregate)
+
+    # -----------------------------------------------------------------------
+    # keep the output of a map task for the shuffle
+    def keep_map_output (self, map_resp, partitions):
+        "hand the output of a map task to the shuffle"
+
+        if (self.shufflers is not None):
+            # in the pipelined mode, the partitions go straight into the
+            # streaming shuffle instead of the map csv files
+            for r in range (self.R):
+                self.shufflers[r].add_records (partitions[r])
+        else:
+            save_map_results (map_resp, partitions, self.map_locations, self.compressor, self.workdir)
+            if ('endpoint' not in map_resp):
+                self.map_outputs.append (map_resp['id'])
+
+    async def schedule_map_tasks (self):
+        "schedule the map tasks of the split document until all are done"
+
+        # find the file size and break it into many (almost) equal sized
+        # chunks, more than the number of map workers
         #
-        # The way we are going to do this is that we will let the workers know
-        # the start byte and the num of bytes each map task must read from
-        # the original file.  To that end we first create a json obj that we
-        # are going to send to the workers so that each worker can process it
+        # The way we are going to do this is that we will send the workers
+        # the bytes of their chunk as a raw frame along with a json obj of
+        # the task arguments, or when they share our file system, just let
+        # them know the start byte and the num of bytes each map task must
+        # read from the original file.
+        #
+        # Each map worker asks for the next chunk when it is idle, so that
+        # fast workers do more chunks than slow ones. This method also acts
+        # as the map barrier: it returns only after the results of every
+        # chunk have arrived and have been saved.
 
         try:
-            # initialize the argument data structure that we plan to send to
-            # our workers. The data structure we are passing to the workers
-            # comprises the name of the datafile, the starting byte from the
-            # file to read and the number of bytes to read.
-
-            # compute the size of the datafile and create (almost) equal sized
-            # chunks
-            doc_size = os.path.getsize (self.datafile)
-            chunk_size = int (round (doc_size/self.M))  # integer division
-            print("doc size = ", doc_size, ", chunk size = ", chunk_size)
-
-            # the starting location of the next chunk to read,
-            # initialized to 0 (start)
-            locn2read = 0  
-
-            # handle to the input file
-            datafile = open (self.datafile,'r')
-        
-            # Note that we are splitting the file along bytes so it is
-            # very much possible that a valid word may get split into
-            # nonsensical two words but we don't care here and will treat
-            # these two split parts of a word as separate unique words
-            print(("MR::solve - master sending args to {} map workers:".format(self.M)))
-            for i in range (self.M):
-                # get the starting locn and size of the next chunk
-                if (i == self.M-1): # if this is the last chunk
-                    chunk_size = doc_size - locn2read
-
-                # seek the location in the file to read from
-                datafile.seek (locn2read, 0)
-
-                # read the chunk size
-                content = datafile.read (chunk_size)
-                
-                # create the argument to send to the task
-                map_arg = {'id': i,
-                           'size': chunk_size,
-                           'content' : content}
-
-                # now send this and one of the map tasks will receive it
-                # according to the PUSH-PULL pattern we are using
-                self.sender4map.send_json (map_arg)
-
-                # move the starting position that many bytes ahead
-                locn2read += chunk_size
-
-            print(("MR::solve - master done sending args to {} map workers:".format(self.M)))
-            # close the file after the loop
-            datafile.close ()
+            # the scheduler keeps track of which chunks are pending, running
+            # or done, and picks stragglers for speculative backups
+            scheduler = MR_Scheduler (self.num_splits, self.specfactor, task_timeout=self.tasktimeout,
+                                      placement=self.new_placement ("map"))
+
+            # the chunks whose output is in the job cache need not be
+            # mapped again. In the p2p mode the reducers fetch the map
+            # outputs from the map workers, so only the results are cached.
+            num_cached = 0
+            self.merged = [0, 0, 0, 0]
+            if (self.cache is not None and self.shuffle == "master"):
+                for i in range (self.num_splits):
+                    partitions = self.cache.get (self.map_key (i))
+                    if (partitions is not None):
+                        scheduler.skip_task (i)
+                        self.spill (self.keep_map_output, {'id': i}, partitions)
+                        num_cached = num_cached + 1
+                print("MR::solve - {} of {} map tasks taken from the job cache".format (num_cached, self.num_splits))
+
+            print(("MR::solve - master scheduling {} map tasks on {} map workers:".format(self.num_splits, self.M)))
+            await self.service.run_phase (self, "map", scheduler)
+
+            print(("MR::solve - master done with {} map tasks, {} speculative backups, {} re-executions, {} duplicates ignored".format(self.num_splits - num_cached, scheduler.num_backups, scheduler.num_retries, scheduler.num_duplicates)))
+            if (scheduler.placement is not None):
+                print("MR::solve - map placement: ", scheduler.placement.stats ())
+            if (self.merged[0]):
+                print("MR::solve - rack aggregators merged {} map results into {}, {} records into {}".format (
+                    self.merged[1], self.merged[0], self.merged[2], self.merged[3]))
             
         except:
-            print("Unexpected error in distribute_map_tasks:", sys.exc_info()[0])
+            print("Unexpected error in schedule_map_tasks:", sys.exc_info()[0])
             raise
 
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
@@ -388,34 +479,217 @@ class MR_Framework ():
     #
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     ###################################################################
-    # This method distributes tasks to the reduce workers
+    # This method schedules the tasks of the reduce workers
     ###################################################################
-    def distribute_reduce_tasks (self):
-        "create the json object to be sent to all reduce tasks"
+    async def schedule_reduce_tasks (self, scheduler):
+        "schedule the reduce tasks until all are done"
 
         # At the end of the shuffle phase, we had created temporary files
-        # that we want to send each to each reduce worker
+        # that we want to send each to each reduce worker. Just like the
+        # map workers, each reduce worker asks for a task when it is idle.
+        # This method acts as the reduce barrier: it returns only after
+        # the results of every partition have arrived and have been saved.
         try:
-            print(("MR::solve - master sending args to {} reduce workers:".format(self.R)))
-            for i in range (self.R):
-                # Open the corresponding shuffle file for reading
-                shufflefile = open ("Shuffle"+str(i)+".dat", "rb")
-
-                # retrieve the contents of the shuffle file using pickle
-                contents = pickle.load (shufflefile)
-
-                # close the shuffle file
-                shufflefile.close ()
-
-                # send the contents to the reducer
-                self.sender4reduce.send_json (contents)
+            print(("MR::solve - master scheduling {} reduce tasks:".format(self.R)))
+            await self.service.run_phase (self, "reduce", scheduler)
         
-            print(("MR::solve - master done sending args to {} reduce workers:".format(self.R)))
+            print(("MR::solve - master done with {} reduce tasks, {} speculative backups, {} re-executions, {} duplicates ignored".format(self.R, scheduler.num_backups, scheduler.num_retries, scheduler.num_duplicates)))
+            if (scheduler.placement is not None):
+                print("MR::solve - reduce placement: ", scheduler.placement.stats ())
             
         except:
-            print("Unexpected error in distribute_reduce_tasks:", sys.exc_info()[0])
+            print("Unexpected error in schedule_reduce_tasks:", sys.exc_info()[0])
             raise
 
+    # -----------------------------------------------------------------------
+    # the rack-aware placement of the tasks of a phase, if the service knows
+    # the racks of the workers
+    def new_placement (self, phase):
+        "placement of the tasks of a phase, or None"
+        if (self.service.racks is None):
+            return None
+        return MR_Placement (self.service.worker_rack, lambda task: self.task_racks (phase, task),
+                             self.service.worker_racks (phase), self.service.locality_wait)
+
+    # -----------------------------------------------------------------------
+    # where the input of a task lives. The chunks, and the partitions
+    # shuffled by us, come from the master, which also has the datafile
+    # when it is on a shared file system. In the p2p mode, a reducer
+    # fetches its partition from the map workers that hold a part of it.
+    def task_racks (self, phase, task):
+        "rack -> size of the input of a task there"
+
+        if (phase == "map" or self.shuffle != "p2p"):
+            return {self.service.master_rack: 1}
+        sizes = {}
+        for m, loc in self.map_locations.items ():
+            rack = self.map_racks.get (m)
+            sizes[rack] = sizes.get (rack, 0) + loc['sizes'][task]
+        return sizes
+
+    # -----------------------------------------------------------------------
+    # the bytes a completed task moved, as (from rack, to rack, bytes): its
+    # task and result between the master and the worker, and in the p2p
+    # mode the parts of its partition it fetched from the map workers. A
+    # map result merged by a rack aggregator went to the rack of the
+    # aggregator instead.
+    def task_transfers (self, resp, rack, merged_rack=None):
+        "the bytes moved by a task"
+        metrics = resp.get ('metrics') or {}
+        fetched = dict (resp.get ('fetched', []))
+        master = self.service.master_rack
+        transfers = [(master, rack, metrics.get ('bytes_in', 0) - sum (fetched.values ())),
+                     (rack, master if merged_rack is None else merged_rack, metrics.get ('bytes_out', 0))]
+        for m, size in fetched.items ():
+            transfers.append ((self.map_racks.get (m), rack, size))
+        return transfers
+
+    # -----------------------------------------------------------------------
+    # keep the result of a completed task. The outputs are saved by the
+    # spill thread while the service goes on serving the workers.
+    def task_result (self, phase, scheduler, resp, blocks, master_start):
+        "keep the result of a task"
+
+        # a rack aggregator sends the merged result of several map tasks,
+        # with the metrics of each of them and of the merge
+        tasks = resp.get ('tasks') or [resp]
+        merge = resp.get ('merge')
+        durations = scheduler.durations[-len (tasks):]
+
+        # the time the task took us beyond the time the worker spent on it
+        # is our overhead
+        for task, duration in zip (tasks, durations):
+            self.task_overheads.append (duration - task.get ('elapsed', 0))
+
+        # the rack of the worker that ran the task tells where its output
+        # is, and how many of the bytes it moved crossed the racks. The
+        # merged result went from the rack of the aggregator to us once.
+        cross_rack_bytes = [0] * len (tasks)
+        if (scheduler.placement is not None):
+            merged_rack = self.service.worker_rack (merge['worker']) if merge else None
+            for n, task in enumerate (tasks):
+                worker = (task.get ('metrics') or {}).get ('worker')
+                rack = self.service.worker_rack (worker)
+                if (phase == "map"):
+                    self.map_racks[task['id']] = rack
+                transfers = self.task_transfers (task, rack, merged_rack)
+                if (merge and n == 0):
+                    transfers.append ((merged_rack, self.service.master_rack, merge['bytes_out']))
+                cross_rack_bytes[n] = scheduler.placement.account (task['id'], worker, transfers)
+
+        if (merge):
+            self.merged = [self.merged[0] + 1, self.merged[1] + len (tasks),
+                           self.merged[2] + merge['records_in'], self.merged[3] + merge['records_out']]
+
+        if (phase == "map"):
+            # the merged output of several map tasks is not that of any
+            # one of them, and so is not kept in the job cache
+            self.spill (self.keep_map_output, resp, blocks)
+            if (self.cache is not None and 'endpoint' not in resp and not merge):
+                self.spill (self.cache.put, self.map_key (resp['id']), blocks)
+        else:
+            # in the p2p mode, the reducer tells us what compression
+            # saved on the partition it fetched
+            if ('compressed' in resp):
+                self.compressor.account (*resp['compressed'])
+            self.spill (save_reduce_results, resp, blocks, self.workdir)
+
+        # the time we spent on a merged result is shared by its tasks
+        master_time = (now () - master_start) / len (tasks)
+        for n, task in enumerate (tasks):
+            self.report_task (phase, scheduler, task, master_time, cross_rack_bytes[n],
+                              durations[n] if n < len (durations) else 0)
+
+    # -----------------------------------------------------------------------
+    # add a completed task to the report of the iteration, along with what
+    # we measured of it
+    def report_task (self, phase, scheduler, resp, master_time, cross_rack_bytes=0, turnaround=None):
+        "report the metrics of a completed task"
+        task = resp['id']
+        self.report.add_task (phase, resp.get ('metrics'),
+                              queue_wait=scheduler.queue_waits.get (task, 0),
+                              turnaround=scheduler.durations[-1] if turnaround is None else turnaround,
+                              master_time=master_time + self.dispatch_times.get ((phase, task), 0),
+                              cross_rack_bytes=cross_rack_bytes)
+
+    # -----------------------------------------------------------------------
+    # send the reduce task of partition i to the given idle reduce worker
+    async def send_reduce_task (self, worker, i):
+        "send the reduce task of one partition"
+
+        start = now ()
+
+        # loading and encoding the partition is blocking work for the
+        # thread pool
+        frames = await self.loop.run_in_executor (self.service.executor, self.reduce_task_frames, worker, i)
+
+        # send the contents to the reducer. The ROUTER pattern needs the
+        # identity of the worker and an empty delimiter in front.
+        await self.service.sender4reduce.send_multipart ([worker, b''] + frames, copy=False)
+        self.note_dispatch ("reduce", i, now () - start)
+
+    # -----------------------------------------------------------------------
+    # the frames of the reduce task of partition i
+    def reduce_task_frames (self, worker, i):
+        "encode the reduce task of one partition"
+
+        if (self.shuffle == "p2p"):
+            # In the peer-to-peer mode, we only tell the reducer
+            # which map workers hold a non-empty part of its
+            # partition. The reducer pulls the data from them.
+            sources = [{'id': m, 'endpoint': loc['endpoint']}
+                       for m, loc in sorted (self.map_locations.items ())
+                       if loc['sizes'][i] > 0]
+            reduce_arg = {'id': i, 'job': self.job_id, 'iter': self.iteration, 'wire': self.wire, 'aggregate': self.aggregate, 'sources': sources,
+                          'compress': self.compressor.settings ()}
+            blocks = []
+        else:
+            # the corresponding shuffle file is saved as a sequence of
+            # pickled chunks. The first one goes with the task, and the
+            # reducer asks for the others one at a time, so that neither
+            # of us holds the whole partition.
+            reduce_arg = {'id': i, 'job': self.job_id, 'iter': self.iteration, 'aggregate': self.aggregate, 'compress': self.compressor.settings (),
+                          'chunks': self.partition_chunks[i]}
+            blocks = [self.partition_chunk (worker, i, 0)]
+
+        return encode_message (reduce_arg, blocks, self.wire, self.compressor)
+
+    # -----------------------------------------------------------------------
+    # the frames of chunk j of partition i, which a reducer has asked for
+    def reduce_chunk_frames (self, worker, i, j):
+        "encode a chunk of a partition"
+        header = {'id': i, 'job': self.job_id, 'iter': self.iteration, 'chunk': j}
+        return encode_message (header, [self.partition_chunk (worker, i, j)], self.wire, self.compressor)
+
+    # -----------------------------------------------------------------------
+    # chunk j of partition i as a single sorted block. Every reducer reads
+    # its shuffle file with a reader of its own, which goes once it has
+    # read the last chunk.
+    def partition_chunk (self, worker, i, j):
+        "the entries of a chunk of a shuffle file"
+
+        partition, reader = self.shuffle_readers.get (worker, (None, None))
+        if (partition != i):
+            if (reader is not None):
+                reader.close ()
+            reader = MR_ShuffleReader (self.path ("Shuffle"+str(i)+".dat"))
+            self.shuffle_readers[worker] = (i, reader)
+
+        # flatten the groups of the chunk
+        groups = reader.chunk (j)
+        if (j + 1 >= self.partition_chunks[i]):
+            reader.close ()
+            del self.shuffle_readers[worker]
+        return [(e[0], e[1]) for g in groups for e in g]
+
+    # -----------------------------------------------------------------------
+    # e.g., of the reducers that died while reading their partition
+    def close_readers (self):
+        "close the readers of the shuffle files"
+        for partition, reader in self.shuffle_readers.values ():
+            reader.close ()
+        self.shuffle_readers.clear ()
+
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     # @NOTE@: changes will needed here for Assignment
     #
@@ -429,11 +703,11 @@ class MR_Framework ():
     # only after all maps are done, we start shuffle. So there is no
     # issue about whether all maps have responded or not.
     #
-    # In the shuffle phase we sort the intermediate keys and
-    # depending on the number of reducers, create data sets to
-    # be sent to reduce workers to handle the operation saving
-    # them in temporary shuffle files each of which will be
-    # handed out to the reduce workers
+    # In the shuffle phase we sort the intermediate keys of each
+    # reducer partition (already decided by the partitioner in
+    # the map workers) and save them in shuffle files each of
+    # which will be handed out to the reduce workers. The sort
+    # is an external sort-merge bounded by the shuffle memory budget.
     #
     ###########################################################
     def shuffle_func (self):
@@ -441,99 +715,51 @@ class MR_Framework ():
 
         print("MR::solve - Shuffle phase")
 
-        # Since we are doing wordcount, which is an addition operation
-        # we are doing combiner optimizations for per-map job
-        tempfile = open ("temp.csv", "w")
-        
-        # for each csv file generated in the map phase, we sort the keys.
-        # Note that the map csv files are numbered Map0.csv, Map1.csv, ...
-        for i in range (self.M):
-            # open the CVS file created by map job
-            csvfile = csv.reader (open ("Map"+str(i)+".csv", "r"), delimiter=",")
-            
-            # get the sorted list of entries from our csv file using
-            # column 1 (0-based indexing) as the key to sort on
-            # and we use traditional alphabetic order
-            wordlist = sorted (csvfile, key=operator.itemgetter (0))
-
-            # Now group all entries by the unique identified words and perform
-            # local combiner optimization (because it is addition, which is
-            # commutative and associative). Note, again that we do not do all
-            # the reduction here itself but leave it to the reduce tasks.
-            groups = []
-            uniquekeys = []
-            for k, g in itertools.groupby (wordlist, key=operator.itemgetter (0)):
-                groups.append (list (g))
-                uniquekeys.append (k)
-
-            # now for each unique key, create the data to be sent to
-            # the reducers
-            for j in range (len (uniquekeys)):
-                tempfile.write (uniquekeys[j] + ", ")
-                # note that for each unique word, we have a grouped
-                # list, and each value is 1. So the length of the
-                # sublist is the sum, which represents the combiner
-                # optimization reduction for that unique key.
-                # We save that info
-                tempfile.write (str (len (groups[j])) + "\n")
-
-            # Delete the intermediate Map file (no need for it anymore)
-            os.remove ("Map"+str(i)+".csv")
-
-        # close the temp file
-        tempfile.close ()
-
-        # Now group all the entries in sorted order so that we can hand them
-        # out to reduce tasks. For that, open the temp CSV file we just
-        # created
-        csvfile = csv.reader (open ("temp.csv", "rt"), delimiter=",")
-
-        # We need the following because otherwise the csv treats everything
-        # as text and so our numbers are getting converted to strings
-        rows = [[row[0], int(row[1])] for row in csvfile]
-        
-        # get the sorted list of entries from our csv file using
-        # column 1 (0-based indexing used here) as the key to sort on
-        # and we use traditional alphabetic order.  
-        wordlist = sorted (rows, key=operator.itemgetter (0))
-        
-        # Identify the total number of unique keys we have in our data
-        # We need this info to make a split in the Shuffle file to hand out
-        # to reduce tasks. We create as many intermediate shuffle files
-        # as the number of readers we have
-        for k, g in itertools.groupby (wordlist, key=operator.itemgetter (0)):
-            self.groups.append (list (g))
-            self.uniquekeys.append (k)
+        # In the peer-to-peer mode, the reduce workers pull their partitions
+        # directly from the map workers and so there is nothing for us to do
+        if (self.shuffle == "p2p"):
+            print("MR::shuffle - peer-to-peer mode; reducers fetch from map workers")
+            return
+
+        # We use an external sort-merge so that the master never holds the
+        # map outputs in memory. First, the map csv files are cut into
+        # sorted runs that fit our memory budget.
+        # Since we are doing wordcount, which is an addition operation,
+        # each run is also combined by key as it is spilled to disk.
+        #
+        # Since the map workers have already partitioned their output by
+        # the reducer that owns each key, we shuffle each partition on its
+        # own: the map files of partition r are named Map0_r.csv,
+        # Map1_r.csv, ... and are merged into the shuffle file Shuffle<r>.dat
+        # which will be sent to a reduce worker
+        self.num_uniquekeys = 0
+        for r in range (self.R):
+            self.shuffle_partition (r)
 
-        print("MR::shuffle - Total unique keys = ", len (self.uniquekeys))
+        print("MR::shuffle - Total unique keys = ", self.num_uniquekeys)
 
-        # now save the shuffle info into as many files as the number
-        # of reduce jobs
-        keysPerReduce = int (round (len(self.uniquekeys)/self.R))  # integer division
-        keysConsumed = 0  # initial condition
+    # -----------------------------------------------------------------------
+    # shuffle a single partition into the shuffle file of its reducer
+    def shuffle_partition (self, r):
+        "shuffle the map outputs of partition r"
+
+        # nothing to do when the reducers fetch from the map workers
+        if (self.shuffle == "p2p"):
+            return
+
+        if (self.shufflers is not None):
+            # pipelined mode: the map results were already fed into the
+            # runs of this partition as they arrived
+            shuffler = self.shufflers[r]
+        else:
+            shuffler = MR_Shuffle (self.shufflemem, r, self.combiner, self.compressor, self.workdir)
+            shuffler.make_runs ([self.path ("Map"+str(i)+"_"+str(r)+".csv") for i in self.map_outputs])
+
+        shuffler.merge_partition ()
+        self.partition_chunks[r] = shuffler.num_chunks
+        print("MR::shuffle - Unique keys in partition ", r, " = ", shuffler.num_uniquekeys)
+        self.num_uniquekeys = self.num_uniquekeys + shuffler.num_uniquekeys
 
-        for i in range (self.R):
-            # we open the file with binary write property since
-            # we are going to write an in-memory representation
-            # of the lists of lists we have stored in self.groups
-            shufflefile = open ("Shuffle" + str (i) + ".dat", "wb")
-
-            # get the starting locn and num of entries to be stored
-            # in this shuffle file.
-            if (i == self.R-1): # if this is the last reduce task
-                    keysPerReduce = len(self.uniquekeys) - keysConsumed
-
-            # use pickle to store binary representation.
-            pickle.dump (self.groups[keysConsumed:keysConsumed+keysPerReduce], shufflefile, pickle.HIGHEST_PROTOCOL)
-            # update the starting locn for the next shuffle file.
-            keysConsumed = keysConsumed + keysPerReduce
-
-            # close this shuffle file
-            shufflefile.close ()
-
-        # cleanup the temp file
-        os.remove ("temp.csv")
-        
 
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     # @NOTE@: changes may not be needed here for the Assignment
@@ -556,19 +782,30 @@ class MR_Framework ():
 
         # effectively, we go thru all the reduce results files and
         # get the results
-        results = open ("results.csv", "w")
-        for i in range (self.R):
-            reduce_file = open ("Reduce"+str(i)+".csv", "rt")
-            data = reduce_file.read ()
-            reduce_file.close ()
-            results.write (data)
+        results = open (self.path ("results.csv"), "w")
+        if (getattr (self.partitioner, 'hot', None)):
+            # the hot keys were split across reducers, each of which has
+            # a partial aggregate of the key to be merged with the others
+            parts = []
+            for i in range (self.R):
+                with open (self.path ("Reduce"+str(i)+".csv"), "rt") as reduce_file:
+                    parts.append ([(k, parse_val (v)) for k, v in (line.rstrip ("\n").rsplit (",", 1) for line in reduce_file)])
+            for pairs in merge_salted (parts, self.partitioner, MERGE_FUNCS[self.aggregate]):
+                results.writelines (k + "," + str (v) + "\n" for k, v in pairs)
+        else:
+            for i in range (self.R):
+                reduce_file = open (self.path ("Reduce"+str(i)+".csv"), "rt")
+                data = reduce_file.read ()
+                reduce_file.close ()
+                results.write (data)
             
         results.close ()
 
         # cleanup. Delete all reducer related files
         for i in range (self.R):
-            os.remove ("Shuffle"+str(i)+".dat")
-            os.remove ("Reduce"+str(i)+".csv")
+            if (self.shuffle != "p2p"):
+                os.remove (self.path ("Shuffle"+str(i)+".dat"))
+            os.remove (self.path ("Reduce"+str(i)+".csv"))
 
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     # @NOTE@: changes may not be needed here for the Assignment
@@ -581,7 +818,7 @@ class MR_Framework ():
     # The method that solves the problem using the map reduce approach
     # This is the main "driver" function for the master
     #####################################################################
-    def run_iter (self, mf):
+    async def run_iter (self, mf, rf):
         """Run one iteration of the problem using map reduce"""
 
         try:
@@ -589,27 +826,51 @@ class MR_Framework ():
 
             print ("****** Next iteration of map-reduce ************")
             
-            # we keep track of the total running time
+            # we keep track of the total running time. Anything since the
+            # end of the previous iteration that is not part of a phase is
+            # our overhead.
             total_running_time = 0
+            iter_start_time = self.last_iter_end or now ()
+            self.report = MR_IterReport (self.iteration)
+
+            # the workers may only use the codecs that all of them have
+            self.compressor.codecs = self.service.liveness.common_codecs (available_codecs ()[1:])
             
             ########### Phase 1: Map ###################
 
             print("***** Starting Map Phase ***********")
             # start the timing measurement
-            start_time = time.time ()
-
-            # start the map barrier sink again to receive the ACKs after
-            # each map worker has completed its work.
-            print("MR::solve - start map results barrier")
-            self.start_barrier_sink ("map_results")
-            
-            ### distribute tasks to all map workers ###
-            print("MR::solve - send message to map workers")
-            self.distribute_map_tasks ()
-            
-            ### barrier ###
-            print("MR::solve - wait for map sink to return")
-            self.thr_obj_dict["map_results"].join ()
+            start_time = now ()
+            self.compressor.reset ()
+            self.prepare_map_tasks ()
+
+            # the results of the very same job may be in the job cache, in
+            # which case there is nothing left to do in this iteration
+            if (self.cache is not None and await self.offload (self.cache.get_file, self.result_key (), self.path ("results.csv"))):
+                self.splitter.close ()
+                if (self.increment is not None):
+                    await self.offload (self.increment.merge, self.path ("results.csv"), self.partitioner, self.splitter.end)
+                self.cached_iter (mf, rf, iter_start_time, now () - start_time)
+                return
+
+            # in the pipelined mode, each map result is fed into the sorted
+            # runs of a streaming shuffle as soon as it arrives, so that the
+            # master sorts while the map workers are still busy. The memory
+            # budget is shared by the shuffles of all the partitions.
+            if (self.pipeline and self.shuffle == "master"):
+                self.shufflers = [MR_Shuffle (self.shufflemem // self.R, r, self.combiner, self.compressor, self.workdir) for r in range (self.R)]
+
+            ### schedule the map tasks on the map workers ###
+            # this returns once the results of all map tasks are in, i.e.,
+            # it is the barrier for the map phase
+            print("MR::solve - schedule the map tasks on the map workers")
+            await self.schedule_map_tasks ()
+
+            # all map workers got their chunks, so unmap the datafile. In
+            # the p2p mode, the map outputs live on the map workers, and
+            # those that are lost are mapped again in the reduce phase.
+            if (self.shuffle != "p2p"):
+                self.splitter.close ()
 
             # this part works if we use the process approach. But we are
             # using the simpler thread-based approach
@@ -617,11 +878,12 @@ class MR_Framework ():
             #print "MR::solve - barrier returned with status: ", retcode
             
             # stop the timing measurement
-            end_time = time.time ()
+            end_time = now ()
 
             map_phase_time = end_time-start_time
             print("***** Map phase required: ", map_phase_time, " seconds")
             total_running_time = total_running_time + map_phase_time
+            self.bytes_saved['map'] = self.compressor.bytes_saved ()
 
             ########### Phase 2: Shuffle ###################
             # this is not done in parallel for our case. In reality shuffle
@@ -630,60 +892,90 @@ class MR_Framework ():
             # place. We do not have any such elaborate mechanism.
 
             # start the timing measurement
-            start_time = time.time ()
+            start_time = now ()
+            self.compressor.reset ()
 
             # invoke the shuffle logic
             print("***** Starting Shuffle Phase ***********")
-            self.shuffle_func ()
+            if (self.pipeline):
+                # Every map worker has emitted its share of every partition
+                # by now. Each partition is handed to a reducer as soon as
+                # it is merged, so that the reducers work on the earlier
+                # partitions while we merge the later ones: the reduce
+                # tasks are scheduled on the event loop while the spill
+                # thread merges. The shuffle phase time is thus only the
+                # part that is not overlapped.
+                reduce_scheduler = MR_Scheduler (self.R, self.specfactor, pending=[], task_timeout=self.tasktimeout,
+                                                 placement=self.new_placement ("reduce"))
+                reducing = asyncio.ensure_future (self.schedule_reduce_tasks (reduce_scheduler))
+                self.num_uniquekeys = 0
+                for r in range (self.R):
+                    await self.offload (self.shuffle_partition, r)
+                    reduce_scheduler.add_task (r)
+                    await self.service.dispatch ("reduce")
+                self.shufflers = None
+            else:
+                await self.offload (self.shuffle_func)
 
             # stop the timing measurement
-            end_time = time.time ()
+            end_time = now ()
 
             shuffle_phase_time = end_time - start_time
             print("***** Shuffle phase required: ", shuffle_phase_time, " seconds")
             total_running_time = total_running_time + shuffle_phase_time
+            self.bytes_saved['shuffle'] = self.compressor.bytes_saved ()
 
             ########### Phase 3: Reduce ###################
 
             print("***** Starting Reduce Phase ***********")
             # start the timing measurement
-            start_time = time.time ()
-
-            # start the reduce barrier sink again to receive the ACKs after
-            # each reduce worker has completed its work.
-            print("MR::solve - start reduce barrier")
-            self.start_barrier_sink ("reduce_results")
-            
-            ### distribute tasks to all workers ###
-            print("MR::solve - send message to reduce workers")
-            self.distribute_reduce_tasks ()
-            
-            ### barrier ###
-            print("MR::solve - wait for reduce sink to return")
-            self.thr_obj_dict["reduce_results"].join ()
+            start_time = now ()
+            self.compressor.reset ()
+
+            # in the pipelined mode some of the reduce tasks are already
+            # out and we only wait for whatever of the reduce work is left
+            ### schedule the tasks on the reduce workers ###
+            # this returns once the results of all reduce tasks are in,
+            # i.e., it is the barrier for the reduce phase
+            if (self.pipeline):
+                await reducing
+            else:
+                reduce_scheduler = MR_Scheduler (self.R, self.specfactor, task_timeout=self.tasktimeout,
+                                                 placement=self.new_placement ("reduce"))
+                print("MR::solve - schedule the reduce tasks on the reduce workers")
+                await self.schedule_reduce_tasks (reduce_scheduler)
 
             # this part works if we use the process approach
             #retcode = handle.wait ()
             #print "MR::solve - barrier returned with status: ", retcode
 
             # stop the timing measurement
-            end_time = time.time ()
+            end_time = now ()
 
             reduce_phase_time = end_time - start_time
             print("***** Reduce phase required: ", reduce_phase_time, " seconds")
+            self.splitter.close ()
             total_running_time = total_running_time + reduce_phase_time
+            self.bytes_saved['reduce'] = self.compressor.bytes_saved ()
 
             ########### Phase 4: Finalize ###################
 
             print("***** Starting Finalize Phase ***********")
             # start the timing measurement
-            start_time = time.time ()
-
-            # finalize the results
-            self.finalize_func ()
+            start_time = now ()
+
+            # finalize the results, and keep them in the job cache
+            await self.offload (self.finalize_func)
+            if (self.cache is not None):
+                await self.offload (self.cache.put_file, self.result_key (), self.path ("results.csv"))
+                print("*** Job cache ***  = ", self.cache.stats ())
+            # in the incremental mode, these are the results of the new
+            # bytes, which are merged into those of the earlier ones
+            if (self.increment is not None):
+                await self.offload (self.increment.merge, self.path ("results.csv"), self.partitioner, self.splitter.end)
             
             # stop the timing measurement
-            end_time = time.time ()
+            end_time = now ()
 
             finalize_phase_time = end_time - start_time
             print("***** Finalize phase required: ", finalize_phase_time, " seconds")
@@ -691,14 +983,60 @@ class MR_Framework ():
 
             print("*** Total Running Time for wordcount ***  = ",  total_running_time)
 
+            # the overhead of the iteration, and of the average task, i.e.,
+            # the time a task took us beyond what the worker spent on it
+            self.last_iter_end = now ()
+            overhead = self.last_iter_end - iter_start_time - total_running_time
+            print("*** Overhead outside the phases ***  = ", overhead)
+            if (self.task_overheads):
+                print("*** Average task dispatch overhead ***  = ", sum (self.task_overheads) / len (self.task_overheads))
+            print("*** Bytes saved by compression (map, shuffle, reduce) ***  = ", self.bytes_saved['map'], self.bytes_saved['shuffle'], self.bytes_saved['reduce'])
+
+            # the report of the iteration, with what each phase was bound by
+            for phase, phase_time in [("map", map_phase_time), ("shuffle", shuffle_phase_time),
+                                      ("reduce", reduce_phase_time), ("finalize", finalize_phase_time)]:
+                self.report.add_phase (phase, phase_time)
+            for phase in ["map", "reduce"]:
+                summary = self.report.summary (phase)
+                if (summary['tasks']):
+                    print("*** {} tasks: compute {:.3f}, serialize {:.3f}, network {:.3f}, master {:.3f} secs; {} bytes in, {} bytes out; bound by {}".format (
+                        phase, summary['compute_time'], summary['serialize_time'], summary['network_time'] + summary['fetch_time'],
+                        summary['master_time'], summary['bytes_in'], summary['bytes_out'], summary['bound']))
+            summary = self.report.summary ("reduce")
+            if (summary['tasks']):
+                print("*** reduce load: records per reducer {}, max/mean = {:.2f}".format (summary['load'], summary['imbalance']))
+            if (self.service.racks is not None):
+                print("*** Bytes moved across racks (map, reduce) ***  = ", self.report.summary ("map")['cross_rack_bytes'], summary['cross_rack_bytes'])
+            # the report and the metrics are written by the spill thread
+            # while the next iteration gets going
+            self.spill (self.report.write, rf)
+
             # write this information into the file
-            mf.write (str(map_phase_time) + ", " + str(shuffle_phase_time) + ", " + str(reduce_phase_time) + ", " + str(finalize_phase_time) + ", " + str(total_running_time) + "\n")
-            mf.flush ()
+            self.spill (write_line, mf, str(map_phase_time) + ", " + str(shuffle_phase_time) + ", " + str(reduce_phase_time) + ", " + str(finalize_phase_time) + ", " + str(total_running_time) + ", " + str(overhead)
+                        + ", " + str(self.bytes_saved['map']) + ", " + str(self.bytes_saved['shuffle']) + ", " + str(self.bytes_saved['reduce']) + "\n")
             
         except:
             print("Unexpected error in run_iter method:", sys.exc_info()[0])
             raise
 
+    # -----------------------------------------------------------------------
+    # wrap up an iteration whose results were found in the job cache. The
+    # time it took to look them up counts as the map phase.
+    def cached_iter (self, mf, rf, iter_start_time, lookup_time):
+        "record an iteration answered by the job cache"
+
+        print("***** Results taken from the job cache in ", lookup_time, " seconds")
+        print("*** Job cache ***  = ", self.cache.stats ())
+        self.last_iter_end = now ()
+        overhead = self.last_iter_end - iter_start_time - lookup_time
+
+        for phase, phase_time in [("map", lookup_time), ("shuffle", 0.0), ("reduce", 0.0), ("finalize", 0.0)]:
+            self.report.add_phase (phase, phase_time)
+        self.report.write (rf)
+
+        mf.write (str(lookup_time) + ", 0.0, 0.0, 0.0, " + str(lookup_time) + ", " + str(overhead) + ", 0, 0, 0\n")
+        mf.flush ()
+
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     # @NOTE@: changes may not be needed here for the Assignment
     #
@@ -714,43 +1052,52 @@ class MR_Framework ():
         """Solve the problem using map reduce"""
 
         try:
-            ############ initialization ##################
-            # here we start our end of the PUSH based workflow
-            print("MR::solve - initialize server")
-            self.init_server ()
-            
-            # start a barrier to make sure the required number of map
-            # and reduce workers are up and running
-            print("MR::solve - start barrier to make sure all our map and reduce workers are up")
-            self.start_barrier_sink ("workers_up")
-
-            # the join below results in a barrier synchronization. We create
-            # threads per map and reduce workers and wait to hear from them
-            #
-            # note that the self.thr_obj_dict data structure is a dictionary
-            # comprising name-values. The name is map and reduce; their
-            # values are the number of map and reduce workers.
-            print("MR::solve - wait for workers to start")
-            self.thr_obj_dict["workers_up"].join ()
-
-            print("MR::solve - All map and reduce workers are up")
-            print("***** Initialization phase completed")
+            # the local engine runs everything on a process pool of this
+            # machine and needs none of the worker plumbing below
+            if (self.engine == "local"):
+                MR_LocalEngine (self).solve ()
+                return
+
+            # otherwise we are the only job of a master service, which
+            # runs our tasks on the map and reduce workers
+            MR_Service (self.args).run ([self])
 
+        except:
+            print("Unexpected error in solve method:", sys.exc_info()[0])
+            raise
+
+    # -----------------------------------------------------------------------
+    # run the iterations of the job with the given service, on its event
+    # loop
+    async def run (self, service):
+        """Run the job on the workers of the service"""
+
+        self.service = service
+        self.loop = service.loop
+        self.spiller = concurrent.futures.ThreadPoolExecutor (max_workers=1, thread_name_prefix="spill")
+        try:
             # handle to the output file
-            metricsfile = open (self.metricsfile,'w')
-            metricsfile.write("Map       Shuffle        Reduce          Finalize        Total\n")
-            # run the iterations
+            metricsfile = open (self.path (self.metricsfile),'w')
+            metricsfile.write("Map       Shuffle        Reduce          Finalize        Total        Overhead        MapSaved        ShuffleSaved        ReduceSaved\n")
+            # the per-task metrics of each iteration go in the report file
+            reportfile = open (self.path (self.reportfile), 'w')
+
+            # run the iterations. There is no need to rest in between since
+            # the workers ask for their next task as soon as they are idle
             for i in range (self.iters):
                 # run the next iter
-                self.run_iter (metricsfile)
+                await self.run_iter (metricsfile, reportfile)
                 # reset the data structures for the next iter
                 self.reset_master ()
-                # some rest :-)
-                time.sleep (5)
 
-            # close the metrics collection file
+            # close the metrics collection file once it is written
+            await self.flush_spills ()
             metricsfile.close ()
+            reportfile.close ()
 
         except:
-            print("Unexpected error in solve method:", sys.exc_info()[0])
+            print("Unexpected error in run method:", sys.exc_info()[0])
             raise
+
+        finally:
+            self.spiller.shutdown ()
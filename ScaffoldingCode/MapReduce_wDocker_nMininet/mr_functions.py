@@ -0,0 +1,183 @@
+#!/usr/bin/python
+#
+# Purpose: The wordcount map and reduce functions
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The map and reduce logic of wordcount lives here so that exactly the
+# same functions run inside the ZeroMQ map and reduce workers and inside
+# the processes of the local execution engine (see mr_local.py). Neither
+# function knows anything about how its input arrived or where its
+# output goes.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import re                    # regular expression
+import operator              # used in itertools
+import itertools             # nice iterators
+import collections           # hashed counter
+
+from mr_columnar import MR_ColumnarReduce  # NumPy based reduce engine
+
+# tokenize the incoming chunk, which is a string. We want the list to be
+# only words and nothing else. So rather than the simple split method of
+# the string class, we use regexp's split
+#
+# We allow apostrophe. This is the pattern we are going to search for in
+# the incoming chunk and tokenize the stream accordingly. Each token then
+# is a word
+SPLIT_PATTERN = re.compile ("(\s|~|'|\!|@|\#|\$|%|\^|&|\*|\(|\)|-|_|\+|=|\{|\}|\[|\]|\||\||:|;|\"|<|>|\,|\.|\?|\/)+")
+
+# the reg expression pattern against which we are going to match. We
+# allow a word with apostrophe. The following regular expression gives us
+# valid words (only alphabets but apostrophe is ok but not at the
+# beginning. So something like don't will be captured as a unique word)
+WORD_PATTERN = re.compile ("([A-Za-z]+)('[A-Za-z])?")
+
+# The two patterns above boil down to this: the separators split the text
+# into tokens, and a token is counted (as a whole) when its first
+# character is a letter. A single findall pass that picks out the tokens
+# which start with a letter right after a separator (or at the start)
+# thus finds exactly the same words without producing the separators and
+# the non-words in between. The separators are the same as in
+# SPLIT_PATTERN; note that \s of a str pattern also covers \x1c-\x1f and
+# the unicode spaces, which a bytes pattern does not.
+SEPARATORS = "~'!@#$%^&*()\\-_+=\\{\\}\\[\\]|:;\"<>,.?/"
+WORD_FINDER = re.compile ("(?<![^\\s" + SEPARATORS + "])[A-Za-z][^\\s" + SEPARATORS + "]*")
+BYTES_WORD_FINDER = re.compile (("(?<![^\\s\\x1c-\\x1f" + SEPARATORS + "])[A-Za-z][^\\s\\x1c-\\x1f" + SEPARATORS + "]*").encode ('ascii'))
+
+# any non-ascii byte
+NON_ASCII = re.compile (rb"[\x80-\xff]")
+
+# -----------------------------------------------------------------------
+# the words of a chunk of text
+def find_words (chunk):
+    """ list of the words of a chunk given as bytes (or a str) """
+
+    # a chunk of pure ascii is searched as is, bytes and all, without
+    # decoding it. Otherwise we decode it as before so that the unicode
+    # separators and the invalid bytes are treated the same way.
+    if (isinstance (chunk, str)):
+        return WORD_FINDER.findall (chunk)
+    if (NON_ASCII.search (chunk) is None):
+        return BYTES_WORD_FINDER.findall (chunk)
+    return WORD_FINDER.findall (str (chunk, 'utf-8', errors='replace'))
+
+# -----------------------------------------------------------------------
+# the map function: emit every valid word of the chunk with a count of 1
+def map_func (chunk, combiner):
+    """ wordcount map function over a chunk of text """
+
+    words = find_words (chunk)
+
+    # every occurrence is emitted on its own with a val of 1, unless the
+    # vals are added up: the count of a word in a chunk is not the min or
+    # the max of its vals, and without a combine function the reducers
+    # need every entry
+    if (combiner.combine_func is not operator.add):
+        for word in words:
+            combiner.add (word if isinstance (word, str) else word.decode ('ascii'), 1)
+        return
+
+    # count the words in a hashed counter first (which runs in C), and
+    # emit each unique word with its count. The words are counted in
+    # slices of max_keys of them, so that the counter never holds more
+    # distinct words than the table of the combiner may.
+    for start in range (0, len (words), combiner.max_keys):
+        for word, count in collections.Counter (words[start:start+combiner.max_keys]).items ():
+            combiner.add (word if isinstance (word, str) else word.decode ('ascii'), count, count)
+
+# -----------------------------------------------------------------------
+# the original map function, which splits the text into all its tokens
+# and matches each of them in Python. Kept for the micro-benchmark below.
+def map_func_regex (content, combiner):
+    """ wordcount map function using re.split and match per token """
+
+    # tokenize the stream according to the split pattern
+    split_arg = SPLIT_PATTERN.split (content)
+
+    # For every element in the split, if it belongs to a sensical
+    # word, emit it as an intermediate key with its count. The
+    # combiner aggregates the counts and keeps the resulting entries
+    # in the bucket of the reducer that owns the key
+    for token in split_arg:
+        # now check if it is a valid word
+        if WORD_PATTERN.match (token):
+            # emit the intermediate key and its occurrence as a 1
+            combiner.add (token, 1)
+
+# -----------------------------------------------------------------------
+# the reduce function: add up the counts of every unique word
+def reduce_func (blocks, aggregate="sum"):
+    """ wordcount reduce function over blocks of (keys, ids, vals) columns """
+
+    # the columnar engine groups the entries of each unique word and adds
+    # up their counts (or aggregates them otherwise if asked to)
+    reducer = MR_ColumnarReduce (aggregate)
+    for keys, ids, vals in blocks:
+        reducer.add_block (keys, ids, vals)
+    return reducer.results ()
+
+# -----------------------------------------------------------------------
+# how two partial aggregates of the same key are merged, e.g., those of
+# the old and the new data in the incremental mode, or those of the
+# reducers that a hot key was split across. The partial means cannot be
+# merged without the counts behind them.
+MERGE_FUNCS = {'sum': operator.add,
+               'count': operator.add,
+               'min': min,
+               'max': max}
+
+# -----------------------------------------------------------------------
+# a val of a results csv file
+def parse_val (text):
+    """ int or float from its text """
+    try:
+        return int (text)
+    except ValueError:
+        return float (text)
+
+# -----------------------------------------------------------------------
+# Micro-benchmark of the map function against the original one. Run it as
+#
+#   python mr_functions.py big.txt
+#
+# It maps the whole file with both and reports the words per second. The
+# combiner partitions the keys as a real map task would.
+def benchmark (datafile, R=3, repeat=3):
+    """ words/sec of map_func against map_func_regex """
+
+    from mr_partitioner import MR_HashPartitioner
+    from mr_combiner import MR_Combiner
+
+    with open (datafile, "rb") as f:
+        data = f.read ()
+    content = str (data, 'utf-8', errors='replace')
+
+    results = {}
+    for name, func, chunk in [("regex split", map_func_regex, content),
+                              ("findall", map_func, data)]:
+        best = None
+        for i in range (repeat):
+            combiner = MR_Combiner (MR_HashPartitioner (R))
+            start_time = time.perf_counter ()
+            func (chunk, combiner)
+            buckets = combiner.results ()
+            elapsed = time.perf_counter () - start_time
+            best = elapsed if best is None else min (best, elapsed)
+        results[name] = sorted (e for b in buckets for e in b)
+        words = sum (v for b in buckets for k, v in b)
+        print("{:12s}: {} words in {:.3f} sec = {:.0f} words/sec".format (name, words, best, words / best))
+
+    print("same results: ", results["regex split"] == results["findall"])
+
+#----------------------------------------------
+if __name__ == '__main__':
+    benchmark (sys.argv[1])
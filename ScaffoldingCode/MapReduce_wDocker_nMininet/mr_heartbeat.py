@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# Purpose: Worker heartbeats and their liveness tracking on the master
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Every map and reduce worker has a unique name, which it also uses as the
+# identity of the REQ socket with which it asks the master for tasks. On
+# the "workers up" channel (base port + 2), which used to carry just a
+# single b'0' when a worker started, the worker now says it is up and then
+# keeps sending a small heartbeat from a thread of its own, whether it is
+# busy with a task or idle.
+#
+# The master uses the first message of each worker for the workers up
+# barrier, and afterwards keeps track of when it last heard from every
+# worker. A worker that misses HEARTBEAT_LIVENESS heartbeats in a row is
+# considered dead and is never handed a task again.
+#
+# A heartbeat message is a json object:
+#    {'worker': <name>, 'role': "map" or "reduce", 'state': "up" or "alive"}
+#
+# The up message also lists the compression codecs the worker has (see
+# mr_compress.py), so that the master only lets the workers use the codecs
+# that all of them can decode, and the host the worker runs on, by which
+# the topology file of the master knows its rack (see mr_racks.py). A rack
+# aggregator (role "aggregate", see mr_aggregator.py) also says where the
+# map workers reach it.
+#
+
+# system and time
+import os
+import sys
+import time
+import json                  # json
+
+import socket                # our hostname for the worker name
+import threading             # the heartbeat thread
+import zmq                   # ZeroMQ library
+
+# how often (in msec) a worker sends a heartbeat
+HEARTBEAT_MS = 1000
+
+# num of heartbeats a worker may miss before the master declares it dead
+HEARTBEAT_LIVENESS = 3
+
+# -----------------------------------------------------------------------
+# a unique name for a worker of the given role
+def worker_name (role):
+    """ unique name of this worker process """
+    return role + "-" + socket.gethostname () + "-" + str (os.getpid ())
+
+# -----------------------------------------------------------------------
+# the host a worker runs on, as given in the topology file of the master
+def worker_host (address=None):
+    """ the given address of our host, by default the IP of our hostname """
+    return address or socket.gethostbyname (socket.gethostname ())
+
+# ------------------------------------------------
+# The heartbeat thread of a worker
+#
+class MR_Heartbeat (threading.Thread):
+    """ Sends periodic heartbeats to the master """
+
+    def __init__ (self, context, connect_addr, name, role):
+        threading.Thread.__init__ (self, daemon=True)
+        self.context = context             # the worker's ZeroMQ context
+        self.connect_addr = connect_addr   # the master's workers up channel
+        self.name = name                   # our worker name
+        self.role = role                   # map or reduce
+        self.stopped = threading.Event ()  # set to stop the heartbeats
+
+    def run (self):
+        # ZeroMQ sockets must not be shared among threads, so the heartbeat
+        # thread has a PUSH socket of its own to the same channel
+        sender = self.context.socket (zmq.PUSH)
+        sender.setsockopt (zmq.LINGER, 0)
+        sender.connect (self.connect_addr)
+        msg = json.dumps ({'worker': self.name, 'role': self.role, 'state': "alive"}).encode ('utf-8')
+        while (not self.stopped.wait (HEARTBEAT_MS / 1000.0)):
+            sender.send (msg)
+        sender.close ()
+
+    def stop (self):
+        """ stop sending heartbeats """
+        self.stopped.set ()
+
+# ------------------------------------------------
+# The liveness tracker of the master
+#
+class MR_Liveness ():
+    """ Tracks the heartbeats of the workers """
+
+    def __init__ (self):
+        self.last_seen = {}     # worker name -> time we last heard from it
+        self.roles = {}         # worker name -> map or reduce
+        self.dead = set ()      # workers declared dead
+        self.codecs = {}        # worker name -> codecs it has
+        self.hosts = {}         # worker name -> host it runs on
+        self.endpoints = {}     # worker name -> where it is reached
+
+    # -----------------------------------------------------------------------
+    # note a message from a worker
+    def beat (self, msg):
+        """ record a heartbeat (or up) message """
+        hb = json.loads (msg)
+        name = hb['worker']
+        if (name in self.dead):
+            # it was only slow, so welcome it back
+            print("MR::liveness - worker ", name, " is back")
+            self.dead.discard (name)
+        self.last_seen[name] = time.monotonic ()
+        self.roles[name] = hb['role']
+        if ('codecs' in hb):
+            self.codecs[name] = hb['codecs']
+        if ('host' in hb):
+            self.hosts[name] = hb['host']
+        if ('endpoint' in hb):
+            self.endpoints[name] = hb['endpoint']
+        return hb
+
+    # -----------------------------------------------------------------------
+    # declare the workers we have not heard from for too long as dead
+    def check (self):
+        """ returns the set of workers that just died """
+        deadline = time.monotonic () - HEARTBEAT_LIVENESS * HEARTBEAT_MS / 1000.0
+        just_died = set ()
+        for name, seen in self.last_seen.items ():
+            if (seen < deadline and name not in self.dead):
+                print("MR::liveness - no heartbeat from worker ", name, ", declaring it dead")
+                just_died.add (name)
+        self.dead |= just_died
+        return just_died
+
+    # -----------------------------------------------------------------------
+    def is_alive (self, name):
+        """ true unless the worker was declared dead """
+        return (name not in self.dead)
+
+    # -----------------------------------------------------------------------
+    def common_codecs (self, codecs):
+        """ those of the given codecs that every live worker has """
+        return [c for c in codecs
+                if all (c in have for n, have in self.codecs.items () if n not in self.dead)]
+
+    # -----------------------------------------------------------------------
+    def alive (self, role):
+        """ names of the live workers of a role """
+        return [n for n, r in self.roles.items () if r == role and n not in self.dead]
+
+    # -----------------------------------------------------------------------
+    def num_alive (self, role):
+        """ num of live workers of a role """
+        return len (self.alive (role))
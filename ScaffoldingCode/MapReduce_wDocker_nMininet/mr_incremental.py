@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# Purpose: Incremental word count over append-only input files
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Our production inputs are logs that only ever grow. Counting the words
+# of the whole file again in every refresh costs O(total data), although
+# only the bytes appended since the last refresh are new.
+#
+# In the incremental mode (-I option), the master keeps a state file with
+#
+#   - the num of bytes of the data file processed so far,
+#   - a hash of the last bytes processed, to make sure that the file was
+#     only appended to (and not rotated, truncated or rewritten), and
+#   - the aggregate of every key so far.
+#
+# An iteration then maps only the bytes appended since, and merges the
+# results of this delta into the stored aggregates, which are written out
+# as results.csv in the same order as a run over the whole file: by
+# reducer partition, sorted by key within each. A refresh thus costs
+# O(new data), plus O(unique keys) to write out the results.
+#
+# Only the bytes up to the last whitespace are processed, since the
+# writer of the log may be in the middle of a word; the rest is left for
+# the next refresh.
+#
+# The sum, count, min and max aggregations can be merged this way; the
+# mean cannot, since the counts behind the stored means are not kept.
+# When the state does not match the data file or the job (another file,
+# a file that shrank or changed before the processed offset, other job
+# functions or another aggregation), the whole file is processed afresh.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import pickle                # serialization of the state
+
+from mr_cache import content_digest, code_digest  # identity of the data and the job
+from mr_functions import MERGE_FUNCS, parse_val  # merging of partial aggregates
+from mr_compress import MR_Compressor, open_spill  # the state is compressed
+
+# num of bytes before the processed offset whose hash we check
+TAIL_SIZE = 4096
+
+# ------------------------------------------------
+# The state of the incremental mode
+#
+class MR_Increment ():
+    """ Processed offset and aggregates of an append-only input """
+
+    def __init__ (self, statefile, aggregate):
+        if (aggregate not in MERGE_FUNCS):
+            raise ValueError ("The incremental mode cannot merge the " + aggregate + " aggregation")
+
+        self.statefile = statefile    # where the state is kept
+        self.aggregate = aggregate    # reduce aggregation of the job
+        self.job = [code_digest (), aggregate]  # identity of the job
+        self.datafile = None          # the file processed so far
+        self.offset = 0               # num of its bytes processed so far
+        self.tail = None              # hash of the bytes just before offset
+        self.results = {}             # key -> aggregate so far
+
+        # pick up where the previous run left off
+        if (os.path.exists (statefile)):
+            with open_spill (statefile, "rb") as f:
+                state = pickle.load (f)
+            if (state['job'] == self.job):
+                self.datafile = state['datafile']
+                self.offset = state['offset']
+                self.tail = state['tail']
+                self.results = state['results']
+
+    # -----------------------------------------------------------------------
+    # hash of the bytes of a file just before the given offset
+    def tail_digest (self, datafile, offset):
+        """ digest of the last TAIL_SIZE bytes before offset """
+        with open (datafile, "rb") as f:
+            f.seek (max (0, offset - TAIL_SIZE))
+            return content_digest (f.read (min (offset, TAIL_SIZE)))
+
+    # -----------------------------------------------------------------------
+    # the offset from which the data file is to be processed, which is 0
+    # if the state does not belong to it
+    def resume (self, datafile):
+        """ offset of the first byte not processed yet """
+
+        datafile = os.path.abspath (datafile)
+        reason = None
+        if (self.datafile is None):
+            reason = "no state"
+        elif (self.datafile != datafile):
+            reason = "state of another file"
+        elif (os.path.getsize (datafile) < self.offset):
+            reason = "file shrank"
+        elif (self.tail_digest (datafile, self.offset) != self.tail):
+            reason = "file changed before the processed offset"
+
+        if (reason is not None):
+            if (self.offset > 0 or self.results):
+                print("MR::incremental - " + reason + "; processing the whole file")
+            self.datafile = datafile
+            self.offset = 0
+            self.tail = None
+            self.results = {}
+        else:
+            print("MR::incremental - resuming at byte ", self.offset, " of ", os.path.getsize (datafile))
+
+        return self.offset
+
+    # -----------------------------------------------------------------------
+    # merge the results of the delta in the results file into the stored
+    # aggregates, write the merged results back to it, and remember that
+    # the data file has been processed up to end
+    def merge (self, results_file, partitioner, end):
+        """ fold the delta results into the state """
+
+        merge = MERGE_FUNCS[self.aggregate]
+        with open (results_file, "r") as f:
+            for line in f:
+                key, val = line.rstrip ("\n").rsplit (",", 1)
+                val = parse_val (val)
+                self.results[key] = merge (self.results[key], val) if key in self.results else val
+
+        # the results as a run over the whole file would write them
+        partitions = [[] for r in range (partitioner.R)]
+        for key in self.results:
+            partitions[partitioner.owner (key)].append (key)
+        with open (results_file, "w") as f:
+            for keys in partitions:
+                keys.sort ()
+                f.writelines (k + "," + str (self.results[k]) + "\n" for k in keys)
+
+        self.offset = end
+        self.tail = self.tail_digest (self.datafile, end)
+        self.save ()
+        print("MR::incremental - processed up to byte ", end, ", ", len (self.results), " unique keys")
+
+    # -----------------------------------------------------------------------
+    # save the state, atomically so that a crash leaves the old one
+    def save (self):
+        """ write the state file """
+
+        state = {'job': self.job, 'datafile': self.datafile, 'offset': self.offset,
+                 'tail': self.tail, 'results': self.results}
+        tmp = self.statefile + ".tmp"
+        data = pickle.dumps (state, protocol=pickle.HIGHEST_PROTOCOL)
+        with open_spill (tmp, "wb", MR_Compressor ("zlib"), data) as f:
+            f.write (data)
+        os.replace (tmp, self.statefile)
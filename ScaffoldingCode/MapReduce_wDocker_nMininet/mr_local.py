@@ -0,0 +1,382 @@
+#!/usr/bin/python
+#
+# Purpose: Local execution engine that runs a job on a process pool
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# For development and for small jobs, starting M+R worker processes and
+# wiring up all the ZeroMQ ports is overkill. The local engine runs the
+# very same map and reduce functions (see mr_functions.py) in a pool of
+# processes on this machine, one per core by default, with no network
+# hops at all.
+#
+# Data moves between the processes through shared memory:
+#   - the data file is copied once into a shared memory block which
+#     every pool process attaches to, and each map task just reads its
+#     (offset, length) split from it,
+#   - each map task encodes its partitioned output with the binary wire
+#     format of mr_wire.py into a shared memory block of its own, and only
+#     the name and the layout of that block go back to the master,
+#   - each reduce task decodes its partition straight from the shared
+#     memory blocks of all the map tasks.
+#
+# The phases, the metrics file and the report file are the same as those
+# of the distributed engine. The tasks have nothing to send or receive,
+# so their bytes in and out are those of their split and of the shared
+# memory blocks they read and write (a reduce task hands its results
+# back to the pool as they are, so it has no bytes out). Since nothing is
+# sent over a network, nothing is compressed and the bytes saved columns
+# are all zero.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import concurrent.futures    # the process pool
+from multiprocessing import shared_memory  # data shared by the processes
+
+from mr_split import MR_InputSplitter  # whitespace aligned splits
+from mr_partitioner import make_partitioner, merge_salted  # decides the reducer of a key
+from mr_combiner import MR_Combiner     # map-side pre-aggregation
+from mr_wire import encode_block, decode_block_columns  # binary layout of the records
+from mr_functions import map_func, reduce_func, MERGE_FUNCS  # the wordcount functions
+from mr_metrics import MR_TaskMetrics, MR_IterReport, now  # per-task metrics
+
+# the shared memory block of the data file, attached once by every
+# process of the pool
+_input = None
+
+# -----------------------------------------------------------------------
+# initializer of each pool process
+def _attach_input (name):
+    global _input
+    _input = shared_memory.SharedMemory (name=name)
+
+# -----------------------------------------------------------------------
+# a map task run by a pool process
+def local_map_task (task):
+    """ map one split; returns the name and layout of its output block and its metrics """
+
+    i, offset, length, partitioner_desc, combiner_name = task
+    start_time = now ()
+    metrics = MR_TaskMetrics ("map", task=i, worker=os.getpid ())
+
+    # our split of the data file, straight out of shared memory
+    chunk = _input.buf[offset:offset+length]
+
+    # the same map function as the map workers
+    partitioner = make_partitioner (partitioner_desc, i)
+    combiner = MR_Combiner (partitioner, combiner_name)
+    with metrics.timer ('compute_time'):
+        map_func (chunk, combiner)
+        chunk.release ()
+        buckets = combiner.results ()
+    metrics.add ('records_in', combiner.records_in)
+    metrics.add ('records_out', combiner.records_out)
+    metrics.add ('bytes_in', length)
+    serialize_start = now ()
+
+    # encode each partition and lay the frames out back to back in a
+    # fresh shared memory block. A block cannot be empty, hence the max.
+    layout = []
+    frames = []
+    total = 0
+    for pairs in buckets:
+        desc, block_frames = encode_block (pairs)
+        spans = []
+        for frame in block_frames:
+            frame = memoryview (frame).cast ('B')
+            spans.append ((total, len (frame)))
+            total = total + len (frame)
+            frames.append (frame)
+        layout.append ((desc, spans))
+
+    output = shared_memory.SharedMemory (create=True, size=max (total, 1))
+    locn = 0
+    for frame in frames:
+        output.buf[locn:locn+len (frame)] = frame
+        locn = locn + len (frame)
+
+    # the block lives on after we close it until the master unlinks it
+    name = output.name
+    output.close ()
+    metrics.add ('bytes_out', total)
+    metrics.add ('serialize_time', now () - serialize_start)
+    metrics.add ('elapsed', now () - start_time)
+    return name, layout, metrics.to_dict ()
+
+# -----------------------------------------------------------------------
+# a reduce task run by a pool process
+def local_reduce_task (task):
+    """ reduce one partition given the (name, desc, spans) of its parts """
+
+    r, sources, aggregate = task
+    start_time = now ()
+    metrics = MR_TaskMetrics ("reduce", task=r, worker=os.getpid ())
+
+    # decode the columns of our parts straight out of the shared memory
+    # blocks of the map tasks
+    blocks = []
+    views = []
+    with metrics.timer ('serialize_time'):
+        for name, desc, spans in sources:
+            block = shared_memory.SharedMemory (name=name)
+            frames = [block.buf[o:o+n] for o, n in spans]
+            views.append ((block, frames))
+            blocks.append (decode_block_columns (desc, frames))
+            metrics.add ('bytes_in', sum (n for o, n in spans))
+
+    # the same reduce function as the reduce workers
+    with metrics.timer ('compute_time'):
+        key_val_list = reduce_func (blocks, aggregate)
+    metrics.add ('records_in', sum (len (vals) for keys, ids, vals in blocks))
+    metrics.add ('records_out', len (key_val_list))
+
+    # all the views must be gone before the blocks can be closed
+    del blocks
+    for block, frames in views:
+        for frame in frames:
+            frame.release ()
+        block.close ()
+
+    metrics.add ('elapsed', now () - start_time)
+    return key_val_list, metrics.to_dict ()
+
+# -----------------------------------------------------------------------
+# the bytes of the shared memory block of a map output, for the job cache
+def read_map_output (name, layout):
+    """ copy of the frames of a map output block """
+    size = sum (n for desc, spans in layout for o, n in spans)
+    block = shared_memory.SharedMemory (name=name)
+    data = bytes (block.buf[:size])
+    block.close ()
+    return data
+
+# -----------------------------------------------------------------------
+# a shared memory block holding a map output taken from the job cache
+def restore_map_output (data):
+    """ name of a fresh block with the given frames """
+    output = shared_memory.SharedMemory (create=True, size=max (len (data), 1))
+    output.buf[:len (data)] = data
+    name = output.name
+    output.close ()
+    return name
+
+# ------------------------------------------------
+# The local execution engine
+#
+class MR_LocalEngine ():
+    """ Runs the map reduce phases on a local process pool """
+
+    def __init__ (self, framework):
+        self.framework = framework             # the job parameters
+        self.procs = framework.procs           # num of pool processes
+        self.pool = None                       # the process pool
+        self.input = None                      # shared copy of the datafile
+        self.splits = []                       # (offset, length) of the splits
+        self.start_offset = 0                  # first byte of the datafile we map
+        self.end_offset = 0                    # and the byte after the last one
+
+    # -----------------------------------------------------------------------
+    # copy the datafile (from the given offset on) into shared memory and
+    # start the pool
+    def start (self, offset=0):
+        """ set up the shared input and the process pool """
+
+        mrf = self.framework
+
+        # cut the file into whitespace aligned splits as the master does
+        # for the map workers, and copy it into shared memory. In the
+        # incremental mode, only the whole words after offset are mapped.
+        splitter = MR_InputSplitter (mrf.datafile, mrf.num_splits)
+        splits = splitter.open (offset, complete=(mrf.increment is not None))
+        if (mrf.cache is not None):
+            mrf.split_hashes = mrf.cache.fingerprint (splitter)
+        self.start_offset = splits[0][0]
+        self.end_offset = splitter.end
+        size = self.end_offset - self.start_offset
+        self.input = shared_memory.SharedMemory (create=True, size=max (size, 1))
+        if (size > 0):
+            self.input.buf[:size] = splitter.mm[self.start_offset:self.end_offset]
+        splitter.close ()
+        # the splits are relative to the copy
+        self.splits = [(o - self.start_offset, n) for o, n in splits]
+        print("doc size = ", os.path.getsize (mrf.datafile), ", bytes to map = ", size, ", num of chunks = ", mrf.num_splits, ", processes = ", self.procs)
+
+        self.pool = concurrent.futures.ProcessPoolExecutor (max_workers=self.procs,
+                                                            initializer=_attach_input,
+                                                            initargs=(self.input.name,))
+
+    # -----------------------------------------------------------------------
+    # stop the pool and release the shared input
+    def stop (self):
+        """ tear down the process pool and the shared input """
+        if (self.pool is not None):
+            self.pool.shutdown ()
+            self.pool = None
+        if (self.input is not None):
+            self.input.close ()
+            self.input.unlink ()
+            self.input = None
+
+    # -----------------------------------------------------------------------
+    # run one iteration and record its phase times
+    def run_iter (self, mf, rf):
+        """Run one iteration of the problem on the local pool"""
+
+        mrf = self.framework
+        report = MR_IterReport (mrf.iteration)
+        total_running_time = 0
+        iter_start_time = now ()
+
+        ########### Phase 1: Map ###################
+        print("***** Starting Map Phase ***********")
+        start_time = now ()
+
+        # in the incremental mode, the bytes to map move on after every
+        # iteration, and the datafile may have grown
+        if (mrf.increment is not None):
+            self.stop ()
+            self.start (mrf.increment.resume (mrf.datafile))
+
+        partitioner = mrf.new_partitioner ()
+        mrf.partitioner = partitioner
+
+        # the results of the very same job may be in the job cache
+        if (mrf.cache is not None and mrf.cache.get_file (mrf.result_key (), "results.csv")):
+            if (mrf.increment is not None):
+                mrf.increment.merge ("results.csv", partitioner, self.end_offset)
+            mrf.report = report
+            mrf.cached_iter (mf, rf, iter_start_time, now () - start_time)
+            mrf.iteration = mrf.iteration + 1
+            return
+
+        # the outputs of the splits that did not change are taken from the
+        # job cache, as the frames of their shared memory blocks
+        map_outputs = [None] * len (self.splits)
+        if (mrf.cache is not None):
+            for i in range (len (self.splits)):
+                cached = mrf.cache.get (mrf.map_key (i, "blocks"))
+                if (cached is not None):
+                    layout, data = cached
+                    map_outputs[i] = (restore_map_output (data), layout)
+            print("MR::solve - {} of {} map tasks taken from the job cache".format (len (self.splits) - map_outputs.count (None), len (self.splits)))
+
+        tasks = [(i, offset, length, partitioner.to_dict (), mrf.combiner) for i, (offset, length) in enumerate (self.splits)
+                 if map_outputs[i] is None]
+        for task, (name, layout, metrics) in zip (tasks, self.pool.map (local_map_task, tasks)):
+            map_outputs[task[0]] = (name, layout)
+            report.add_task ("map", metrics)
+            if (mrf.cache is not None):
+                mrf.cache.put (mrf.map_key (task[0], "blocks"), (layout, read_map_output (name, layout)))
+
+        map_phase_time = now () - start_time
+        print("***** Map phase required: ", map_phase_time, " seconds")
+        total_running_time = total_running_time + map_phase_time
+
+        ########### Phase 2: Shuffle ###################
+        # the map outputs are already partitioned and sit in shared
+        # memory, so the shuffle only tells each reduce task where its
+        # parts are. The sorting happens in parallel in the reduce tasks.
+        print("***** Starting Shuffle Phase ***********")
+        start_time = now ()
+
+        reduce_tasks = [(r, [(name, layout[r][0], layout[r][1]) for name, layout in map_outputs if layout[r][0]['n'] > 0], mrf.aggregate)
+                        for r in range (mrf.R)]
+
+        shuffle_phase_time = now () - start_time
+        print("***** Shuffle phase required: ", shuffle_phase_time, " seconds")
+        total_running_time = total_running_time + shuffle_phase_time
+
+        ########### Phase 3: Reduce ###################
+        print("***** Starting Reduce Phase ***********")
+        start_time = now ()
+
+        reduce_results = []
+        for key_val_list, metrics in self.pool.map (local_reduce_task, reduce_tasks):
+            reduce_results.append (key_val_list)
+            report.add_task ("reduce", metrics)
+
+        # the map outputs are not needed anymore
+        for name, layout in map_outputs:
+            block = shared_memory.SharedMemory (name=name)
+            block.close ()
+            block.unlink ()
+
+        reduce_phase_time = now () - start_time
+        print("***** Reduce phase required: ", reduce_phase_time, " seconds")
+        total_running_time = total_running_time + reduce_phase_time
+
+        ########### Phase 4: Finalize ###################
+        print("***** Starting Finalize Phase ***********")
+        start_time = now ()
+
+        # the results of the reduce tasks in partition order, with the
+        # partial aggregates of the hot keys merged
+        if (getattr (partitioner, 'hot', None)):
+            reduce_results = merge_salted (reduce_results, partitioner, MERGE_FUNCS[mrf.aggregate])
+        with open ("results.csv", "w") as results:
+            for key_val_list in reduce_results:
+                results.writelines (k + "," + str (v) + "\n" for k, v in key_val_list)
+
+        # and keep them in the job cache
+        if (mrf.cache is not None):
+            mrf.cache.put_file (mrf.result_key (), "results.csv")
+            print("*** Job cache ***  = ", mrf.cache.stats ())
+
+        # in the incremental mode, merge them into the earlier results
+        if (mrf.increment is not None):
+            mrf.increment.merge ("results.csv", partitioner, self.end_offset)
+
+        finalize_phase_time = now () - start_time
+        print("***** Finalize phase required: ", finalize_phase_time, " seconds")
+        total_running_time = total_running_time + finalize_phase_time
+
+        print("*** Total Running Time for wordcount ***  = ",  total_running_time)
+        overhead = now () - iter_start_time - total_running_time
+
+        # the report of the iteration
+        for phase, phase_time in [("map", map_phase_time), ("shuffle", shuffle_phase_time),
+                                  ("reduce", reduce_phase_time), ("finalize", finalize_phase_time)]:
+            report.add_phase (phase, phase_time)
+        report.write (rf)
+        mrf.iteration = mrf.iteration + 1
+        summary = report.summary ("reduce")
+        if (summary['tasks']):
+            print("*** reduce load: records per reducer {}, max/mean = {:.2f}".format (summary['load'], summary['imbalance']))
+
+        # write this information into the file
+        mf.write (str(map_phase_time) + ", " + str(shuffle_phase_time) + ", " + str(reduce_phase_time) + ", " + str(finalize_phase_time) + ", " + str(total_running_time) + ", " + str(overhead) + ", 0, 0, 0\n")
+        mf.flush ()
+
+    # -----------------------------------------------------------------------
+    # run all the iterations
+    def solve (self):
+        """Solve the problem on the local process pool"""
+
+        try:
+            # in the incremental mode, each iteration starts afresh from
+            # where the previous one left off
+            if (self.framework.increment is None):
+                self.start ()
+
+            metricsfile = open (self.framework.metricsfile, 'w')
+            reportfile = open (self.framework.reportfile, 'w')
+            metricsfile.write("Map       Shuffle        Reduce          Finalize        Total        Overhead        MapSaved        ShuffleSaved        ReduceSaved\n")
+            for i in range (self.framework.iters):
+                print ("****** Next iteration of map-reduce ************")
+                self.run_iter (metricsfile, reportfile)
+            metricsfile.close ()
+            reportfile.close ()
+
+        except:
+            print("Unexpected error in local solve method:", sys.exc_info()[0])
+            raise
+
+        finally:
+            self.stop ()
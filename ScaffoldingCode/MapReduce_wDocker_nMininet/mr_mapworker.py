@@ -24,6 +24,16 @@ import json
 
 import argparse   # argument parser
 
+from mr_partitioner import make_partitioner  # decides the reducer of a key
+from mr_combiner import MR_Combiner  # map-side pre-aggregation
+from mr_thread import MR_Thread      # thread that serves our map outputs
+from mr_wire import encode_message, encode_trailer  # wire format of the records
+from mr_split import read_split      # read our chunk from a shared file system
+from mr_functions import map_func    # the wordcount map function
+from mr_heartbeat import MR_Heartbeat, worker_name, worker_host  # tell the master we are alive
+from mr_compress import available_codecs, compressor_for  # compression of our outputs
+from mr_metrics import MR_TaskMetrics, frames_size, now  # counters of our tasks
+
 #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
 # @NOTE@: You will need to make appropriate changes
 # to this logic.  You can maintain the overall structure
@@ -42,11 +52,24 @@ class MR_Map ():
     def __init__ (self, args):
         """ constructor """
         self.id = None   # we get an ID on the fly
+        self.name = worker_name ("map")  # our unique name
         self.master_ip = args.masterip
         self.master_port = args.masterport
+        self.max_keys = args.maxkeys  # bound on the combiner table and buckets
+        self.tmpdir = args.tmpdir     # where the combiner spills its runs
+        self.advertise = args.advertise  # our address as seen by reducers
+        self.data_port = args.dataport   # port on which we serve map outputs
+        self.context = None   # the ZeroMQ context
         self.receiver = None  # connection to master
         self.init_sender = None     # for indicating worker up
         self.results_sender = None  # for sending map results
+        self.agg_senders = {}       # rack aggregator endpoint -> socket to it
+        self.data_endpoint = None   # where the reducers fetch our outputs
+        self.heartbeat = None       # thread that tells master we are alive
+        self.outputs = {}     # job -> map outputs kept for the p2p shuffle
+        self.outputs_iter = {} # job -> iteration of its kept outputs
+        self.compressor = None        # compresses the results we send
+        self.serve_compressor = None  # compresses the outputs we serve
 
     #------------------------------------------
     def init_worker (self):
@@ -54,14 +77,17 @@ class MR_Map ():
         print("initializing map worker in directory: ", os.getcwd ())
 
         context = zmq.Context()
+        self.context = context
 
-        # Socket to receive messages on. Worker uses PULL from the master
-        # To that end, we connect to the server. The map worker pulls info
-        # from the base port of the master
-        self.receiver = context.socket (zmq.PULL)
+        # Socket to receive tasks on. Whenever the worker is idle, it asks
+        # the master for its next task using the REQ pattern. To that end,
+        # we connect to the server at the base port of the master
+        self.receiver = context.socket (zmq.REQ)
         self.receiver.setsockopt (zmq.RCVHWM, 0)
+        # the master knows us by our name, which is also in our heartbeats
+        self.receiver.setsockopt (zmq.IDENTITY, self.name.encode ('utf-8'))
         connect_addr = "tcp://"+ self.master_ip + ":" + str (self.master_port)
-        print("Using PULL, map worker connecting to ", connect_addr)
+        print("Using REQ, map worker connecting to ", connect_addr)
         self.receiver.connect (connect_addr)
         
         # As part of the initialization, we tell the master that we are up.
@@ -77,7 +103,13 @@ class MR_Map ():
         #self.init_sender.bind (bind_addr)
 
         # now send an ACK to the barrier to let it know that we are up
-        self.init_sender.send (b'0')
+        self.init_sender.send_json ({'worker': self.name, 'role': "map", 'state': "up", 'codecs': available_codecs (),
+                                     'host': worker_host (self.advertise)})
+
+        # and keep telling the master that we are alive, even while we
+        # are busy with a task
+        self.heartbeat = MR_Heartbeat (context, connect_addr, self.name, "map")
+        self.heartbeat.start ()
 
         # close the socket
         # self.init_sender.close ()
@@ -96,7 +128,63 @@ class MR_Map ():
         #bind_addr = "tcp://" + self.master_ip + ":" + str (self.master_port+3)
         #print "Using PUSH, map worker binding to map results barrier at ", bind_addr
         #self.results_sender.bind (bind_addr)
-        
+
+    #------------------------------------------
+    def aggregator_sender (self, endpoint):
+        """ socket to the rack aggregator at the given endpoint """
+
+        # The results go to the aggregator the master names in the task,
+        # using the same PUSH pattern as to the master
+        if (endpoint not in self.agg_senders):
+            sender = self.context.socket (zmq.PUSH)
+            sender.setsockopt (zmq.LINGER, 0)
+            sender.setsockopt (zmq.SNDHWM, 0)
+            print("Using PUSH, map worker connecting to rack aggregator at ", endpoint)
+            sender.connect (endpoint)
+            self.agg_senders[endpoint] = sender
+        return self.agg_senders[endpoint]
+
+    #------------------------------------------
+    def start_server (self):
+        """ start serving map outputs for the peer-to-peer shuffle """
+
+        # For the peer-to-peer shuffle, the reduce workers fetch their
+        # partitions directly from us. We serve them using the ROUTER
+        # pattern from a separate thread, which we only start the first
+        # time we are asked for the p2p shuffle. A data port of 0 means any
+        # free port, which is handy when many workers share the same host.
+        server = self.context.socket (zmq.ROUTER)
+        server.setsockopt (zmq.LINGER, 0)
+        if (self.data_port == 0):
+            self.data_port = server.bind_to_random_port ("tcp://*")
+        else:
+            server.bind ("tcp://*:" + str (self.data_port))
+        self.advertise = worker_host (self.advertise)
+        self.data_endpoint = "tcp://" + self.advertise + ":" + str (self.data_port)
+        print("Using ROUTER, map worker serving map outputs at ", self.data_endpoint)
+        MR_Thread (self.serve_outputs, server).start ()
+
+    #------------------------------------------
+    def serve_outputs (self, server):
+        """ serve our partitioned map outputs to reduce workers """
+
+        # Each request names the job, its iteration and the map task, the
+        # partition the reducer wants, the wire format and the compression.
+        # We reply with the block of its entries. If we do not have the
+        # output (e.g., we were restarted since), we say it is lost, so
+        # that the master maps it again.
+        while True:
+            ident, empty, request = server.recv_multipart ()
+            req = json.loads (request)
+            job = req.get ('job', 0)
+            buckets = self.outputs.get (job, {}).get (req['id'])
+            if (buckets is None or req.get ('iter', self.outputs_iter.get (job)) != self.outputs_iter.get (job)):
+                print("serve_outputs: no output for map task ", req['id'])
+                frames = encode_message ({'id': req['id'], 'lost': True}, [], "json")
+            else:
+                self.serve_compressor = compressor_for (req.get ('compress'), self.serve_compressor)
+                frames = encode_message ({'id': req['id']}, [buckets[req['partition']]], req['wire'], self.serve_compressor)
+            server.send_multipart ([ident, b''] + frames, copy=False)
 
 
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
@@ -110,51 +198,105 @@ class MR_Map ():
     def do_work (self):
         """ Word count map function """
 
-        # recall that the master broadcasts the map or reduce message
-        # via the PUSH.  Receive the information from the master and
-        # process it
-        json_obj = self.receiver.recv_json()
+        # we are idle, so ask the master for our next task. The master
+        # replies with it when there is one for us.  Receive the
+        # information from the master and process it
+        idle_start = now ()
+        self.receiver.send (b'ready')
+        frames = self.receiver.recv_multipart (copy=False)
         print("map received json message")
+        start_time = now ()
+
+        # the counters of this task, which we send along with the result
+        metrics = MR_TaskMetrics ("map", worker=self.name)
+        metrics.add ('idle_time', start_time - idle_start)
+        metrics.add ('bytes_in', frames_size (frames))
         
-        # now parse the json object and do the work
+        # now parse the json object and do the work. The chunk is either
+        # in the second frame or we read it ourselves from the shared file
+        # system, in which case the json object says where it is.
+        with metrics.timer ('serialize_time'):
+            json_obj = json.loads (frames[0].bytes)
         self.id = json_obj['id']
-        content = json_obj['content']
+        metrics.task = self.id
+        if ('split' in json_obj):
+            chunk = read_split (json_obj['split'])
+            metrics.add ('bytes_in', len (chunk))
+        else:
+            chunk = frames[1].buffer
+
+        # the partitioner tells us which reducer owns each intermediate key
+        # and the combiner pre-aggregates the entries before we send them
+        partitioner = make_partitioner (json_obj['partitioner'], json_obj['id'])
+        combiner = MR_Combiner (partitioner, json_obj['combiner'], self.max_keys, self.tmpdir)
+
+        # the frames of our results are compressed as the master says
+        self.compressor = compressor_for (json_obj.get ('compress'), self.compressor)
         
         print("do_work: map worker received id: ", self.id)
 
-        # tokenize the incoming chunk, which is a string. We want the
-        # list to be only words and nothing else. So rather than the simple
-        # split method of the string class, we use regexp's split
+        with metrics.timer ('compute_time'):
+            # run the wordcount map function over the raw bytes of the
+            # chunk. It emits each valid word into the combiner.
+            map_func (chunk, combiner)
 
-        # We allow apostrophe. This is the pattern we are going to search for
-        # in the incoming chunk and tokenize the stream accordingly. Each token
-        # then is a word
-        pattern = "(\s|~|'|\!|@|\#|\$|%|\^|&|\*|\(|\)|-|_|\+|=|\{|\}|\[|\]|\||\||:|;|\"|<|>|\,|\.|\?|\/)+"
+            # intermediate keys and values are stored in these arrays, one
+            # per reducer partition
+            intmed_key_val_lists = combiner.results ()
+        metrics.add ('records_in', combiner.records_in)
+        metrics.add ('records_out', combiner.records_out)
 
-        # tokenize the stream according to the pattern above
-        split_arg = re.split (pattern, content)
+        # the master runs several jobs at once on the same workers, so our
+        # results name the job of the task
+        job = json_obj.get ('job', 0)
 
-        # create a reg expression pattern against which we are going
-        # to match against. We allow a word with apostrophe. The following
-        # regular expression gives us valid words (only alphabets but
-        # apostrophe is ok but not at the beginning. So something like don't
-        # will be captured as a unique word)
-        pattern = re.compile ("([A-Za-z]+)('[A-Za-z])?")
+        if (json_obj['shuffle'] == "p2p"):
+            # In the peer-to-peer shuffle mode, we keep our output and let
+            # the reduce workers fetch their partitions from us. Outputs
+            # from an earlier iteration of the job, or of jobs that are
+            # over, are not needed anymore.
+            if (self.data_endpoint is None):
+                self.start_server ()
+            for old in [j for j in self.outputs if j not in json_obj.get ('live', [job])]:
+                del self.outputs[old]
+                del self.outputs_iter[old]
+            if (json_obj['iter'] != self.outputs_iter.get (job)):
+                self.outputs[job] = {}
+                self.outputs_iter[job] = json_obj['iter']
+            self.outputs[job][self.id] = intmed_key_val_lists
 
-        # intermediate keys and values are stored in this array
-        intmed_key_val_list = []
+            # the master only needs to know where our output lives
+            header = {'id': self.id,
+                      'job': job,
+                      'iter': json_obj['iter'],
+                      'endpoint': self.data_endpoint,
+                      'sizes': [len (b) for b in intmed_key_val_lists]}
+            blocks = []
+        else:
+            # now we send the results of the map phase to the master
+            # The message is a header plus one block of entries per
+            # partition in the wire format asked for by the master
+            header = {'id': self.id, 'job': job, 'iter': json_obj['iter']}
+            blocks = intmed_key_val_lists
 
-        # For every element in the split, if it belongs to a sensical
-        # word, emit it as an intermediate key with its count
-        for token in split_arg:
-            # now check if it is a valid word
-            if pattern.match (token):
-                # emit the intermediate key and its occurrence as a 1
-                intmed_key_val_list.append ({'token': token, 'val': 1})
+            # the rack aggregator the master may send us to merges our
+            # results with those of the other map workers of our rack,
+            # the way the job would
+            if ('aggregator' in json_obj):
+                header.update (combiner=json_obj['combiner'], wire=json_obj['wire'], compress=json_obj.get ('compress'))
 
-        # now we send the results of the map phase to the master
-        # The message is a json msg
-        self.results_sender.send_json (intmed_key_val_list)
+        with metrics.timer ('serialize_time'):
+            frames = encode_message (header, blocks, json_obj['wire'], self.compressor)
+        metrics.add ('bytes_out', frames_size (frames))
+
+        # our counters go in the trailer of the message
+        metrics.add ('elapsed', now () - start_time)
+        frames.append (encode_trailer ({'elapsed': metrics.counters['elapsed'], 'metrics': metrics.to_dict ()}))
+        # to the rack aggregator, if the master says so
+        if ('aggregator' in json_obj):
+            self.aggregator_sender (json_obj['aggregator']).send_multipart (frames, copy=False)
+        else:
+            self.results_sender.send_multipart (frames, copy=False)
 
         # close the socket
         # self.results_sender.close ()
@@ -172,6 +314,12 @@ def parseCmdLineArgs ():
     parser.add_argument ("masterip", help="IP addr of master")
     parser.add_argument ("masterport", type=int, help="Port number of master")
 
+    # add optional arguments
+    parser.add_argument ("-k", "--maxkeys", type=int, default=1000000, help="Max distinct keys held by the combiner table, and max entries held in its buckets before they are spilled to disk, default 1000000")
+    parser.add_argument ("-T", "--tmpdir", default=None, help="Directory of the spilled combiner runs, default the system temporary directory")
+    parser.add_argument ("-a", "--advertise", default=None, help="Address at which reducers reach this worker for p2p shuffle, and by which the topology file of the master knows its rack, default IP of our hostname")
+    parser.add_argument ("-d", "--dataport", type=int, default=6000, help="Port on which map outputs are served for p2p shuffle (0 for any free port), default 6000")
+
     # parse the args
     args = parser.parse_args ()
 
@@ -193,11 +341,12 @@ def main ():
     # initialize the map worker network connections
     mapobj.init_worker ()
     
-    # invoke the map process. We run this map process forever
+    # invoke the map process. We run this map process forever. There is
+    # no need to rest between tasks since we ask the master for the next
+    # task only when we are idle.
     while True:
         mapobj.do_work ()
-        print("MapReduce Map Worker done for this iteration")
-        time.sleep (5)
+        print("MapReduce Map Worker done with this task")
         
     
 #----------------------------------------------
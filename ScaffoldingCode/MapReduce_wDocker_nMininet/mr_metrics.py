@@ -0,0 +1,182 @@
+#!/usr/bin/python
+#
+# Purpose: Per-task metrics and the per-iteration report of the master
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The phase times of the metrics file say how long an iteration took, but
+# not why. Here every map and reduce task keeps a set of counters:
+#
+#   records_in, records_out:   entries the task consumed and produced
+#   bytes_in, bytes_out:       bytes of the messages it received and sent
+#   serialize_time:            time spent encoding and decoding messages
+#   compute_time:              time spent in the map or reduce function
+#   fetch_time:                time spent fetching p2p partitions
+#   idle_time:                 time the worker waited for this task
+#   elapsed:                   time from receiving the task to its result
+#
+# The workers piggyback their counters on their result messages (see the
+# trailer of mr_wire.py). The master adds what it saw of the task:
+#
+#   queue_wait:     time the task waited for an idle worker
+#   turnaround:     time from handing the task out to getting its result
+#   master_time:    time the master spent decoding and saving the result
+#   network_time:   turnaround less the worker's elapsed time and the
+#                   master time, i.e., the time the task and its result
+#                   spent on the wire
+#   cross_rack_bytes: bytes the task moved between racks, when the master
+#                   knows the racks of the workers (see mr_racks.py)
+#
+# At the end of every iteration, the master writes one json line to the
+# report file with the per-task counters and their totals per phase, plus
+# a rough verdict of what the phase was bound by: the workers' CPU, the
+# network, or the master.
+#
+# All the times are taken with the monotonic high resolution clock.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import json                  # the report is json lines
+import contextlib            # timer context manager
+
+# the monotonic high resolution clock used for all the measurements
+now = time.perf_counter
+
+# the counters of a task kept by the workers
+TASK_FIELDS = ["records_in", "records_out", "bytes_in", "bytes_out",
+               "serialize_time", "compute_time", "fetch_time", "idle_time", "elapsed"]
+
+# the counters of a task added by the master
+MASTER_FIELDS = ["queue_wait", "turnaround", "master_time", "network_time", "cross_rack_bytes"]
+
+# -----------------------------------------------------------------------
+# total size of the frames of a message
+def frames_size (frames):
+    """ num of bytes of a list of frames """
+    size = 0
+    for frame in frames:
+        if (hasattr (frame, 'buffer')):
+            frame = frame.buffer
+        size = size + memoryview (frame).nbytes
+    return size
+
+# ------------------------------------------------
+# The counters of one task
+#
+class MR_TaskMetrics ():
+    """ Counters and timers of a map or reduce task """
+
+    def __init__ (self, role, task=None, worker=None):
+        self.role = role                              # map or reduce
+        self.task = task                              # the task id
+        self.worker = worker                          # who ran it
+        self.counters = dict.fromkeys (TASK_FIELDS, 0)
+
+    # -----------------------------------------------------------------------
+    def add (self, field, value):
+        """ add to a counter """
+        self.counters[field] = self.counters[field] + value
+
+    # -----------------------------------------------------------------------
+    # time a block of code into one of the time counters
+    @contextlib.contextmanager
+    def timer (self, field):
+        """ add the time spent in the with block to a counter """
+        start = now ()
+        try:
+            yield
+        finally:
+            self.add (field, now () - start)
+
+    # -----------------------------------------------------------------------
+    def to_dict (self):
+        """ json-able form that is sent along with the task result """
+        return dict (self.counters, role=self.role, task=self.task, worker=self.worker)
+
+# ------------------------------------------------
+# The per-iteration report of the master
+#
+class MR_IterReport ():
+    """ Aggregates the task metrics of an iteration """
+
+    def __init__ (self, iteration):
+        self.iteration = iteration     # the iteration we report on
+        self.phases = {}               # phase -> wall clock time
+        self.tasks = []                # the per-task metrics
+
+    # -----------------------------------------------------------------------
+    # add the metrics of a completed task. The worker's counters (if the
+    # worker sent any) are completed with what the master measured.
+    def add_task (self, phase, worker_metrics, **master_fields):
+        """ record the metrics of a task """
+
+        task = dict.fromkeys (TASK_FIELDS + MASTER_FIELDS, 0)
+        task.update (worker_metrics or {})
+        task.update (master_fields)
+        task['phase'] = phase
+        task['network_time'] = max (0.0, task['turnaround'] - task['elapsed'] - task['master_time']) if task['turnaround'] else 0.0
+        self.tasks.append (task)
+
+    # -----------------------------------------------------------------------
+    def add_phase (self, phase, wall_time):
+        """ record the wall clock time of a phase """
+        self.phases[phase] = wall_time
+
+    # -----------------------------------------------------------------------
+    # the totals of a phase and what it was bound by
+    def summary (self, phase):
+        """ totals of the task counters of a phase """
+
+        tasks = [t for t in self.tasks if t['phase'] == phase]
+        totals = {f: sum (t[f] for t in tasks) for f in TASK_FIELDS + MASTER_FIELDS}
+        totals['tasks'] = len (tasks)
+        totals['workers'] = len (set (t.get ('worker') for t in tasks))
+        totals['wall_time'] = self.phases.get (phase, 0.0)
+
+        # the load of each task, e.g., of each reducer, and how far the
+        # largest one is from the mean. The phase waits for the largest.
+        load = {}
+        for t in tasks:
+            load[t.get ('task')] = load.get (t.get ('task'), 0) + t['records_in']
+        totals['load'] = load
+        mean = sum (load.values ()) / len (load) if load else 0
+        totals['imbalance'] = max (load.values ()) / mean if mean else 1.0
+
+        # The time the tasks kept the workers busy is spread over the
+        # workers, while the network and the master serve the tasks one
+        # at a time in the worst case. The largest of these is a rough
+        # indication of where the phase spent its time.
+        if (tasks):
+            costs = {'cpu': (totals['compute_time'] + totals['serialize_time']) / max (1, totals['workers']),
+                     'network': totals['network_time'] + totals['fetch_time'],
+                     'master': totals['master_time']}
+            totals['bound'] = max (costs, key=costs.get)
+        elif (totals['wall_time'] > 0):
+            # a phase without tasks (shuffle, finalize) runs on the master
+            totals['bound'] = "master"
+        return totals
+
+    # -----------------------------------------------------------------------
+    def to_dict (self):
+        """ json-able form of the report """
+        phases = list (self.phases)
+        for t in self.tasks:
+            if (t['phase'] not in phases):
+                phases.append (t['phase'])
+        return {'iteration': self.iteration,
+                'phases': {p: self.summary (p) for p in phases},
+                'tasks': self.tasks}
+
+    # -----------------------------------------------------------------------
+    # append the report as one json line to the report file
+    def write (self, f):
+        """ write the report to an open file """
+        f.write (json.dumps (self.to_dict ()) + "\n")
+        f.flush ()
@@ -35,6 +35,7 @@ from mininet.util import pmonitor
 
 # This is our topology class created specially for Mininet
 from mr_topology import MR_Topo
+from mr_racks import MR_Racks  # the topology file for the master
 
 ##################################
 # Command line parsing
@@ -51,6 +52,7 @@ def parseCmdLineArgs ():
     parser.add_argument ("-r", "--racks", type=int, choices=[1, 2, 3], default=1, help="Number of racks, choices 1, 2 or 3")
     parser.add_argument ("-M", "--map", type=int, default=10, help="Number of Map jobs, default 10")
     parser.add_argument ("-R", "--reduce", type=int, default=3, help="Number of Reduce jobs, default 3")
+    parser.add_argument ("-g", "--rackagg", action="store_true", help="Run a rack aggregator on the first map host of every rack, default off")
     
     # add positional arguments in that order
     parser.add_argument ("datafile", help="Big data file")
@@ -79,6 +81,25 @@ def saveIPAddresses (hosts, file="ipaddr.txt"):
             print(("Unexpected error:.format{}".sys.exc_info()[0]))
             raise
 
+##################################
+# Save the racks of the hosts in the topology file of the master
+##################################
+def saveRacks (hosts, file="racks.json"):
+    # MR_Topo names a host h<host>s<switch> after the switch of its rack.
+    # The master (the first host) places the tasks on the racks of their
+    # input with this file (-t option of mr_wordcount.py).
+    try:
+        racks = {}
+        for h in hosts:
+            rack = "s" + h.name.rsplit ("s", 1)[1]
+            racks.setdefault (rack, []).append (h.IP ())
+
+        MR_Racks (racks, hosts[0].IP ()).save (file)
+        
+    except:
+            print("Unexpected error in saveRacks:", sys.exc_info()[0])
+            raise
+
 ##################################
 # run the entire map reduce set up on the hosts
 #
@@ -152,19 +173,34 @@ def genCommandsFile (hosts, args):
         # @NOTE@: for now I have commented the following line so we will have to
         # start the master manually on host h1s1
 
-        # first create the command for the master
-        #cmd_str = hosts[0].name + " python3 mr_wordcount.py -p " + str (args.masterport) + " -m " + str (args.map) + " -r " + str (args.reduce) + " " + args.datafile + " &> " + hosts[0].name + ".out &\n"
+        # first create the command for the master. With the topology file
+        # we save, it places the tasks on the racks of their input.
+        #cmd_str = hosts[0].name + " python3 mr_wordcount.py -p " + str (args.masterport) + " -M " + str (args.map) + " -R " + str (args.reduce) + " -t racks.json " + ("-g " if args.rackagg else "") + args.datafile + " &> " + hosts[0].name + ".out &\n"
         #cmds.write (cmd_str)
+        saveRacks (hosts)
 
-        #  next create the command for the map workers
+        #  next create the command for the map workers. The hosts of mininet
+        #  share the hostname, so each worker is told its own address, by
+        #  which the topology file knows its rack.
         for i in range (args.map):
-            cmd_str = hosts[i+1].name + " python3 mr_mapworker.py " + hosts[0].IP () + " " + str (args.masterport) + " &> " + hosts[i+1].name + ".out &\n"
+            cmd_str = hosts[i+1].name + " python3 mr_mapworker.py -a " + hosts[i+1].IP () + " " + hosts[0].IP () + " " + str (args.masterport) + " &> " + hosts[i+1].name + ".out &\n"
             cmds.write (cmd_str)
 
+        #  next, with -g, a rack aggregator on the first map host of every
+        #  rack, which merges the map results of its rack
+        if (args.rackagg):
+            racks = set ()
+            for i in range (args.map):
+                rack = hosts[i+1].name.rsplit ("s", 1)[1]
+                if (rack not in racks):
+                    racks.add (rack)
+                    cmd_str = hosts[i+1].name + " python3 mr_aggregator.py -a " + hosts[i+1].IP () + " " + hosts[0].IP () + " " + str (args.masterport) + " &> " + hosts[i+1].name + "-agg.out &\n"
+                    cmds.write (cmd_str)
+
         #  next create the command for the reduce workers
         k = 1 + args.map   # starting index for reducer hosts (master + maps)
         for i in range (args.reduce):
-            cmd_str = hosts[k+i].name + " python3 mr_reduceworker.py " + hosts[0].IP () + " " + str (args.masterport) + " &> " + hosts[k+i].name + ".out &\n"
+            cmd_str = hosts[k+i].name + " python3 mr_reduceworker.py -a " + hosts[k+i].IP () + " " + hosts[0].IP () + " " + str (args.masterport) + " &> " + hosts[k+i].name + ".out &\n"
             cmds.write (cmd_str)
 
         # close the commands file.
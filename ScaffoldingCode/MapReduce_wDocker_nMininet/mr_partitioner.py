@@ -0,0 +1,283 @@
+#!/usr/bin/python
+#
+# Purpose: Partitioners that decide which reducer owns an intermediate key
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The map workers call the partitioner on every intermediate key before
+# emitting it so that each record goes straight into the bucket of the
+# reducer that owns it. This way the master does not need a global sort
+# of all the keys to decide which reducer handles which key.
+#
+# Two partitioners are provided:
+#   hash:  key -> crc32 (key) mod R. Reducers get disjoint, well balanced
+#          sets of keys but the final output is only sorted per reducer.
+#   range: the master samples the input to pick R-1 boundary keys. Each
+#          reducer owns a contiguous key range and so concatenating the
+#          reducer outputs in order gives a globally sorted result.
+#   skew:  with natural language input a handful of keys ("the", "a",
+#          "of") carry a large share of all the records, and the reducer
+#          that owns them becomes the straggler of the reduce phase. The
+#          master samples the key frequencies of the input and estimates
+#          the records of every frequent key. The frequent keys are then
+#          packed onto the reducers by their estimated records (the rest
+#          are hashed), and a hot key, i.e., one with more records than
+#          half the fair share of a reducer, is salted: its records are
+#          dealt out round robin to several reducers. Each of these
+#          reduces its share into a partial aggregate, and the partials
+#          are merged in the finalize phase (see merge_salted).
+#
+# The master describes the partitioner to the map workers as a small
+# json-friendly dictionary (see to_dict) that travels with the map task.
+#
+
+# system and time
+import os
+import sys
+
+import zlib                  # crc32 is stable across processes unlike hash()
+import bisect                # binary search in the range boundaries
+import heapq                 # merging of the salted keys into the results
+import collections           # key frequencies of the sample
+
+from mr_functions import find_words  # the keys of the input
+
+# ------------------------------------------------
+# Hash partitioner (the default)
+#
+class MR_HashPartitioner ():
+    """ Hash partitioning of intermediate keys """
+
+    def __init__ (self, R):
+        self.R = R       # num of reducers
+
+    def partition (self, key):
+        """ return the reducer number that owns this key """
+        return zlib.crc32 (key.encode ('utf-8')) % self.R
+
+    def owner (self, key):
+        """ the reducer whose part of the results holds this key """
+        return self.partition (key)
+
+    def to_dict (self):
+        """ description sent to the map workers """
+        return {'type': 'hash', 'R': self.R}
+
+# ------------------------------------------------
+# Range partitioner using boundary keys sampled from the input
+#
+class MR_RangePartitioner ():
+    """ Range partitioning of intermediate keys """
+
+    def __init__ (self, R, boundaries):
+        self.R = R                      # num of reducers
+        self.boundaries = boundaries    # sorted list of R-1 boundary keys
+
+    def partition (self, key):
+        """ return the reducer number that owns this key """
+        # keys less than boundaries[0] go to reducer 0, and so on. Note
+        # that when the sample had fewer than R-1 distinct keys, the last
+        # few reducers simply get nothing.
+        return bisect.bisect_right (self.boundaries, key)
+
+    def owner (self, key):
+        """ the reducer whose part of the results holds this key """
+        return self.partition (key)
+
+    def to_dict (self):
+        """ description sent to the map workers """
+        return {'type': 'range', 'R': self.R, 'boundaries': self.boundaries}
+
+# ------------------------------------------------
+# Skew-aware partitioner balancing the records of the reducers
+#
+class MR_SkewPartitioner ():
+    """ Volume balanced partitioning with salted hot keys """
+
+    def __init__ (self, R, assign, hot, start=0):
+        self.R = R              # num of reducers
+        self.assign = assign    # frequent key -> its reducer
+        self.hot = hot          # hot key -> the reducers it is split across
+        # num of records of each hot key emitted so far. The map tasks
+        # start counting at their task id so that they do not all send
+        # their first (or only, when combined) record to the same reducer.
+        self.start = start
+        self.salts = {}
+
+    def partition (self, key):
+        """ return the reducer number that gets this record of the key """
+        reducers = self.hot.get (key)
+        if (reducers is not None):
+            salt = self.salts.get (key, self.start)
+            self.salts[key] = salt + 1
+            return reducers[salt % len (reducers)]
+        r = self.assign.get (key)
+        if (r is not None):
+            return r
+        return zlib.crc32 (key.encode ('utf-8')) % self.R
+
+    def owner (self, key):
+        """ the reducer whose part of the results holds this key """
+        reducers = self.hot.get (key)
+        if (reducers is not None):
+            return reducers[0]
+        r = self.assign.get (key)
+        if (r is not None):
+            return r
+        return zlib.crc32 (key.encode ('utf-8')) % self.R
+
+    def to_dict (self):
+        """ description sent to the map workers """
+        return {'type': 'skew', 'R': self.R, 'assign': self.assign, 'hot': self.hot}
+
+# -----------------------------------------------------------------------
+# Sample the input file to compute the boundaries of a range partitioner.
+#
+# We read num_samples blocks spread evenly across the file, pull out the
+# words in them, and pick R-1 evenly spaced quantiles of the sorted
+# sample as boundaries.
+def sample_boundaries (datafile, R, num_samples=64, block_size=65536):
+    """ sample the boundary keys for range partitioning """
+
+    doc_size = os.path.getsize (datafile)
+    words = []
+    with open (datafile, "rb") as f:
+        for i in range (num_samples):
+            f.seek (int (doc_size * i / num_samples), 0)
+            block = f.read (block_size)
+            # drop the first and last words, which are likely cut in half.
+            # The keys are found as the map function finds them; those of
+            # a pure ascii block come as bytes.
+            words.extend (w if isinstance (w, str) else w.decode ('ascii') for w in find_words (block)[1:-1])
+
+    if (not words):
+        return []
+
+    words.sort ()
+    boundaries = []
+    for r in range (1, R):
+        key = words[int (len (words) * r / R)]
+        if (not boundaries or key > boundaries[-1]):
+            boundaries.append (key)
+
+    return boundaries
+
+# -----------------------------------------------------------------------
+# Sample the input file to estimate the frequency of every key. We read
+# the same blocks as for the range boundaries, and scale the counts of
+# the sample up to the whole file.
+def sample_frequencies (datafile, num_samples=64, block_size=65536):
+    """ estimated num of occurrences of the keys of the sample """
+
+    doc_size = os.path.getsize (datafile)
+    counts = collections.Counter ()
+    sampled = 0
+    with open (datafile, "rb") as f:
+        for i in range (num_samples):
+            f.seek (int (doc_size * i / num_samples), 0)
+            block = f.read (block_size)
+            # drop the first and last words, which are likely cut in half.
+            # The words of a pure ascii block come as bytes.
+            counts.update (w if isinstance (w, str) else w.decode ('ascii') for w in find_words (block)[1:-1])
+            sampled = sampled + len (block)
+            if (f.tell () >= doc_size):
+                # the sample covers the whole (small) file
+                break
+
+    scale = doc_size / sampled if sampled else 0
+    return {k: n * scale for k, n in counts.items ()}
+
+# num of the most frequent keys that are placed explicitly; the rest of
+# the keys are hashed
+PLANNED_KEYS = 512
+
+# a key is hot when it has more records than this share of the fair
+# share of a reducer
+HOT_SHARE = 0.5
+
+# -----------------------------------------------------------------------
+# Plan a skew partitioner from the key frequencies. With a combiner, a map
+# task emits a key (about) once, so a key cannot have more records than
+# there are map tasks, which is given as the cap. Hot keys are split
+# across reducers only if their partial aggregates can be merged.
+def plan_skew (frequencies, R, cap=None, split_hot=True):
+    """ skew partitioner and the estimated records of each reducer """
+
+    records = {k: (min (n, cap) if cap else n) for k, n in frequencies.items ()}
+    planned = sorted (records, key=records.get, reverse=True)[:PLANNED_KEYS]
+    total = sum (records.values ())
+
+    # the keys we do not place are hashed, so their records are spread
+    # (roughly) evenly over the reducers
+    tail = total - sum (records[k] for k in planned)
+    loads = [tail / R] * R
+    fair = total / R if R else 0
+
+    # place the keys largest first, each on the least loaded reducer(s)
+    assign = {}
+    hot = {}
+    for key in planned:
+        n = records[key]
+        by_load = sorted (range (R), key=loads.__getitem__)
+        if (split_hot and R > 1 and n > HOT_SHARE * fair):
+            num = min (R, int (n / (HOT_SHARE * fair)) + 1)
+            hot[key] = by_load[:num]
+            for r in hot[key]:
+                loads[r] = loads[r] + n / num
+        else:
+            assign[key] = by_load[0]
+            loads[by_load[0]] = loads[by_load[0]] + n
+
+    return MR_SkewPartitioner (R, assign, hot), loads
+
+# -----------------------------------------------------------------------
+# Plan the skew partitioner of a data file and tell what we planned
+def skew_partitioner (datafile, R, cap=None, split_hot=True):
+    """ sample the input and plan a skew partitioner """
+
+    partitioner, loads = plan_skew (sample_frequencies (datafile), R, cap, split_hot)
+    mean = sum (loads) / len (loads) if loads else 0
+    print("MR::partitioner - hot keys: ", {k: len (v) for k, v in partitioner.hot.items ()},
+          ", estimated records per reducer max/mean = ", max (loads) / mean if mean else 1.0)
+    return partitioner
+
+# -----------------------------------------------------------------------
+# The results of a hot key are split across several reducers. Given the
+# sorted (key, val) results of each reducer, merge the partial aggregates
+# of the hot keys into one, which goes to the results of the key's first
+# reducer in its sorted place.
+def merge_salted (parts, partitioner, merge):
+    """ the results of each reducer with the hot keys merged """
+
+    hot = getattr (partitioner, 'hot', None)
+    if (not hot):
+        return parts
+
+    partials = {}
+    for pairs in parts:
+        for key, val in pairs:
+            if (key in hot):
+                partials[key] = merge (partials[key], val) if key in partials else val
+
+    merged = []
+    for r, pairs in enumerate (parts):
+        mine = sorted ((k, v) for k, v in partials.items () if hot[k][0] == r)
+        merged.append (list (heapq.merge ([(k, v) for k, v in pairs if k not in hot], mine, key=lambda e: e[0])))
+    return merged
+
+# -----------------------------------------------------------------------
+# Create the partitioner described by the dictionary sent by the master.
+# The task id only matters to the salting of the skew partitioner.
+def make_partitioner (desc, task=0):
+    """ partitioner factory used by the map workers """
+    if (desc['type'] == "hash"):
+        return MR_HashPartitioner (desc['R'])
+    elif (desc['type'] == "range"):
+        return MR_RangePartitioner (desc['R'], desc['boundaries'])
+    elif (desc['type'] == "skew"):
+        return MR_SkewPartitioner (desc['R'], desc['assign'], desc['hot'], task)
+    else:
+        raise ValueError ("Unknown partitioner type: " + str (desc['type']))
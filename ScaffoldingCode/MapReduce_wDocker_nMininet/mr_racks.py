@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# Purpose: Rack topology of the workers and rack-aware task placement
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# MR_Topo (mr_topology.py) puts the hosts on racks whose switches are
+# connected by slower links, but the master had no idea which worker is on
+# which rack and handed a task to whichever worker asked first. The
+# topology file (-t option of mr_wordcount.py) tells it. It is a json
+# object giving the hosts of every rack, and the host of the master:
+#
+#    {"master": "10.0.0.1",
+#     "racks": {"s1": ["10.0.0.1", "10.0.0.5"], "s2": ["10.0.0.2", "10.0.0.3"]}}
+#
+# A host is the address a worker says it runs on when it comes up (-a
+# option of the workers, by default the IP of its hostname). mr_mininet.py
+# writes the file for the MR_Topo network it creates. A worker whose host
+# is not in the file is on a rack of its own.
+#
+# The input of a task lives on one or more racks: the chunk of a map task
+# and the partition of a reduce task are sent by the master, while in the
+# p2p mode a reducer fetches its partition from the map workers that hold
+# it. Each task thus has a home rack, the one holding most of its input
+# among the racks we have workers on. The map-side combiner runs within
+# the map task and is as local as the task itself.
+#
+# The placement uses delay scheduling: a worker that asks for a task gets
+# the oldest task whose home is its own rack. A task is handed to a worker
+# on another rack only once it has waited longer than the locality wait
+# (-L option) for one on its home rack, so that no task waits for long.
+# Every completed task adds the bytes it moved (its task and result to and
+# from the master, and the p2p partitions it fetched) to the bytes moved
+# across racks, so that the saving can be measured.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import json                  # the topology file is json
+import socket                # our own address
+
+# -----------------------------------------------------------------------
+# read the topology file
+def load_racks (path):
+    """ the rack topology given in a topology file """
+    with open (path, "r") as f:
+        topo = json.load (f)
+    return MR_Racks (topo['racks'], topo.get ('master'))
+
+# ------------------------------------------------
+# The racks of the hosts
+#
+class MR_Racks ():
+    """ Rack membership of the hosts """
+
+    def __init__ (self, racks, master=None):
+        self.racks = racks        # rack -> its hosts
+        # host -> its rack
+        self.host_rack = {host: rack for rack, hosts in racks.items () for host in hosts}
+        # the host of the master, by default our own address
+        self.master = master or socket.gethostbyname (socket.gethostname ())
+
+    # -----------------------------------------------------------------------
+    def rack_of (self, host):
+        """ rack of a host, None if it is not in the topology """
+        return self.host_rack.get (host)
+
+    # -----------------------------------------------------------------------
+    def master_rack (self):
+        """ rack of the master """
+        return self.rack_of (self.master)
+
+    # -----------------------------------------------------------------------
+    def save (self, path):
+        """ write the topology file """
+        with open (path, "w") as f:
+            json.dump ({'master': self.master, 'racks': self.racks}, f, indent=2)
+
+# -----------------------------------------------------------------------
+# whether bytes between two racks cross the links between the switches.
+# A host we know nothing about is on a rack of its own.
+def cross_rack (src, dst):
+    """ true if src and dst are not known to be on the same rack """
+    return (src is None or dst is None or src != dst)
+
+# ------------------------------------------------
+# The placement of the tasks of a phase
+#
+class MR_Placement ():
+    """ Rack-aware placement of tasks with delay scheduling """
+
+    def __init__ (self, worker_rack, task_racks, racks, wait):
+        self.worker_rack = worker_rack    # worker -> its rack
+        self.task_racks = task_racks      # task -> {rack: bytes of its input there}
+        self.racks = racks                # racks we have workers of the phase on
+        self.wait = wait                  # secs a task waits for its home rack
+        self.homes = {}                   # task -> its home rack
+        self.local_tasks = 0              # tasks run on their home rack
+        self.remote_tasks = 0             # tasks run on another rack
+        self.bytes = 0                    # bytes the tasks moved
+        self.cross_bytes = 0              # of which across racks
+
+    # -----------------------------------------------------------------------
+    # the rack with most of the input of a task among the racks we have
+    # workers on. The input of a task does not move once the phase runs.
+    def home (self, task):
+        """ home rack of a task, None if any rack will do """
+        if (task not in self.homes):
+            sizes = {rack: size for rack, size in self.task_racks (task).items ()
+                     if rack in self.racks and size > 0}
+            self.homes[task] = max (sizes, key=sizes.get) if sizes else None
+        return self.homes[task]
+
+    # -----------------------------------------------------------------------
+    # the task an idle worker should run: the oldest pending task on its
+    # rack, or one that has waited long enough for its own rack
+    def pick (self, pending, ready, worker, now):
+        """ returns one of the pending tasks, or None """
+        rack = self.worker_rack (worker)
+        for task in pending:
+            home = self.home (task)
+            if (home is None or home == rack or now - ready.get (task, now) >= self.wait):
+                return task
+        return None
+
+    # -----------------------------------------------------------------------
+    # count a completed task and the bytes it moved, given as a list of
+    # (from rack, to rack, bytes)
+    def account (self, task, worker, transfers):
+        """ returns the bytes the task moved across racks """
+
+        home = self.home (task)
+        if (home is None or home == self.worker_rack (worker)):
+            self.local_tasks = self.local_tasks + 1
+        else:
+            self.remote_tasks = self.remote_tasks + 1
+
+        cross = 0
+        for src, dst, size in transfers:
+            self.bytes = self.bytes + size
+            if (cross_rack (src, dst)):
+                cross = cross + size
+        self.cross_bytes = self.cross_bytes + cross
+        return cross
+
+    # -----------------------------------------------------------------------
+    def stats (self):
+        """ a line on how local the tasks were """
+        return "{} of {} tasks rack-local, {} of {} bytes across racks".format (
+            self.local_tasks, self.local_tasks + self.remote_tasks, self.cross_bytes, self.bytes)
@@ -0,0 +1,140 @@
+#!/usr/bin/python
+#
+# Purpose: Out-of-core input of a reduce task, merged by key from sorted runs
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# A reduce worker used to get its whole partition in one message and hold
+# all of it as columns until the reduce function had gone over it. A big
+# partition can thus run the reducer (and its container) out of memory.
+#
+# The partition now arrives as a sequence of chunks: the master sends the
+# chunks of its shuffle file one at a time as the reducer asks for them,
+# and in the p2p mode every map worker sends its part of the partition.
+# The chunks are added here one after the other. As long as they fit in
+# the memory budget (-b option of the reduce worker) they are kept as
+# columns and reduced at once by the columnar engine, just like before.
+# Once they do not, the entries held are sorted by key and spilled as a
+# run file to a local temporary directory, the way the shuffle of the
+# master does (see mr_shuffle.py), combined by key if the aggregation
+# allows. The reduce function then goes over the k-way merge of the runs,
+# a bounded batch of key groups at a time, so that the memory the reducer
+# needs for its input does not depend on the size of the partition.
+#
+
+# system and time
+import os
+import sys
+
+import shutil                # remove the temporary directory
+import tempfile              # local temporary directory of the runs
+
+from mr_shuffle import MR_Shuffle, RECORD_OVERHEAD, GROUPS_PER_CHUNK  # sorted runs and their merge
+from mr_functions import reduce_func  # the wordcount reduce function
+from mr_columnar import MR_ColumnarReduce  # NumPy based reduce engine
+
+# estimated bytes of an entry held as columns (its key id and val), over
+# and above its key in the dictionary of the block
+COLUMN_ENTRY_BYTES = 16
+
+# ------------------------------------------------
+# The input of one reduce task
+#
+class MR_ReduceInput ():
+    """ Memory bounded input of a reduce task """
+
+    def __init__ (self, mem_budget, partition, aggregate="sum", compressor=None, tmpdir=None):
+        self.mem_budget = mem_budget   # bytes of entries held in memory
+        self.partition = partition     # the partition we reduce
+        self.aggregate = aggregate     # how the vals of a key combine
+        self.compressor = compressor   # compresses the run files, if any
+        self.tmpdir = tmpdir           # where the temporary directory goes
+        self.workdir = None            # our temporary directory, once needed
+        self.runs = None               # the sorted runs spilled so far
+        self.columns = []              # the blocks held as columns
+        self.mem_used = 0              # estimated bytes held in columns
+        self.records_in = 0            # num of entries added
+        self.num_spills = 0            # num of runs spilled
+
+    # -----------------------------------------------------------------------
+    # add the next chunk of the partition, given as the (keys, ids, vals)
+    # columns of a block
+    def add_block (self, keys, ids, vals):
+        """ hold the entries of a block, spilling a run when over budget """
+
+        self.columns.append ((keys, ids, vals))
+        self.records_in = self.records_in + len (vals)
+        self.mem_used = self.mem_used + sum (len (k) + RECORD_OVERHEAD for k in keys) + COLUMN_ENTRY_BYTES * len (vals)
+        if (self.mem_used >= self.mem_budget):
+            self.spill ()
+
+    # -----------------------------------------------------------------------
+    # sort the entries held and write them as the next run. The partial
+    # sums, mins and maxes of a key are combined in the run; the means and
+    # the counts need every entry.
+    def spill (self):
+        """ spill the entries held as a sorted run """
+
+        if (not self.columns):
+            return
+        if (self.runs is None):
+            self.workdir = tempfile.mkdtemp (prefix="reduce" + str (self.partition) + "_", dir=self.tmpdir)
+            combiner = self.aggregate if self.aggregate in ("sum", "min", "max") else "none"
+            self.runs = MR_Shuffle (self.mem_budget, self.partition, combiner, self.compressor, self.workdir)
+
+        records = []
+        for keys, ids, vals in self.columns:
+            vals = vals.tolist () if hasattr (vals, 'tolist') else vals
+            ids = ids.tolist () if hasattr (ids, 'tolist') else ids
+            if (ids is None):
+                records.extend ([k, v] for k, v in zip (keys, vals))
+            else:
+                records.extend ([keys[i], v] for i, v in zip (ids, vals))
+        self.runs.spill_run (records)
+        self.num_spills = self.num_spills + 1
+        self.columns = []
+        self.mem_used = 0
+
+    # -----------------------------------------------------------------------
+    # reduce the whole partition
+    def results (self):
+        """ list of (key, aggregate) sorted by key """
+
+        # all of it fit in memory
+        if (self.runs is None):
+            return reduce_func (self.columns, self.aggregate)
+
+        # otherwise the rest becomes the last run, and the runs are merged
+        # by key. Every key group is whole, so each batch of groups is
+        # reduced on its own, and the batches come in key order.
+        self.spill ()
+        self.runs.reduce_fanin ()
+        key_val_list = []
+        batch = []
+        for k, g in self.runs.merge_runs (self.runs.runs):
+            batch.extend (g)
+            if (len (batch) >= GROUPS_PER_CHUNK):
+                key_val_list.extend (self.reduce_batch (batch))
+                batch = []
+        key_val_list.extend (self.reduce_batch (batch))
+        return key_val_list
+
+    # -----------------------------------------------------------------------
+    def reduce_batch (self, records):
+        """ reduce a batch of whole key groups """
+        reducer = MR_ColumnarReduce (self.aggregate)
+        reducer.add_pairs (records)
+        return reducer.results ()
+
+    # -----------------------------------------------------------------------
+    # remove the run files
+    def close (self):
+        """ remove our temporary directory """
+        if (self.workdir is not None):
+            shutil.rmtree (self.workdir, ignore_errors=True)
+            self.workdir = None
+        self.runs = None
+        self.columns = []
@@ -21,10 +21,23 @@ import sys
 import time
 import re
 import zmq
+import json
 import pickle
+import operator   # used in itertools
+import itertools  # nice iterators
 
 import argparse   # argument parser
 
+from mr_wire import encode_message, decode_message, encode_trailer  # wire format of the records
+from mr_heartbeat import MR_Heartbeat, worker_name, worker_host  # tell the master we are alive
+from mr_compress import available_codecs, compressor_for  # compression of the records
+from mr_metrics import MR_TaskMetrics, frames_size, now  # counters of our tasks
+from mr_reduceinput import MR_ReduceInput  # memory bounded input of our tasks
+
+# max num of parts of our partition we ask the map workers for at once in
+# the p2p mode, so that the parts waiting for us stay bounded
+FETCH_WINDOW = 4
+
 #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
 # @NOTE@: You will need to make appropriate changes
 # to this logic.  You can maintain the overall structure
@@ -44,9 +57,17 @@ class MR_Reduce ():
         """ constructor """
         self.master_ip = args.masterip
         self.master_port = args.masterport
+        self.name = worker_name ("reduce")  # our unique name
+        self.host = worker_host (args.address)  # the host we run on
+        self.context = None   # the ZeroMQ context
         self.receiver = None  # connection to master
         self.init_sender = None     # for indicating worker up
         self.results_sender = None  # for sending map results
+        self.fetchers = {}    # sockets to map workers for the p2p shuffle
+        self.heartbeat = None # thread that tells master we are alive
+        self.compressor = None  # (de)compresses the records we exchange
+        self.reducemem = args.reducemem * 1024 * 1024  # memory budget of our input in bytes
+        self.tmpdir = args.tmpdir   # where our input is spilled
 
     #------------------------------------------
     def init_worker (self):
@@ -54,14 +75,18 @@ class MR_Reduce ():
         print("initializing reduce worker")
 
         context = zmq.Context()
+        self.context = context
 
-        # Socket to receive messages on. Worker uses PULL from the master
+        # Socket to receive tasks on. Whenever the worker is idle, it asks
+        # the master for its next task using the REQ pattern.
         # Note that the reducer uses 1 more than the base port of master
-        self.receiver = context.socket (zmq.PULL)
+        self.receiver = context.socket (zmq.REQ)
         self.receiver.setsockopt (zmq.RCVHWM, 0)
+        # the master knows us by our name, which is also in our heartbeats
+        self.receiver.setsockopt (zmq.IDENTITY, self.name.encode ('utf-8'))
         connect_addr = "tcp://"+ self.master_ip + ":" + str (self.master_port+1)
 
-        print("Using PULL, reduce worker connecting to ", connect_addr)
+        print("Using REQ, reduce worker connecting to ", connect_addr)
         self.receiver.connect (connect_addr)
         
         # As part of the initialization, we tell the master that we are up.
@@ -78,7 +103,13 @@ class MR_Reduce ():
         #self.init_sender.bind (bind_addr)
 
         # now send an ACK to the barrier to let it know that we are up
-        self.init_sender.send (b'0')
+        self.init_sender.send_json ({'worker': self.name, 'role': "reduce", 'state': "up", 'codecs': available_codecs (),
+                                     'host': self.host})
+
+        # and keep telling the master that we are alive, even while we
+        # are busy with a task
+        self.heartbeat = MR_Heartbeat (context, connect_addr, self.name, "reduce")
+        self.heartbeat.start ()
 
         # close the socket
         # self.init_sender.close ()
@@ -98,7 +129,76 @@ class MR_Reduce ():
         #bind_addr = "tcp://" + self.master_ip + ":" + str (self.master_port+4)
         #print "Using PUSH, reduce worker binding to results results barrier at ", bind_addr
         #self.results_sender.bind (bind_addr)
-        
+
+    #------------------------------------------
+    def fetch_partition (self, job, iteration, reduce_id, sources, wire, compress, metrics, fetched, reduce_input):
+        """ pull our partition directly from the map workers """
+
+        # In the peer-to-peer shuffle mode the master tells us which map
+        # workers hold a part of our partition. We use a DEALER socket per
+        # map worker so that several requests are outstanding at once and
+        # the map workers serve them in parallel.
+        def request (src):
+            if (src['endpoint'] not in self.fetchers):
+                fetcher = self.context.socket (zmq.DEALER)
+                fetcher.setsockopt (zmq.LINGER, 0)
+                fetcher.setsockopt (zmq.RCVHWM, 0)
+                print("Using DEALER, reduce worker connecting to map worker at ", src['endpoint'])
+                fetcher.connect (src['endpoint'])
+                self.fetchers[src['endpoint']] = fetcher
+
+            request = json.dumps ({'job': job, 'iter': iteration, 'id': src['id'], 'partition': reduce_id, 'wire': wire, 'compress': compress})
+            self.fetchers[src['endpoint']].send_multipart ([b'', request.encode ('utf-8')])
+
+        for src in sources[:FETCH_WINDOW]:
+            request (src)
+
+        # now collect the replies, one per source, asking for the next part
+        # as each one arrives. A map worker answers its requests in order.
+        # Each reply is a single block of (key, val) entries, which goes
+        # into our input as its columns. We note the bytes we got from
+        # each source for the master, which counts those that came from
+        # another rack. A map worker that no longer has its output says it
+        # is lost; we still collect the other replies so that none of them
+        # is left for our next task. Returns the (map task, endpoint) of
+        # the outputs that were lost.
+        lost = []
+        for n, src in enumerate (sources):
+            with metrics.timer ('fetch_time'):
+                frames = self.fetchers[src['endpoint']].recv_multipart (copy=False)
+            if (n + FETCH_WINDOW < len (sources)):
+                request (sources[n + FETCH_WINDOW])
+            metrics.add ('bytes_in', frames_size (frames))
+            fetched.append ([src['id'], frames_size (frames)])
+            with metrics.timer ('serialize_time'):
+                header, blocks = decode_message (frames[1:], columns=True, compressor=self.compressor)
+            if (header.get ('lost')):
+                lost.append ([src['id'], src['endpoint']])
+                continue
+            reduce_input.add_block (*blocks[0])
+        return lost
+
+    #------------------------------------------
+    def receive_partition (self, reduce_arg, metrics, reduce_input):
+        """ ask the master for the rest of the chunks of our partition """
+
+        # The master sends the first chunk of our partition along with the
+        # task, and each of the others when we ask for it on the same REQ
+        # socket. The chunks come from the shuffle file, sorted by key. If
+        # the job or its iteration is over meanwhile, the master says so
+        # and we drop the task. Returns whether we got them all.
+        for chunk in range (1, reduce_arg.get ('chunks', 1)):
+            request = {'job': reduce_arg.get ('job', 0), 'iter': reduce_arg['iter'], 'id': reduce_arg['id'], 'chunk': chunk}
+            with metrics.timer ('fetch_time'):
+                self.receiver.send (json.dumps (request).encode ('utf-8'))
+                frames = self.receiver.recv_multipart (copy=False)
+            metrics.add ('bytes_in', frames_size (frames))
+            with metrics.timer ('serialize_time'):
+                header, blocks = decode_message (frames, columns=True)
+            if (header.get ('lost')):
+                return False
+            reduce_input.add_block (*blocks[0])
+        return True
 
     #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
     # @NOTE@: changes will be needed here for the Assignment
@@ -112,32 +212,88 @@ class MR_Reduce ():
         """ Word count reduce function """
         print("starting work: reduce worker, working directory = ", os.getcwd())
 
-        # receive the contents (which is received as a json)
-        content = self.receiver.recv_json ()
+        # receive the task, which is a header and the first chunk of our
+        # partition as a block of (key, val) entries sorted by key, in the
+        # binary or json wire format
+        # we are idle, so ask the master for our next task. The master
+        # replies with it when there is one for us.
+        idle_start = now ()
+        self.receiver.send (b'ready')
+        frames = self.receiver.recv_multipart (copy=False)
+        start_time = now ()
 
-        # final results for this worker are stored in this
-        key_val_list = []
-        
-        # our contents will be a list of list. Each internal list could have
-        # one or more entries for a given unique word
-        for items in content:
-            sum = 0
-            for i in range(len(items)):
-                sum = sum + items[i][1]
+        # the counters of this task, which we send along with the result
+        metrics = MR_TaskMetrics ("reduce", worker=self.name)
+        metrics.add ('idle_time', start_time - idle_start)
+        metrics.add ('bytes_in', frames_size (frames))
+        with metrics.timer ('serialize_time'):
+            reduce_arg, blocks = decode_message (frames, columns=True)
+        metrics.task = reduce_arg['id']
+        job = reduce_arg.get ('job', 0)
+        wire = reduce_arg.get ('wire', "json")
+        aggregate = reduce_arg.get ('aggregate', "sum")
 
-            # The [0]'th entry of each of the entries of the second level
-            # list is the unique word. We just use the first one and dump it
-            # into our list
-            key_val_list.append ({'token': items[0][0], 'val': sum}) 
+        # the records we fetch and the results we send are compressed as
+        # the master says. We count what the fetches saved for the master.
+        self.compressor = compressor_for (reduce_arg.get ('compress'), self.compressor)
+        if (self.compressor is not None):
+            self.compressor.reset ()
 
+        # The contents are either sent to us by the master or, in the
+        # peer-to-peer shuffle mode, fetched directly from the map workers,
+        # a chunk at a time. Our input holds them within its memory budget
+        # and spills the rest to local run files, which are compressed the
+        # way the master says, but do not count towards what the fetches
+        # saved.
+        reduce_input = MR_ReduceInput (self.reducemem, reduce_arg['id'], aggregate,
+                                       compressor_for (reduce_arg.get ('compress')), self.tmpdir)
+        try:
+            result_arg = {'id': reduce_arg['id'], 'job': job, 'iter': reduce_arg['iter']}
+            if ('sources' in reduce_arg):
+                result_arg['fetched'] = []
+                lost = self.fetch_partition (job, reduce_arg['iter'], reduce_arg['id'], reduce_arg['sources'], wire, reduce_arg.get ('compress'),
+                                             metrics, result_arg['fetched'], reduce_input)
+                # without all of our partition we cannot reduce it. We tell
+                # the master which map outputs were lost instead, and it
+                # maps them again before it re-executes our task.
+                if (lost):
+                    print("reduce worker lost the outputs of map tasks ", [m for m, endpoint in lost], " for task ", reduce_arg['id'])
+                    result_arg['lost'] = lost
+                    self.results_sender.send_multipart (encode_message (result_arg, [], "json"), copy=False)
+                    return
+            else:
+                for block in blocks:
+                    reduce_input.add_block (*block)
+                if (not self.receive_partition (reduce_arg, metrics, reduce_input)):
+                    print("reduce worker dropped task ", reduce_arg['id'], " of a job or iteration that is over")
+                    return
+            if (self.compressor is not None):
+                result_arg['compressed'] = [self.compressor.raw_bytes, self.compressor.packed_bytes]
 
-        # trigger the reduce barrier by sending the results back
-        self.results_sender.send_json(key_val_list)
+            # run the wordcount reduce function over the columns of the
+            # entries, or over the merge of the runs we spilled. The final
+            # results for this worker are stored in this list
+            with metrics.timer ('compute_time'):
+                key_val_list = reduce_input.results ()
+            metrics.add ('records_in', reduce_input.records_in)
+            metrics.add ('records_out', len (key_val_list))
+            if (reduce_input.num_spills):
+                print("reduce worker spilled its input to ", reduce_input.num_spills, " runs")
+        finally:
+            reduce_input.close ()
+
+        # trigger the reduce barrier by sending the results back, with our
+        # counters in the trailer of the message
+        with metrics.timer ('serialize_time'):
+            frames = encode_message (result_arg, [key_val_list], wire, self.compressor)
+        metrics.add ('bytes_out', frames_size (frames))
+        metrics.add ('elapsed', now () - start_time)
+        frames.append (encode_trailer ({'elapsed': metrics.counters['elapsed'], 'metrics': metrics.to_dict ()}))
+        self.results_sender.send_multipart (frames, copy=False)
 
         # close the socket
         # self.results_sender.close ()
 
-        time.sleep (5)
         print("reduce worker has completed its work")
 
 ##################################
@@ -152,6 +308,11 @@ def parseCmdLineArgs ():
     parser.add_argument ("masterip", help="IP addr of master")
     parser.add_argument ("masterport", type=int, help="Port number of master")
 
+    # add optional arguments
+    parser.add_argument ("-a", "--address", default=None, help="Address of our host, by which the topology file of the master knows its rack, default IP of our hostname")
+    parser.add_argument ("-b", "--reducemem", type=int, default=64, help="Memory budget of the input of a reduce task in MB, beyond which it is spilled to disk, default 64")
+    parser.add_argument ("-T", "--tmpdir", default=None, help="Directory of the spilled input, default the system temporary directory")
+
     # parse the args
     args = parser.parse_args ()
 
@@ -171,11 +332,12 @@ def main ():
     # initialize the reduce worker network connections
     reduceobj.init_worker ()
     
-    # invoke the reduce process. We run this reduce process forever
+    # invoke the reduce process. We run this reduce process forever. There
+    # is no need to rest between tasks since we ask the master for the
+    # next task only when we are idle.
     while True:
         reduceobj.do_work ()
         print("MapReduce Reduce Worker done for this iteration")
-        time.sleep (5)
 
 #----------------------------------------------
 if __name__ == '__main__':
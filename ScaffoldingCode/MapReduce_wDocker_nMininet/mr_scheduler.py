@@ -0,0 +1,241 @@
+#!/usr/bin/python
+#
+# Purpose: Dynamic task scheduler with speculative backup tasks
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Instead of cutting the input into exactly as many chunks as there are
+# map workers and pushing one to each, the master cuts the input into many
+# small splits and hands them out on demand: every idle worker asks for
+# the next split. Fast workers thus end up doing more splits than slow
+# ones. When no split is left to hand out but some are still running, a
+# straggler (a split running much longer than a typical split took) is
+# handed to the idle worker as a speculative backup. Whichever copy of a
+# task finishes first wins; the late duplicate is ignored.
+#
+# Failures are handled the same way: the scheduler knows which worker runs
+# each copy of a task. When a worker dies, its tasks are handed to the next
+# idle worker unless another copy is still running, and so is a task whose
+# latest copy has run past its deadline (-T option). Since a task is only
+# done once, a late result of a task that was re-executed is ignored.
+#
+# The same scheduler is used for the reduce tasks (the partitions), which
+# the reduce workers also ask for when they are idle.
+#
+# With a rack topology, the placement (see mr_racks.py) decides which of
+# the pending tasks an idle worker gets, so that the tasks run on the rack
+# that holds their input where possible.
+#
+# The scheduler only does the bookkeeping of the tasks; the master does
+# the actual communication with the workers.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import collections           # deque of pending tasks
+
+# ------------------------------------------------
+# The task scheduler used by the master
+#
+class MR_Scheduler ():
+    """ On-demand task scheduler with speculative execution """
+
+    def __init__ (self, num_tasks, spec_factor=2.0, max_attempts=2, pending=None, task_timeout=0, placement=None):
+        self.num_tasks = num_tasks        # num of tasks in this phase
+        self.placement = placement        # rack-aware placement, if any
+        self.spec_factor = spec_factor    # straggler threshold (0 disables)
+        self.max_attempts = max_attempts  # max copies of a running task
+        self.task_timeout = task_timeout  # secs before a task is re-executed (0 disables)
+        # the tasks that are ready but not yet started. By default all of
+        # them are ready; otherwise they are added as they become ready.
+        self.pending = collections.deque (range (num_tasks) if pending is None else pending)
+        self.ready = dict.fromkeys (self.pending, time.monotonic ())  # task -> when it became pending
+        self.queue_waits = {}             # task -> time it last waited for a worker
+        self.running = {}                 # task -> list of (start time, worker)
+        self.started = set ()             # tasks handed out at least once
+        self.done = set ()                # completed tasks
+        self.durations = []               # run times of the completed tasks
+        self.num_backups = 0              # num of speculative backups
+        self.num_retries = 0              # num of re-executions of lost tasks
+        self.num_duplicates = 0           # num of ignored late results
+
+    # -----------------------------------------------------------------------
+    # all tasks have completed
+    def is_complete (self):
+        """ true when every task is done """
+        return (len (self.done) == self.num_tasks)
+
+    # -----------------------------------------------------------------------
+    # a task has become ready to run
+    def add_task (self, task):
+        """ make a task available to the workers """
+        self.pending.append (task)
+        self.ready[task] = time.monotonic ()
+
+    # -----------------------------------------------------------------------
+    # a task need not run at all, e.g., since its output is in the job cache
+    def skip_task (self, task):
+        """ mark a task done without running it """
+        if (task in self.pending):
+            self.pending.remove (task)
+        self.ready.pop (task, None)
+        self.done.add (task)
+
+    # -----------------------------------------------------------------------
+    # the typical run time of a task so far
+    def median_duration (self):
+        """ median run time of completed tasks, None if none completed """
+        if (not self.durations):
+            return None
+        durations = sorted (self.durations)
+        return durations[len (durations) // 2]
+
+    # -----------------------------------------------------------------------
+    # pick the next task for an idle worker
+    def next_task (self, worker=None):
+        """ returns the task the idle worker should run, or None """
+
+        now = time.monotonic ()
+
+        # hand out the splits that have not been started yet first, and
+        # those that have to be re-executed. The latter may have completed
+        # in the meantime after all.
+        while (self.pending):
+            if (self.placement is None):
+                task = self.pending.popleft ()
+            else:
+                # the pending tasks may wait a little for a worker on the
+                # rack of their input, and are not backed up meanwhile
+                task = self.placement.pick (self.pending, self.ready, worker, now)
+                if (task is None):
+                    return None
+                self.pending.remove (task)
+            if (task in self.done):
+                self.ready.pop (task, None)
+                continue
+            self.queue_waits[task] = now - self.ready.pop (task, now)
+            self.running.setdefault (task, []).append ((now, worker))
+            self.started.add (task)
+            return task
+
+        # otherwise look for a straggler to back up speculatively. We need
+        # an idea of how long a task takes, so at least one must be done.
+        median = self.median_duration ()
+        if (self.spec_factor <= 0 or median is None):
+            return None
+
+        straggler = None
+        longest = self.spec_factor * median
+        for task, attempts in self.running.items ():
+            elapsed = now - attempts[0][0]
+            if (len (attempts) < self.max_attempts and elapsed > longest):
+                straggler = task
+                longest = elapsed
+
+        if (straggler is not None):
+            self.running[straggler].append ((now, worker))
+            self.num_backups = self.num_backups + 1
+            print("MR::scheduler - speculative backup of straggler task ", straggler)
+
+        return straggler
+
+    # -----------------------------------------------------------------------
+    # a worker has completed a task
+    def task_done (self, task):
+        """ returns True if this is the first completion of the task """
+
+        if (task in self.done or task not in self.started):
+            # a late duplicate of a task that was backed up or re-executed
+            self.num_duplicates = self.num_duplicates + 1
+            return False
+
+        attempts = self.running.pop (task, None)
+        if (attempts):
+            self.durations.append (time.monotonic () - attempts[0][0])
+        self.done.add (task)
+        return True
+
+    # -----------------------------------------------------------------------
+    # a rack aggregator has merged the outputs of several tasks. If one of
+    # them is done already, e.g., by a backup, the merged records cannot be
+    # told apart and the others run again instead.
+    def tasks_done (self, tasks):
+        """ returns True if this is the first completion of all the tasks """
+
+        if (len (tasks) == 1):
+            return self.task_done (tasks[0])
+        if (any (task in self.done or task not in self.started for task in tasks)):
+            self.num_duplicates = self.num_duplicates + 1
+            for task in tasks:
+                if (task not in self.done and task in self.started):
+                    self.retry (task)
+            return False
+
+        for task in tasks:
+            self.task_done (task)
+        return True
+
+    # -----------------------------------------------------------------------
+    # put a task back at the front of the queue to be re-executed
+    def retry (self, task):
+        if (task not in self.pending):
+            self.pending.appendleft (task)
+            self.ready[task] = time.monotonic ()
+            self.num_retries = self.num_retries + 1
+            print("MR::scheduler - re-executing lost task ", task)
+
+    # -----------------------------------------------------------------------
+    # a task cannot go on until its lost inputs are made again, after which
+    # it is retried. Meanwhile it is neither pending nor running, so that it
+    # is not backed up or re-executed.
+    def hold (self, task):
+        """ take a task out of the running ones """
+        self.running.pop (task, None)
+        if (task in self.pending):
+            self.pending.remove (task)
+        self.ready.pop (task, None)
+
+    # -----------------------------------------------------------------------
+    # a worker has died; its tasks are re-executed unless another copy of
+    # them is still running elsewhere
+    def worker_lost (self, worker):
+        """ re-execute the tasks of a dead worker """
+
+        for task in list (self.running):
+            attempts = [a for a in self.running[task] if a[1] != worker]
+            if (len (attempts) == len (self.running[task])):
+                continue
+            if (attempts):
+                self.running[task] = attempts
+            else:
+                del self.running[task]
+                self.retry (task)
+
+    # -----------------------------------------------------------------------
+    # re-execute the tasks whose latest copy has run past the deadline. The
+    # copies already running are left alone in case they finish after all.
+    def expire (self):
+        """ re-execute the tasks that timed out """
+
+        if (self.task_timeout <= 0):
+            return
+        deadline = time.monotonic () - self.task_timeout
+        for task, attempts in self.running.items ():
+            if (attempts[-1][0] < deadline):
+                self.retry (task)
+
+    # -----------------------------------------------------------------------
+    # how long until the next task deadline
+    def next_deadline (self):
+        """ secs until the earliest running task times out, None if none """
+
+        starts = [attempts[-1][0] for task, attempts in self.running.items () if task not in self.pending]
+        if (self.task_timeout <= 0 or not starts):
+            return None
+        return max (0.0, min (starts) + self.task_timeout - time.monotonic ())
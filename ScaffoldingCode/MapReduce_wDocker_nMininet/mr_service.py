@@ -0,0 +1,597 @@
+#!/usr/bin/python
+#
+# Purpose: Master service that runs several jobs at once on the same workers
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The master used to bind its five ports for a single job and run exactly
+# that job. The workers sat idle whenever the job was in its shuffle or
+# finalize phase, and many small jobs ran one after the other.
+#
+# The service owns what the jobs share: the ports, the workers (their
+# heartbeats and which of them are idle) and the event loop. A job (an
+# MR_Framework) keeps only its own state, i.e., its options, its splits,
+# partitioner and schedulers, and the files it works on, and asks the
+# service to run the tasks of each of its phases on the workers.
+#
+# Run as a service (mr_wordcount.py -J), the master accepts jobs from
+# mr_submit.py on base port + 5, using the REQ-ROUTER pattern, and replies
+# to the client when its job is done. Any number of jobs run at once. Each
+# works in a directory of its own, job<id>, where it also leaves its
+# results and metrics. The job of a plain mr_wordcount.py run is the
+# only job of its service and works in the current directory.
+#
+# Every task we send and every result a worker sends back names its job,
+# so that the results of the jobs go to the right scheduler. When a worker
+# asks for a task, it gets one of the job with the fewest tasks running
+# for its share (-W option of the job), among the jobs that have tasks not
+# started yet; only when there are none, a straggler of some job is backed
+# up. The jobs thus share the workers fairly, and the workers of a job in
+# its shuffle or finalize phase work on the other jobs in the meantime.
+#
+# Given a topology file (-t option), the service knows the rack of every
+# worker by the host the worker says it runs on, and the jobs place their
+# tasks on the racks that hold their input (see mr_racks.py). A worker may
+# then get no task while another idle worker does, so every idle worker is
+# offered a task.
+#
+# Rack aggregators (mr_aggregator.py) come up on the same channel as the
+# workers, at any time. The map workers of a job that asks for them send
+# their results to the aggregator of their rack, which sends us merged
+# results on behalf of several map tasks.
+#
+# The service runs on a single asyncio event loop (using the asyncio
+# sockets of ZeroMQ) instead of blocking on one socket at a time. For each
+# of the map and reduce workers, one coroutine hands out a task to every
+# worker that asks for one and one collects the results of the tasks; one
+# more wakes up periodically to re-execute the lost tasks and back up the
+# stragglers, and another records the heartbeats of the workers.
+#
+# Nothing that blocks runs on the loop itself. The results are decoded and
+# the reduce tasks are loaded and encoded by a pool of threads, while the
+# map and reduce outputs, the shuffle runs, the final results and the
+# metrics of a job are written to disk by a spill thread of the job, in
+# the order they were handed to it. The phase barriers of a job wait for
+# its spills to finish.
+#
+
+# system and time
+import os
+import sys
+import time
+
+import zmq                   # ZeroMQ library
+import zmq.asyncio           # ZeroMQ sockets for the event loop
+import json                  # json
+import argparse              # the options of the submitted jobs
+
+import asyncio               # the event loop of the master
+import concurrent.futures    # threads for the blocking work
+
+from mr_wire import encode_message, decode_message  # wire format of the records
+from mr_heartbeat import MR_Liveness  # heartbeats of the workers
+from mr_racks import load_racks  # the racks of the workers
+from mr_metrics import now  # our clock
+
+# how often (in msec) the scheduler wakes up to look for stragglers
+SCHED_POLL_MS = 100
+
+# ------------------------------------------------
+# The master service
+#
+class MR_Service ():
+    """ Runs the tasks of the jobs on the map and reduce workers """
+
+    #################################################################
+    # constructor
+    #################################################################
+    def __init__ (self, args, new_job=None):
+        self.M = args.map                     # num of map workers
+        self.R = args.reduce                  # num of reduce workers
+        self.masterport = args.masterport     # base port of the master
+        self.new_job = new_job                # creates a submitted job
+        self.idle_map_workers = []            # map workers waiting for a task
+        self.idle_reduce_workers = []         # reduce workers waiting for a task
+        self.liveness = MR_Liveness ()        # heartbeats of the workers
+        self.jobs = {}                        # job id -> running job
+        self.next_job = 0                     # id of the next job
+        # phase -> job id -> scheduler of the phase the job is in, and
+        # (phase, job id) -> future done when all its tasks are done
+        self.schedulers = {"map": {}, "reduce": {}}
+        self.phase_done = {}
+        self.job_tasks = set ()               # coroutines of the submitted jobs
+
+        # the racks of the workers and of the master, if we know them, and
+        # how long a task waits for a worker on its rack
+        self.racks = load_racks (args.topology) if args.topology else None
+        self.master_rack = self.racks.master_rack () if self.racks is not None else None
+        self.locality_wait = args.localitywait
+
+        self.sender4map = None                # used to send push messages
+        self.sender4reduce = None             # used to send push messages
+        self.rcv4barrier = None               # used to receive worker up signals
+        self.rcv4map_res = None               # used to receive map results
+        self.rcv4reduce_res = None            # used to receive reduce results
+        self.rcv4jobs = None                  # used to receive submitted jobs
+
+        self.loop = None                      # the asyncio event loop
+        self.executor = None                  # decodes and loads the tasks
+
+    # -----------------------------------------------------------------------
+    # Initialize the network connections and the barriers
+    def init_server (self):
+        """Initialize the networking part of the server"""
+
+        try:
+            # obtain the ZeroMQ context. Its sockets are the asyncio ones,
+            # whose operations are awaited on our event loop.
+            context = zmq.asyncio.Context().instance ()
+
+            # Socket to send messages on. Note, we use the divide-conquer
+            # pattern using PUSH and PULL
+            #
+            # Note that we create two such PUSH-PULL workflows:
+            # one for master to map, and other for master to reduce
+            #
+            # It had to be done this way due to the choice of comm pattern we
+            # made in Zero MQ. The * indicates any interface
+
+            #           This is our protocol
+            # base port + 0 for map workers to request their next task
+            # base port + 1 for reduce workers to request their next task
+            # base port + 2 to pull signals that workers are up and alive
+            # base port + 3 to pull results from map workers
+            # base port + 4 to pull results from reduce workers
+            # base port + 5 for clients to submit jobs to the service
+
+            # first, the map workers. Rather than pushing tasks to them,
+            # each idle map worker asks us for its next task (REQ) and we
+            # reply to the right worker using the ROUTER pattern
+            self.sender4map = context.socket (zmq.ROUTER)
+            # set high water mark and LINGER option to ensure messages
+            # get sent.
+            self.sender4map.setsockopt (zmq.LINGER, -1)
+            self.sender4map.setsockopt (zmq.SNDHWM, 0)
+            self.sender4map.setsockopt (zmq.RCVHWM, 0)
+            bind_addr = "tcp://*:" + str (self.masterport)
+            print("For map->master task requests ROUTER, bind addr is: ", bind_addr)
+            self.sender4map.bind  (bind_addr)
+
+            # next, the reduce workers, which also ask for their next task
+            # when they are idle
+            self.sender4reduce = context.socket (zmq.ROUTER)
+            # set high water mark and LINGER option to ensure messages
+            # get sent.
+            self.sender4reduce.setsockopt (zmq.LINGER, -1)
+            self.sender4reduce.setsockopt (zmq.SNDHWM, 0)
+            self.sender4reduce.setsockopt (zmq.RCVHWM, 0)
+            bind_addr = "tcp://*:" + str (self.masterport+1)
+            print("For reduce->master task requests ROUTER, bind addr is: ", bind_addr)
+            self.sender4reduce.bind  (bind_addr)
+
+            # next, the pull from workers to indicate they are up and alive
+            self.rcv4barrier = context.socket (zmq.PULL)
+            # set high water mark as unlimited
+            self.rcv4barrier.setsockopt (zmq.RCVHWM, 0)
+            bind_addr = "tcp://*:" + str (self.masterport+2)
+            print("For workers up->master PULL, bind addr is: ", bind_addr)
+            self.rcv4barrier.bind (bind_addr)
+
+            # next, the pull from map workers for results
+            self.rcv4map_res = context.socket (zmq.PULL)
+            # set high water mark as unlimited
+            self.rcv4map_res.setsockopt (zmq.RCVHWM, 0)
+            bind_addr = "tcp://*:" + str (self.masterport+3)
+            print("For map results->master PULL, bind addr is: ", bind_addr)
+            self.rcv4map_res.bind (bind_addr)
+
+            # next, the pull from reduce workers for results
+            self.rcv4reduce_res = context.socket (zmq.PULL)
+            # set high water mark as unlimited
+            self.rcv4reduce_res.setsockopt (zmq.RCVHWM, 0)
+            bind_addr = "tcp://*:" + str (self.masterport+4)
+            print("For reduce results->master PULL, bind addr is: ", bind_addr)
+            self.rcv4reduce_res.bind (bind_addr)
+
+            # finally, the clients that submit jobs, which we answer when
+            # their job is done using the ROUTER pattern. Only a service
+            # that accepts jobs needs it.
+            if (self.new_job is not None):
+                self.rcv4jobs = context.socket (zmq.ROUTER)
+                self.rcv4jobs.setsockopt (zmq.LINGER, -1)
+                bind_addr = "tcp://*:" + str (self.masterport+5)
+                print("For client->master job submissions ROUTER, bind addr is: ", bind_addr)
+                self.rcv4jobs.bind (bind_addr)
+
+        except:
+            print("Unexpected error in init_server:", sys.exc_info()[0])
+            raise
+
+    # -----------------------------------------------------------------------
+    # the workers up barrier. The first message of each map and reduce
+    # worker says it is up; we wait until the required number of distinct
+    # workers have been heard from.
+    async def workers_up (self):
+        """wait until all expected workers are up"""
+
+        try:
+            # Note that the barrier is at base port of master + 2. Only the
+            # map and reduce workers count; rack aggregators are optional.
+            barrier_cond = self.M + self.R
+            while (self.liveness.num_alive ("map") + self.liveness.num_alive ("reduce") < barrier_cond):
+                self.liveness.beat (await self.rcv4barrier.recv ())
+
+            print("Barrier received required number of ACKS = ", barrier_cond)
+            if (self.racks is not None):
+                for role in ["map", "reduce"]:
+                    print("MR::service - racks of the ", role, " workers: ", sorted ((str (self.worker_rack (n)), n) for n in self.liveness.alive (role)))
+
+
+        except:
+            print("Unexpected error in workers_up:", sys.exc_info()[0])
+            raise
+
+    # -----------------------------------------------------------------------
+    # the workers keep sending heartbeats after they are up, which we
+    # record as they arrive for as long as we run
+    async def listen_heartbeats (self):
+        """record the heartbeats of the workers"""
+        while True:
+            self.liveness.beat (await self.rcv4barrier.recv ())
+
+    # -----------------------------------------------------------------------
+    # forget the idle workers that have died, so that we never hand them a
+    # task. The tasks the dead workers were running, and those that ran
+    # past their deadline, are handed to the next idle worker.
+    def check_workers (self):
+        """re-execute lost tasks"""
+
+        dead = self.liveness.check ()
+        if (dead):
+            # the lists are changed in place since a dispatch may be
+            # going through them
+            self.idle_map_workers[:] = [w for w in self.idle_map_workers if self.liveness.is_alive (w.decode ('utf-8'))]
+            self.idle_reduce_workers[:] = [w for w in self.idle_reduce_workers if self.liveness.is_alive (w.decode ('utf-8'))]
+
+        for phase in self.schedulers:
+            for scheduler in self.schedulers[phase].values ():
+                for name in dead:
+                    scheduler.worker_lost (name.encode ('utf-8'))
+                scheduler.expire ()
+
+        # the map results a dead rack aggregator held are lost
+        for name in dead:
+            if (self.liveness.roles.get (name) == "aggregate"):
+                for job in self.jobs.values ():
+                    job.aggregator_lost (name)
+
+    # -----------------------------------------------------------------------
+    # the rack of a worker, given by its name or its identity, and the
+    # racks we have live workers of a role on
+    def worker_rack (self, worker):
+        """rack of a worker, None if unknown"""
+        if (self.racks is None):
+            return None
+        if (isinstance (worker, bytes)):
+            worker = worker.decode ('utf-8')
+        return self.racks.rack_of (self.liveness.hosts.get (worker))
+
+    def worker_racks (self, role):
+        """racks of the live workers of a role"""
+        return set (self.worker_rack (name) for name in self.liveness.alive (role))
+
+    # -----------------------------------------------------------------------
+    # the live rack aggregator the results of a map worker should go
+    # through, as (name, endpoint), or None if its rack has none. The map
+    # workers of a rack are spread over its aggregators if it has several.
+    def aggregator_for (self, worker):
+        """the rack aggregator of a map worker"""
+        rack = self.worker_rack (worker)
+        names = sorted (n for n in self.liveness.alive ("aggregate")
+                        if self.worker_rack (n) == rack and n in self.liveness.endpoints)
+        if (not names):
+            return None
+        name = names[hash (worker) % len (names)]
+        return name, self.liveness.endpoints[name]
+
+    # -----------------------------------------------------------------------
+    # how long (in msec) to wait for the workers: at most the given timeout,
+    # but no longer than until the next task deadline of any job
+    def poll_timeout (self, timeout):
+        """wake up time bounded by the next task deadline"""
+        for phase in self.schedulers:
+            for scheduler in self.schedulers[phase].values ():
+                deadline = scheduler.next_deadline ()
+                if (deadline is not None):
+                    timeout = min (timeout, int (deadline * 1000))
+        return timeout
+
+    # -----------------------------------------------------------------------
+    # run the tasks of a phase of a job on the workers. This is the barrier
+    # of the phase: it returns once the results of all its tasks are in
+    # and have been saved.
+    async def run_phase (self, job, phase, scheduler):
+        """run the tasks of a phase of a job"""
+
+        if (not scheduler.is_complete ()):
+            self.schedulers[phase][job.job_id] = scheduler
+            done = self.loop.create_future ()
+            self.phase_done[(phase, job.job_id)] = done
+            try:
+                await self.dispatch (phase)
+                await done
+            finally:
+                self.schedulers[phase].pop (job.job_id, None)
+                self.phase_done.pop ((phase, job.job_id), None)
+
+        # the phase is over once its outputs are on disk
+        await job.flush_spills ()
+
+    # -----------------------------------------------------------------------
+    # a job cannot go on with a phase, e.g., since it cannot send a task.
+    # Only the job fails; the other jobs go on.
+    def fail_phase (self, phase, job_id, exc):
+        """fail the running phase of a job"""
+        done = self.phase_done.get ((phase, job_id))
+        if (done is not None and not done.done ()):
+            done.set_exception (exc)
+        else:
+            # e.g., a backup of a task of a phase that ended meanwhile
+            print("MR::service - ignoring error of job ", job_id, " after its ", phase, " phase: ", repr (exc))
+
+    # -----------------------------------------------------------------------
+    # the job whose task an idle worker should run, with the task. The jobs
+    # with the fewest tasks running for their share go first, and the tasks
+    # not started yet of any job before the backups of stragglers.
+    def next_task (self, phase, worker):
+        """returns (job, task), or (None, None) if there is no task"""
+
+        schedulers = sorted (self.schedulers[phase].items (),
+                             key=lambda js: (len (js[1].running) / self.jobs[js[0]].weight, js[0]))
+        for fresh in (True, False):
+            for job_id, scheduler in schedulers:
+                if (fresh and not scheduler.pending):
+                    continue
+                task = scheduler.next_task (worker)
+                if (task is not None):
+                    return self.jobs[job_id], task
+        return None, None
+
+    # -----------------------------------------------------------------------
+    # hand out tasks to the idle workers as long as we have any
+    async def dispatch (self, phase):
+        """send the next tasks to the idle workers"""
+
+        idle = self.idle_map_workers if (phase == "map") else self.idle_reduce_workers
+        # a worker may get no task while another does, e.g., since the
+        # tasks wait for a worker on their rack. The list may change while
+        # we send a task.
+        for worker in list (idle):
+            if (worker not in idle):
+                continue
+            job, task = self.next_task (phase, worker)
+            if (job is None):
+                continue
+            idle.remove (worker)
+            try:
+                if (phase == "map"):
+                    await job.send_map_task (worker, task)
+                else:
+                    await job.send_reduce_task (worker, task)
+            except Exception as e:
+                # the worker did not get the task and still waits for one
+                idle.append (worker)
+                self.fail_phase (phase, job.job_id, e)
+
+    # -----------------------------------------------------------------------
+    # every idle worker asks us for its next task
+    async def serve_requests (self, phase):
+        """note the idle workers and hand them tasks"""
+
+        router = self.sender4map if (phase == "map") else self.sender4reduce
+        idle = self.idle_map_workers if (phase == "map") else self.idle_reduce_workers
+        while True:
+            worker, empty, request = await router.recv_multipart ()
+            # a reducer that is busy with a task asks for the next chunk
+            # of its partition on the same socket
+            if (request != b'ready'):
+                asyncio.ensure_future (self.serve_chunk (worker, json.loads (request)))
+                continue
+            idle.append (worker)
+            await self.dispatch (phase)
+
+    # -----------------------------------------------------------------------
+    # send a reducer the chunk of its partition it asked for. The chunk is
+    # read and encoded by the thread pool. If the job or its iteration is
+    # over, the reducer is told so and drops its task.
+    async def serve_chunk (self, worker, request):
+        """send the next chunk of a partition"""
+
+        job = self.jobs.get (request.get ('job', 0))
+        frames = None
+        if (job is not None and request['iter'] == job.iteration):
+            try:
+                frames = await self.loop.run_in_executor (self.executor, job.reduce_chunk_frames, worker,
+                                                          request['id'], request['chunk'])
+            except Exception as e:
+                print("MR::service - cannot send chunk ", request['chunk'], " of partition ", request['id'], ": ", repr (e))
+        if (frames is None):
+            frames = encode_message ({'id': request['id'], 'lost': True}, [], "json")
+        await self.sender4reduce.send_multipart ([worker, b''] + frames, copy=False)
+
+    # -----------------------------------------------------------------------
+    # we wake up periodically even if nothing arrives, so that we get a
+    # chance to back up the stragglers, and at the latest at the next task
+    # deadline
+    async def watch_tasks (self):
+        """re-execute the lost tasks and back up the stragglers"""
+
+        while True:
+            await asyncio.sleep (self.poll_timeout (SCHED_POLL_MS) / 1000.0)
+            # keep track of which workers are alive and which tasks
+            # need to be re-executed
+            self.check_workers ()
+            for phase in self.schedulers:
+                await self.dispatch (phase)
+
+    # -----------------------------------------------------------------------
+    # the compressor of the job a message belongs to, which counts what
+    # compression saved the job
+    def job_compressor (self, header):
+        """compressor of the job named in a header"""
+        job = self.jobs.get (header.get ('job', 0))
+        return None if job is None else job.compressor
+
+    # -----------------------------------------------------------------------
+    # collect the results of the tasks. The results are decoded by the
+    # thread pool and saved by the spill thread of their job while we go on
+    # serving the workers.
+    async def collect_results (self, phase):
+        """receive the results of the tasks"""
+
+        receiver = self.rcv4map_res if (phase == "map") else self.rcv4reduce_res
+        while True:
+            # results from the map and reduce phase use the same wire format
+            frames = await receiver.recv_multipart (copy=False)
+            master_start = now ()
+            resp, blocks = await self.loop.run_in_executor (self.executor, decode_message, frames, False, self.job_compressor)
+
+            # ignore the results of the jobs that are over, late results of
+            # an earlier phase or iteration, and the late duplicates of
+            # tasks we had backed up. A rack aggregator sends the merged
+            # results of several map tasks. In the p2p mode, a reducer that
+            # could not fetch some map outputs sends which ones instead.
+            job_id = resp.get ('job', 0)
+            job = self.jobs.get (job_id)
+            scheduler = self.schedulers[phase].get (job_id)
+            if (job is None or scheduler is None or resp['iter'] != job.iteration):
+                continue
+            if (resp.get ('lost')):
+                job.map_outputs_lost (scheduler, resp)
+                continue
+            if (not scheduler.tasks_done (resp.get ('ids', [resp['id']]))):
+                continue
+
+            try:
+                job.task_result (phase, scheduler, resp, blocks, master_start)
+            except Exception as e:
+                self.fail_phase (phase, job_id, e)
+                continue
+            if (scheduler.is_complete ()):
+                self.phase_done[(phase, job_id)].set_result (True)
+
+    # -----------------------------------------------------------------------
+    # run a job to completion. A submitted job works in a directory of its
+    # own and its client is told how it went.
+    async def run_job (self, job, client=None):
+        """run all the iterations of a job"""
+
+        job.job_id = self.next_job
+        self.next_job = self.next_job + 1
+        if (client is not None):
+            job.workdir = "job" + str (job.job_id)
+            os.makedirs (job.workdir, exist_ok=True)
+        self.jobs[job.job_id] = job
+        print("MR::service - job ", job.job_id, " on ", job.datafile, " started")
+
+        reply = {'job': job.job_id, 'status': "done", 'results': os.path.abspath (job.path ("results.csv"))}
+        try:
+            await job.run (self)
+            print("MR::service - job ", job.job_id, " done")
+        except Exception as e:
+            # a submitted job that fails does not take the service down
+            if (client is None):
+                raise
+            print("MR::service - job ", job.job_id, " failed: ", repr (e))
+            reply = {'job': job.job_id, 'status': "failed", 'error': repr (e)}
+        finally:
+            del self.jobs[job.job_id]
+
+        if (client is not None):
+            await self.rcv4jobs.send_multipart ([client, b'', json.dumps (reply).encode ('utf-8')])
+
+    # -----------------------------------------------------------------------
+    # accept the jobs the clients submit and run them alongside the others.
+    # A job is given by the options of mr_wordcount.py; the workers are
+    # those of the service.
+    async def accept_jobs (self):
+        """start the jobs submitted to us"""
+
+        print("MR::service - accepting jobs on port ", self.masterport + 5)
+        while True:
+            client, empty, request = await self.rcv4jobs.recv_multipart ()
+            args = argparse.Namespace (**json.loads (request))
+            args.map = self.M
+            args.engine = "distributed"
+            try:
+                job = self.new_job (args)
+            except Exception as e:
+                print("MR::service - job rejected: ", repr (e))
+                await self.rcv4jobs.send_multipart ([client, b'', json.dumps ({'status': "failed", 'error': repr (e)}).encode ('utf-8')])
+                continue
+
+            task = asyncio.ensure_future (self.run_job (job, client))
+            self.job_tasks.add (task)
+            task.add_done_callback (self.job_tasks.discard)
+
+    #####################################################################
+    # The main loop of the service. It runs the given jobs and returns,
+    # or, without any, accepts jobs from the clients forever.
+    #####################################################################
+    async def serve (self, jobs=None):
+        """Run jobs on the map and reduce workers"""
+
+        try:
+            # the loop, and the threads that do its blocking work
+            self.loop = asyncio.get_running_loop ()
+            self.executor = concurrent.futures.ThreadPoolExecutor (thread_name_prefix="master")
+
+            ############ initialization ##################
+            # here we start our end of the PUSH based workflow
+            print("MR::solve - initialize server")
+            self.init_server ()
+
+            # a barrier to make sure the required number of map and reduce
+            # workers are up and running. We hear from them all along
+            # afterwards.
+            print("MR::solve - wait for workers to start")
+            await self.workers_up ()
+
+            print("MR::solve - All map and reduce workers are up")
+            print("***** Initialization phase completed")
+
+            # the coroutines that serve the workers, and the jobs
+            workers = [asyncio.ensure_future (self.listen_heartbeats ()),
+                       asyncio.ensure_future (self.serve_requests ("map")),
+                       asyncio.ensure_future (self.serve_requests ("reduce")),
+                       asyncio.ensure_future (self.collect_results ("map")),
+                       asyncio.ensure_future (self.collect_results ("reduce")),
+                       asyncio.ensure_future (self.watch_tasks ())]
+            if (jobs is None):
+                main = asyncio.ensure_future (self.accept_jobs ())
+            else:
+                main = asyncio.ensure_future (asyncio.gather (*[self.run_job (job) for job in jobs]))
+
+            # only the jobs end, unless something fails
+            done, pending = await asyncio.wait (workers + [main], return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel ()
+            await asyncio.gather (*pending, return_exceptions=True)
+            for task in done:
+                task.result ()
+
+        except:
+            print("Unexpected error in serve method:", sys.exc_info()[0])
+            raise
+
+        finally:
+            if (self.executor is not None):
+                self.executor.shutdown ()
+
+    # -----------------------------------------------------------------------
+    def run (self, jobs=None):
+        """Run the service on an event loop of its own"""
+        asyncio.run (self.serve (jobs))
@@ -0,0 +1,281 @@
+#!/usr/bin/python
+#
+# Purpose: External sort-merge shuffle engine for the MapReduce master
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The original shuffle read every map output file completely into memory,
+# sorted it, and then sorted the concatenation of all of them once more.
+# On multi-GB inputs this runs the master out of memory. Here we instead
+# sort bounded-size "runs" of the map output, spill each sorted run to
+# disk, and then do a k-way heap merge across all the runs as a stream.
+# Grouped keys are written straight to the per-reducer shuffle files so
+# that the memory used by the master stays flat regardless of input size.
+#
+# Since the map workers already partition their output by reducer (see
+# mr_partitioner.py), one shuffle engine is used per partition and it
+# only has to merge the map outputs destined for that reducer.
+#
+# A shuffle file is a sequence of chunks of key groups, which the master
+# sends to the reducer one at a time (see mr_reduceinput.py).
+#
+# Given a compressor (see mr_compress.py), the runs and the shuffle files
+# are written compressed. Any of our spill files, and the map csv files,
+# can be read back whatever codec they were written with.
+#
+
+# system and time
+import os
+import sys
+
+import csv                   # deal with CSV files
+import heapq                 # k-way merge of sorted runs
+import operator              # used in itertools
+import itertools             # nice iterators
+import pickle                # serialization
+import functools             # reduce
+
+from mr_combiner import COMBINE_FUNCS  # the combine functions by name
+from mr_compress import open_spill     # (compressed) spill files
+from mr_functions import parse_val     # int or float vals
+
+# rough estimate of the in-memory cost (in bytes) of a single [key, val]
+# record held in a Python list, over and above the length of the key
+RECORD_OVERHEAD = 150
+
+# max number of run files we keep open at the same time during a merge.
+# If there are more runs than this, we merge them in multiple passes.
+MAX_FANIN = 64
+
+# number of key groups pickled together in one chunk of a shuffle file
+GROUPS_PER_CHUNK = 10000
+
+# number of records of a run from which the compressor picks its codec
+SAMPLE_RECORDS = 2000
+
+# ------------------------------------------------
+# The shuffle engine used by the master
+#
+class MR_Shuffle ():
+    """ External sort-merge shuffle engine """
+
+    #################################################################
+    # constructor
+    #################################################################
+    def __init__ (self, mem_budget, partition, combiner="sum", compressor=None, workdir=""):
+        self.mem_budget = mem_budget   # bytes of records we sort in memory
+        self.partition = partition     # the reducer partition we shuffle
+        self.combine_func = COMBINE_FUNCS[combiner]  # how runs are combined
+        self.runs = []                 # names of sorted run files on disk
+        self.next_run = 0              # used to name the next run file
+        self.num_uniquekeys = 0        # num of unique keys after the merge
+        self.num_chunks = 0            # num of chunks of the shuffle file
+        self.records = []              # records not yet spilled into a run
+        self.mem_used = 0              # estimated bytes held in records
+        self.compressor = compressor   # compresses the spill files, if any
+        self.workdir = workdir         # directory of the run and shuffle files
+
+    # -----------------------------------------------------------------------
+    # read a csv file of key,val entries as a stream of [key, val]. The
+    # vals are ints for wordcount, but the numeric workloads (and their
+    # partial sums) have floats.
+    def read_records (self, filename):
+        """generator over the records of a csv file"""
+        with open_spill (filename, "r") as f:
+            for row in csv.reader (f, delimiter=","):
+                yield [row[0], parse_val (row[1])]
+
+    # -----------------------------------------------------------------------
+    # write a stream of (key, group) as csv rows. When the reduce operation
+    # is commutative and associative (like the addition of wordcount), we
+    # perform the combiner optimization and write one row per key.
+    def write_groups (self, writer, groups):
+        """write the groups of records, combined if possible"""
+        for k, g in groups:
+            if (self.combine_func is None):
+                writer.writerows (g)
+            else:
+                writer.writerow ([k, functools.reduce (self.combine_func, (r[1] for r in g))])
+
+    # -----------------------------------------------------------------------
+    # name of the next run file of this partition
+    def next_run_name (self):
+        """returns a fresh run file name"""
+        runname = os.path.join (self.workdir, "Run" + str (self.partition) + "_" + str (self.next_run) + ".csv")
+        self.next_run = self.next_run + 1
+        return runname
+
+    # -----------------------------------------------------------------------
+    # sort the records we have accumulated in memory, combine them by key
+    # and save them as the next run file
+    def spill_run (self, records):
+        """sort, combine and spill one run to disk"""
+
+        # sort on the key using traditional alphabetic order
+        records.sort (key=operator.itemgetter (0))
+
+        runname = self.next_run_name ()
+
+        # the compressor picks the codec of the run from its first records
+        sample = "".join (k + "," + str (v) + "\n" for k, v in records[:SAMPLE_RECORDS]).encode ('utf-8')
+        with open_spill (runname, "w", self.compressor, sample) as runfile:
+            writer = csv.writer (runfile, delimiter=",")
+            self.write_groups (writer, itertools.groupby (records, key=operator.itemgetter (0)))
+
+        self.runs.append (runname)
+
+    # -----------------------------------------------------------------------
+    # add records to the in-memory buffer, spilling a sorted run each time
+    # the memory budget is used up. This lets the master feed the map
+    # results to the shuffle as they arrive (see the pipelined mode).
+    def add_records (self, records):
+        """buffer records and spill runs as needed"""
+
+        for rec in records:
+            self.records.append (rec)
+            self.mem_used = self.mem_used + len (rec[0]) + RECORD_OVERHEAD
+            if (self.mem_used >= self.mem_budget):
+                self.spill_run (self.records)
+                self.records = []
+                self.mem_used = 0
+
+    # -----------------------------------------------------------------------
+    # whatever is left over in the buffer becomes the last run
+    def flush (self):
+        """spill the buffered records, if any"""
+        if (self.records):
+            self.spill_run (self.records)
+            self.records = []
+            self.mem_used = 0
+
+    # -----------------------------------------------------------------------
+    # Phase 1 of the external sort: cut the map output into sorted runs,
+    # each of which fits in the memory budget
+    def make_runs (self, infiles):
+        """create sorted runs from the map output files"""
+
+        for infile in infiles:
+            self.add_records (self.read_records (infile))
+
+            # Delete the intermediate Map file (no need for it anymore)
+            os.remove (infile)
+
+        self.flush ()
+
+    # -----------------------------------------------------------------------
+    # k-way merge of the given sorted run files. Yields each unique key
+    # together with its group of [key, val] entries (one per run at most)
+    def merge_runs (self, runs):
+        """stream of (key, group) in sorted key order"""
+
+        streams = [self.read_records (run) for run in runs]
+        merged = heapq.merge (*streams, key=operator.itemgetter (0))
+        for k, g in itertools.groupby (merged, key=operator.itemgetter (0)):
+            yield k, list (g)
+
+    # -----------------------------------------------------------------------
+    # If there are too many runs to keep open at once, repeatedly merge
+    # MAX_FANIN of them into a single bigger run until few enough remain
+    def reduce_fanin (self):
+        """multi-pass merge to bound the number of open run files"""
+
+        while (len (self.runs) > MAX_FANIN):
+            batch = self.runs[:MAX_FANIN]
+            self.runs = self.runs[MAX_FANIN:]
+
+            records = self.merge_runs (batch)
+            runname = self.next_run_name ()
+            with open_spill (runname, "w", self.compressor) as runfile:
+                writer = csv.writer (runfile, delimiter=",")
+                self.write_groups (writer, records)
+
+            for run in batch:
+                os.remove (run)
+            self.runs.append (runname)
+
+    # -----------------------------------------------------------------------
+    # write a list of groups as the next pickled chunk of a shuffle file
+    def dump_chunk (self, shufflefile, groups):
+        """append a pickled chunk of groups to the shuffle file"""
+        pickle.dump (groups, shufflefile, pickle.HIGHEST_PROTOCOL)
+        self.num_chunks = self.num_chunks + 1
+
+    # -----------------------------------------------------------------------
+    # Phase 2 of the external sort: merge all the runs of this partition and
+    # write the sorted key groups straight into the shuffle file of the
+    # reducer that owns the partition.
+    def merge_partition (self):
+        """merge all runs into the shuffle file of this partition"""
+
+        self.flush ()
+        self.reduce_fanin ()
+
+        # we open the file with binary write property since we are going
+        # to write a sequence of pickled chunks, each being a list of the
+        # groups of [key, val] entries for a unique key
+        shufflefile = open_spill (os.path.join (self.workdir, "Shuffle" + str (self.partition) + ".dat"), "wb", self.compressor)
+        groups = []
+        self.num_uniquekeys = 0
+        self.num_chunks = 0
+        for k, g in self.merge_runs (self.runs):
+            groups.append (g)
+            self.num_uniquekeys = self.num_uniquekeys + 1
+            if (len (groups) == GROUPS_PER_CHUNK):
+                self.dump_chunk (shufflefile, groups)
+                groups = []
+        self.dump_chunk (shufflefile, groups)
+        shufflefile.close ()
+
+        # the runs are no longer needed
+        for run in self.runs:
+            os.remove (run)
+        self.runs = []
+
+# ------------------------------------------------
+# Reads the chunks of a shuffle file one at a time, in order
+#
+class MR_ShuffleReader ():
+    """ Chunk by chunk reader of a shuffle file """
+
+    def __init__ (self, filename):
+        self.filename = filename       # the shuffle file
+        self.file = None               # the file, once opened
+        self.next = 0                  # the chunk the file is at
+
+    # -----------------------------------------------------------------------
+    # the chunks are read in order, so a chunk we are past (e.g., for the
+    # backup of a reduce task) means reading the file from the start again
+    def chunk (self, j):
+        """ the list of groups of chunk j """
+        if (self.file is None or j < self.next):
+            self.close ()
+            self.file = open_spill (self.filename, "rb")
+            self.next = 0
+        while (self.next <= j):
+            groups = pickle.load (self.file)
+            self.next = self.next + 1
+        return groups
+
+    # -----------------------------------------------------------------------
+    def close (self):
+        """ close the file, if open """
+        if (self.file is not None):
+            self.file.close ()
+            self.file = None
+
+# -----------------------------------------------------------------------
+# read back all the chunks of a shuffle file written by MR_Shuffle
+def load_shuffle_file (filename):
+    """returns the list of groups saved in a shuffle file"""
+    contents = []
+    with open_spill (filename, "rb") as shufflefile:
+        while True:
+            try:
+                contents.extend (pickle.load (shufflefile))
+            except EOFError:
+                break
+
+    return contents
@@ -0,0 +1,458 @@
+#!/usr/bin/python
+#
+# Purpose: Discrete-event simulator of the wordcount job on MR_Topo layouts
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# Trying a cluster shape on Mininet needs root, Open vSwitch and a while
+# per run. This simulator predicts the phase times of the job instead, in
+# a fraction of a second per configuration, so that the racks and the num
+# of map and reduce workers can be chosen before launching the emulator.
+#
+# The costs come from a real run of the job (e.g., a local run or one of
+# mr_benchmark.py): the per-task counters of its report file (-m option of
+# mr_wordcount.py) give the cost per byte or per record of each step, and
+# its metrics file gives the phase times it took. The first iteration is
+# left out when there are several, as it includes the start up. The times
+# of the workers are wall clock times, so the profiled run should have a
+# core for each of its processes; otherwise the time the workers waited
+# for one another to get the CPU counts as the cost of their work.
+#
+#   map:       worker CPU per input byte, output bytes and records per
+#              input byte, master time per output byte
+#   shuffle:   master time per map output record
+#   reduce:    reduce records per map output record, input and output
+#              bytes per record, worker CPU per record, master time per
+#              output byte
+#   finalize:  master time per reduce output record
+#
+# The layout is that of MR_Topo (mr_topology.py): the master on rack s1,
+# the map workers on the next rack and the reduce workers on the one after
+# that, with one link per host to the switch of its rack and a chain of
+# links between the switches. Every link has a delay and a bandwidth in
+# each direction. Layout 0 is a single host on which all the messages go
+# over the loopback at the rate the profiled run measured, which is what
+# a local run is compared against (-v option).
+#
+# The simulation follows the master shuffle mode of the framework: an idle
+# worker asks the master for a task, the master sends it the chunk or the
+# partition, the worker computes and sends its result, and the master
+# decodes and saves it, one result at a time. The shuffle and the
+# finalize run on the master. A message holds every link of its path from
+# when all of them are free until its last byte is sent, and then arrives
+# after the delays of the path, so that the messages that share a link
+# queue for it. The reduce partitions are taken to be of equal size.
+#
+# For every phase, the busiest resource (the CPU of the workers, the
+# master, or a link in one direction) over the time of the phase is its
+# bottleneck. E.g.,
+#
+#   python mr_simulator.py -s 1G -M 4,8,16 -R 2,4 -r 1,2,3 report.json
+#
+# predicts the job on a 1 GB input for every combination of the num of
+# map workers, reduce workers and racks.
+#
+
+# system and time
+import os
+import sys
+import time
+import argparse   # argument parser
+
+import csv                   # the results table
+import json                  # the report file is json lines
+import heapq                 # the event queue
+import itertools             # the sweep
+
+from mr_benchmark import parse_size  # sizes like 100M or 1G
+
+# the columns of the results table
+COLUMNS = ["racks", "size_mb", "M", "R", "map", "shuffle", "reduce", "finalize", "total", "map_bound", "reduce_bound"]
+
+# bytes of a task request and of the header of a task (json arguments)
+REQUEST_BYTES = 64
+TASK_HEADER_BYTES = 256
+
+# -----------------------------------------------------------------------
+# a ratio of two totals, 0 when there is nothing to divide by
+def ratio (a, b):
+    """ a / b, or 0 """
+    return a / b if b else 0.0
+
+# ------------------------------------------------
+# The costs measured by a real run
+#
+class MR_Profile ():
+    """ Per-byte and per-record costs of the steps of the job """
+
+    def __init__ (self, reportfile, metricsfile=None):
+
+        # the iterations that ran their map tasks, less the first one
+        with open (reportfile, "r") as f:
+            reports = [json.loads (line) for line in f if line.strip ()]
+        reports = [r for r in reports if any (t['phase'] == "map" for t in r['tasks'])]
+        if (not reports):
+            raise ValueError ("No map tasks in the report file " + reportfile)
+        if (len (reports) > 1):
+            reports = reports[1:]
+        self.iterations = len (reports)
+
+        # the totals of the counters of the tasks of a phase
+        def totals (phase):
+            tasks = [t for r in reports for t in r['tasks'] if t['phase'] == phase]
+            sums = {f: sum (t[f] for t in tasks) for f in ["records_in", "records_out", "bytes_in", "bytes_out",
+                                                            "compute_time", "serialize_time", "master_time", "network_time"]}
+            sums['tasks'] = len (tasks)
+            sums['workers'] = len (set (t.get ('worker') for t in tasks))
+            return sums
+
+        # the wall time of a phase, summed over the iterations
+        def wall_time (phase):
+            return sum (r['phases'].get (phase, {}).get ('wall_time', 0.0) for r in reports)
+
+        m = totals ("map")
+        r = totals ("reduce")
+
+        # every cost is per byte of the input, so without the bytes of the
+        # map tasks (e.g., in a report of an older local run) there is no
+        # profile at all
+        if (m['bytes_in'] <= 0):
+            raise ValueError ("No map input bytes in the report file " + reportfile)
+
+        # the configuration of the profiled run, per iteration
+        self.size = m['bytes_in'] / self.iterations
+        self.M = m['workers']
+        self.R = r['tasks'] // self.iterations
+        self.splits = m['tasks'] // self.iterations
+
+        self.map_cpu = ratio (m['compute_time'] + m['serialize_time'], m['bytes_in'])
+        self.map_bytes_out = ratio (m['bytes_out'], m['bytes_in'])
+        self.map_records_out = ratio (m['records_out'], m['bytes_in'])
+        self.map_master = ratio (m['master_time'], m['bytes_out'])
+        self.shuffle_master = ratio (wall_time ("shuffle"), m['records_out'])
+        self.reduce_records = ratio (r['records_in'], m['records_out'])
+        self.reduce_bytes_in = ratio (r['bytes_in'], r['records_in'])
+        self.reduce_bytes_out = ratio (r['bytes_out'], r['records_in'])
+        self.reduce_records_out = ratio (r['records_out'], r['records_in'])
+        self.reduce_cpu = ratio (r['compute_time'] + r['serialize_time'], r['records_in'])
+        self.reduce_master = ratio (r['master_time'], r['bytes_out'])
+        self.finalize_master = ratio (wall_time ("finalize"), r['records_out'])
+
+        # the rate of the loopback of the profiled run, in bytes per sec
+        self.loopback = ratio (m['bytes_in'] + m['bytes_out'] + r['bytes_in'] + r['bytes_out'],
+                               m['network_time'] + r['network_time']) or 1e12
+
+        # the phase times the run measured, averaged over the same
+        # iterations as the costs
+        self.measured = None
+        if (metricsfile and os.path.exists (metricsfile)):
+            with open (metricsfile, "r") as f:
+                rows = [[float (v) for v in line.split (",")[:5]] for line in f.readlines ()[1:] if line.strip ()]
+            if (len (rows) > 1):
+                rows = rows[1:]
+            if (rows):
+                self.measured = [sum (col) / len (col) for col in zip (*rows)]
+
+# ------------------------------------------------
+# A resource that serves one thing at a time: a worker, the master, or a
+# link in one direction
+#
+class MR_Resource ():
+    """ A FIFO resource of the simulation """
+
+    def __init__ (self, name, rate=None, delay=0.0):
+        self.name = name          # what it is
+        self.rate = rate          # bytes per sec of a link
+        self.delay = delay        # secs of propagation of a link
+        self.free_at = 0.0        # when it is done with what it has
+        self.busy = 0.0           # secs it was busy
+
+    # -----------------------------------------------------------------------
+    def reserve (self, start, duration, busy=None):
+        """ serve something for duration from start on; returns its end """
+        begin = max (start, self.free_at)
+        self.free_at = begin + duration
+        self.busy = self.busy + (duration if busy is None else busy)
+        return self.free_at
+
+# -----------------------------------------------------------------------
+# the hosts of an MR_Topo layout, as lists of the racks of the master, the
+# map and the reduce hosts. Layout 0 puts all of them on one host.
+def topo_layout (racks, M, R):
+    """ (master rack, map racks, reduce racks) """
+    if (racks == 0):
+        return 0, [0] * M, [0] * R
+    map_rack = 1 % racks
+    reduce_rack = 2 % racks
+    return 0, [map_rack] * M, [reduce_rack] * R
+
+# ------------------------------------------------
+# The simulator
+#
+class MR_Simulator ():
+    """ Discrete-event simulation of one configuration of the job """
+
+    def __init__ (self, profile, racks, M, R, size, splits=0, host_link=(1000, 1), switch_link=(1000, 5)):
+        self.profile = profile    # the costs
+        self.racks = racks        # num of racks of the layout
+        self.M = M                # num of map workers
+        self.R = R                # num of reduce workers (and tasks)
+        self.size = size          # bytes of input
+        self.splits = splits or 4 * M  # num of map tasks
+        self.events = []          # the event queue
+        self.seq = itertools.count ()  # keeps the events of a time in order
+        self.now = 0.0            # the simulated time
+
+        # the master, the workers and their racks
+        master_rack, map_racks, reduce_racks = topo_layout (racks, M, R)
+        self.master = MR_Resource ("master")
+        self.hosts = {self.master: master_rack}
+        self.mappers = [MR_Resource ("map worker " + str (i)) for i in range (M)]
+        self.reducers = [MR_Resource ("reduce worker " + str (i)) for i in range (R)]
+        for host, rack in zip (self.mappers + self.reducers, map_racks + reduce_racks):
+            self.hosts[host] = rack
+
+        # the links, in both directions, given as (Mbps, msecs delay)
+        self.links = {}
+        for host, rack in self.hosts.items ():
+            name = "{} - s{}".format (host.name, rack + 1)
+            if (racks == 0):
+                self.links[(host, "up")] = self.links[(host, "down")] = self.link ("loopback", None)
+            else:
+                self.links[(host, "up")] = self.link (name + " up", host_link)
+                self.links[(host, "down")] = self.link (name + " down", host_link)
+        for s in range (1, max (1, racks)):
+            self.links[(s, "up")] = self.link ("s{} - s{}".format (s, s + 1), switch_link)
+            self.links[(s, "down")] = self.link ("s{} - s{}".format (s + 1, s), switch_link)
+
+    # -----------------------------------------------------------------------
+    # a link, shared if there is one already of the name
+    def link (self, name, spec):
+        """ the link resource of a name """
+        for link in self.links.values ():
+            if (link.name == name):
+                return link
+        if (spec is None):
+            return MR_Resource (name, self.profile.loopback)
+        return MR_Resource (name, spec[0] * 1000 * 1000 / 8, spec[1] / 1000.0)
+
+    # -----------------------------------------------------------------------
+    # the links a message from one host to another goes over
+    def path (self, src, dst):
+        """ list of the links from src to dst """
+        if (self.racks == 0):
+            return [self.links[(src, "up")]]
+        a, b = self.hosts[src], self.hosts[dst]
+        if (a <= b):
+            between = [self.links[(s, "up")] for s in range (a + 1, b + 1)]
+        else:
+            between = [self.links[(s, "down")] for s in range (a, b, -1)]
+        return [self.links[(src, "up")]] + between + [self.links[(dst, "down")]]
+
+    # -----------------------------------------------------------------------
+    # the event queue
+    def at (self, when, func, *args):
+        """ run func (*args) at the given simulated time """
+        heapq.heappush (self.events, (when, next (self.seq), func, args))
+
+    def run (self):
+        """ process the events until there are none """
+        while (self.events):
+            self.now, _, func, args = heapq.heappop (self.events)
+            func (*args)
+
+    # -----------------------------------------------------------------------
+    # send a message now; then is called when it has arrived
+    def send (self, src, dst, size, then, *args):
+        """ hold the links of the path and deliver after their delays """
+        links = self.path (src, dst)
+        begin = max ([self.now] + [l.free_at for l in links])
+        duration = size / min (l.rate for l in links)
+        # a link faster than the slowest of the path is held, but only
+        # busy sending for its own share of the time
+        for l in links:
+            l.reserve (begin, duration, size / l.rate)
+        self.at (begin + duration + sum (l.delay for l in links), then, *args)
+
+    # -----------------------------------------------------------------------
+    # run the tasks of a phase on its workers on demand. A task is given as
+    # (bytes of its input, secs of worker CPU, bytes of its result, secs
+    # of master time). Returns the end of the phase.
+    def run_tasks (self, workers, tasks):
+        """ simulate a map or reduce phase """
+
+        pending = list (tasks)
+        state = {'end': self.now}
+
+        def idle (w):
+            if (pending):
+                self.send (w, self.master, REQUEST_BYTES, dispatch, w, pending.pop (0))
+
+        def dispatch (w, task):
+            self.send (self.master, w, TASK_HEADER_BYTES + task[0], compute, w, task)
+
+        def compute (w, task):
+            self.at (w.reserve (self.now, task[1]), result, w, task)
+
+        def result (w, task):
+            self.send (w, self.master, task[2], save, task)
+            idle (w)
+
+        def save (task):
+            self.at (self.master.reserve (self.now, task[3]), done)
+
+        def done ():
+            state['end'] = max (state['end'], self.now)
+
+        for w in workers:
+            self.at (self.now, idle, w)
+        self.run ()
+        return state['end']
+
+    # -----------------------------------------------------------------------
+    # the resource that was busiest during a phase, given the busy times
+    # at its start
+    def bottleneck (self, busy_before, phase_time, workers):
+        """ (name, utilization) of the busiest resource """
+        resources = [self.master] + list (set (self.links.values ()))
+        used = {r.name: r.busy - busy_before.get (r, 0.0) for r in resources}
+        # the workers of the phase are busy on average
+        used["worker cpu"] = sum (w.busy - busy_before.get (w, 0.0) for w in workers) / len (workers)
+        name = max (used, key=used.get)
+        return name, ratio (used[name], phase_time)
+
+    def busy_times (self):
+        """ busy time of every resource so far """
+        return {r: r.busy for r in [self.master] + self.mappers + self.reducers + list (self.links.values ())}
+
+    # -----------------------------------------------------------------------
+    # simulate an iteration of the job
+    def simulate (self):
+        """ dict of the predicted phase times and bottlenecks """
+
+        p = self.profile
+        out = {'racks': self.racks, 'size_mb': round (self.size / (1024 * 1024), 1), 'M': self.M, 'R': self.R}
+
+        # the map phase, on chunks of (almost) equal size
+        chunk = self.size / self.splits
+        tasks = [(chunk, p.map_cpu * chunk, p.map_bytes_out * chunk, p.map_master * p.map_bytes_out * chunk)] * self.splits
+        before = self.busy_times ()
+        out['map'] = self.run_tasks (self.mappers, tasks)
+        out['map_bound'] = "{} ({:.0%})".format (*self.bottleneck (before, out['map'], self.mappers))
+
+        # the shuffle on the master
+        map_records = p.map_records_out * self.size
+        start = self.now
+        out['shuffle'] = self.master.reserve (start, p.shuffle_master * map_records) - start
+        self.now = start + out['shuffle']
+
+        # the reduce phase, one partition per reducer
+        records = p.reduce_records * map_records / self.R
+        tasks = [(p.reduce_bytes_in * records, p.reduce_cpu * records, p.reduce_bytes_out * records,
+                  p.reduce_master * p.reduce_bytes_out * records)] * self.R
+        before = self.busy_times ()
+        start = self.now
+        out['reduce'] = self.run_tasks (self.reducers, tasks) - start
+        out['reduce_bound'] = "{} ({:.0%})".format (*self.bottleneck (before, out['reduce'], self.reducers))
+
+        # the finalize on the master
+        out['finalize'] = p.finalize_master * p.reduce_records_out * records * self.R
+        out['total'] = out['map'] + out['shuffle'] + out['reduce'] + out['finalize']
+        return out
+
+##################################
+# Command line parsing
+##################################
+def parseCmdLineArgs ():
+    # parse the command line
+    parser = argparse.ArgumentParser ()
+
+    # add optional arguments
+    parser.add_argument ("-f", "--metricsfile", default="metrics.csv", help="Metrics file of the profiled run, default metrics.csv")
+    parser.add_argument ("-s", "--sizes", default="", help="Comma separated input sizes (with K, M or G suffix), default the input size of the profiled run")
+    parser.add_argument ("-M", "--maps", default="", help="Comma separated numbers of map workers, default that of the profiled run")
+    parser.add_argument ("-R", "--reduces", default="", help="Comma separated numbers of reduce workers, default that of the profiled run")
+    parser.add_argument ("-r", "--racks", default="1,2,3", help="Comma separated numbers of racks of the MR_Topo layout (0 for a single host), default 1,2,3")
+    parser.add_argument ("-S", "--splits", type=int, default=0, help="Number of map tasks, default 4 times the number of map workers")
+    parser.add_argument ("-b", "--hostbw", type=float, default=1000, help="Bandwidth of the host links in Mbps, default 1000")
+    parser.add_argument ("-d", "--hostdelay", type=float, default=1, help="Delay of the host links in msecs, default 1")
+    parser.add_argument ("-B", "--switchbw", type=float, default=1000, help="Bandwidth of the links between the switches in Mbps, default 1000")
+    parser.add_argument ("-D", "--switchdelay", type=float, default=5, help="Delay of the links between the switches in msecs, default 5")
+    parser.add_argument ("-v", "--validate", action="store_true", help="Compare the prediction for the profiled run on a single host with the phase times it measured")
+    parser.add_argument ("-o", "--outfile", default="simulation.csv", help="Output file of the predictions, default simulation.csv")
+
+    # add positional arguments in that order
+    parser.add_argument ("reportfile", help="Report file of the profiled run (-m option of mr_wordcount.py)")
+
+    # parse the args
+    args = parser.parse_args ()
+
+    return args
+
+#------------------------------------------
+# compare the prediction for the profiled run with what it measured
+def validate (profile):
+    """ print the predicted and measured phase times """
+
+    sim = MR_Simulator (profile, 0, profile.M, profile.R, profile.size, profile.splits)
+    out = sim.simulate ()
+    print("MR::simulator - profiled run: {:.1f} MB, M = {}, R = {}, {} map tasks, {} iterations".format (
+        profile.size / (1024 * 1024), profile.M, profile.R, profile.splits, profile.iterations))
+    if (profile.measured is None):
+        print("MR::simulator - no metrics file to compare with")
+        return
+    print("{:<9} {:>10} {:>10} {:>8}".format ("phase", "predicted", "measured", "error"))
+    for phase, measured in zip (["map", "shuffle", "reduce", "finalize", "total"], profile.measured):
+        print("{:<9} {:>10.3f} {:>10.3f} {:>8}".format (phase, out[phase], measured,
+                                                       "{:+.0%}".format (ratio (out[phase] - measured, measured)) if measured else "-"))
+
+#------------------------------------------
+# main function
+def main ():
+    """ Main program """
+
+    print("MapReduce Simulator program")
+    parsed_args = parseCmdLineArgs ()
+
+    try:
+        profile = MR_Profile (parsed_args.reportfile, parsed_args.metricsfile)
+        if (parsed_args.validate):
+            validate (profile)
+            return
+
+        sizes = [parse_size (s) for s in parsed_args.sizes.split (",")] if parsed_args.sizes else [profile.size]
+        maps = [int (m) for m in parsed_args.maps.split (",")] if parsed_args.maps else [profile.M]
+        reduces = [int (r) for r in parsed_args.reduces.split (",")] if parsed_args.reduces else [profile.R]
+        racks = [int (r) for r in parsed_args.racks.split (",")]
+
+        # every configuration of the sweep
+        results = []
+        start = time.time ()
+        for size, num_racks, M, R in itertools.product (sizes, racks, maps, reduces):
+            sim = MR_Simulator (profile, num_racks, M, R, size, parsed_args.splits,
+                                (parsed_args.hostbw, parsed_args.hostdelay), (parsed_args.switchbw, parsed_args.switchdelay))
+            results.append (sim.simulate ())
+        print("MR::simulator - {} configurations simulated in {:.3f} secs".format (len (results), time.time () - start))
+
+        # print the table and save it as csv
+        with open (parsed_args.outfile, "w", newline='') as f:
+            writer = csv.DictWriter (f, fieldnames=COLUMNS)
+            writer.writeheader ()
+            writer.writerows (results)
+
+        fmt = "{:>5} {:>9} {:>3} {:>3} {:>8} {:>8} {:>8} {:>8} {:>8}  {:<28} {:<28}"
+        print(fmt.format ("racks", "size (MB)", "M", "R", "map", "shuffle", "reduce", "finalize", "total", "map bound by", "reduce bound by"))
+        for row in results:
+            print(fmt.format (row['racks'], row['size_mb'], row['M'], row['R'],
+                              *["{:.3f}".format (row[c]) for c in COLUMNS[4:9]], row['map_bound'], row['reduce_bound']))
+
+    except:
+        print("Unexpected error in simulator:", sys.exc_info()[0])
+        raise
+
+#----------------------------------------------
+if __name__ == '__main__':
+    main ()
@@ -0,0 +1,148 @@
+#!/usr/bin/python
+#
+# Purpose: Input splitting for the map tasks
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The master memory-maps the data file and cuts it into (almost) equal
+# sized splits. Unlike the original byte-based split, every split ends at
+# a whitespace byte so that no word gets cut into two nonsensical halves.
+#
+# A split can be handed to a map worker in two ways:
+#   - as a memoryview of the mapped file, which is sent as a raw ZeroMQ
+#     frame without copying it and without any text decoding or json
+#     escaping on the master, or
+#   - as a (path, offset, length) descriptor, when the workers share the
+#     file system with the master and can read the split themselves.
+#
+
+# system and time
+import os
+import sys
+
+import re                    # regular expression
+import mmap                  # memory mapped files
+
+# a whitespace byte. Whitespace separates words in all our inputs
+WHITESPACE = re.compile (rb"\s")
+
+# ------------------------------------------------
+# The input splitter used by the master
+#
+class MR_InputSplitter ():
+    """ Memory-mapped, whitespace-aligned input splitter """
+
+    def __init__ (self, datafile, num_splits):
+        self.datafile = os.path.abspath (datafile)  # the file to split
+        self.num_splits = num_splits                 # num of splits we want
+        self.file = None                             # the open data file
+        self.mm = None                               # its memory map
+        self.splits = []                             # (offset, length) list
+        self.end = 0                                 # end of the last split
+
+    # -----------------------------------------------------------------------
+    # map the file and compute the boundaries of the splits of the bytes
+    # from start on. If complete is set, the splits stop at the end of the
+    # last whole word, i.e., after the last whitespace byte, since the
+    # writer of a growing file may be in the middle of a word.
+    def open (self, start=0, complete=False):
+        """ memory-map the file and compute the splits """
+
+        self.file = open (self.datafile, "rb")
+        doc_size = os.path.getsize (self.datafile)
+
+        # an empty file cannot be mapped, and has just empty splits
+        if (doc_size == 0):
+            self.splits = [(0, 0)] * self.num_splits
+            self.end = 0
+            return self.splits
+
+        self.mm = mmap.mmap (self.file.fileno (), 0, access=mmap.ACCESS_READ)
+        start = min (start, doc_size)
+        self.end = self.complete_end (start, doc_size) if complete else doc_size
+        self.splits = self.compute_splits (start, self.end, self.num_splits)
+        return self.splits
+
+    # -----------------------------------------------------------------------
+    # the offset just after the last whitespace byte in [start, end), or
+    # start if there is none. We look for it backwards a block at a time.
+    def complete_end (self, start, end, block_size=65536):
+        """ end of the last whole word """
+
+        locn = end
+        while (locn > start):
+            block_start = max (start, locn - block_size)
+            ends = [match.end () for match in WHITESPACE.finditer (self.mm, block_start, locn)]
+            if (ends):
+                return ends[-1]
+            locn = block_start
+        return start
+
+    # -----------------------------------------------------------------------
+    # cut the bytes [start, end) of the file into num_splits pieces each of
+    # which ends just after a whitespace byte (or at the end). Some splits
+    # may be empty if the text has very long runs without whitespace.
+    def compute_splits (self, start, end, num_splits):
+        """ list of (offset, length) of whitespace aligned splits """
+
+        splits = []
+        locn2read = start
+        for i in range (num_splits):
+            if (i == num_splits-1): # the last split takes the rest
+                boundary = end
+            else:
+                # the tentative boundary, moved forward to the next
+                # whitespace byte which stays in this split
+                boundary = max (locn2read, start + int ((end - start) * (i+1) / num_splits))
+                match = WHITESPACE.search (self.mm, boundary, end)
+                boundary = match.end () if match else end
+
+            splits.append ((locn2read, boundary - locn2read))
+            locn2read = boundary
+
+        return splits
+
+    # -----------------------------------------------------------------------
+    # the bytes of a split as a memoryview of the mapped file (no copy)
+    def view (self, i):
+        """ zero-copy view of split i """
+        offset, length = self.splits[i]
+        if (self.mm is None):
+            return memoryview (b'')
+        return memoryview (self.mm)[offset:offset+length]
+
+    # -----------------------------------------------------------------------
+    # the (path, offset, length) descriptor of a split
+    def descriptor (self, i):
+        """ descriptor of split i for workers sharing our file system """
+        offset, length = self.splits[i]
+        return {'path': self.datafile, 'offset': offset, 'length': length}
+
+    # -----------------------------------------------------------------------
+    def close (self):
+        """ unmap and close the file """
+        if (self.mm is not None):
+            try:
+                self.mm.close ()
+            except BufferError:
+                # ZeroMQ may still hold views of splits it has not yet
+                # released; the map is then closed when they go away
+                pass
+            self.mm = None
+        if (self.file is not None):
+            self.file.close ()
+            self.file = None
+
+# -----------------------------------------------------------------------
+# read a split given its descriptor. Used by the map workers when they
+# share the file system with the master.
+def read_split (desc):
+    """ the bytes of a split described by (path, offset, length) """
+    if (desc['length'] == 0):
+        return b''
+    with open (desc['path'], "rb") as f:
+        with mmap.mmap (f.fileno (), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[desc['offset']:desc['offset']+desc['length']]
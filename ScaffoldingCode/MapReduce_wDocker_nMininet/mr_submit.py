@@ -0,0 +1,92 @@
+#!/usr/bin/python
+#
+# Purpose: Submit a wordcount job to the master service
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# A master started as a job service (mr_wordcount.py -J) runs any number of
+# jobs at once on its map and reduce workers (see mr_service.py). This
+# client submits one such job. It takes the same options as mr_wordcount.py,
+# sends them to the service on base port + 5 of the master, and waits until
+# the service tells it that the job is done and where its results are.
+#
+# The map and reduce workers are those of the service, so the -M option
+# has no effect here. The data file must be at the same path on the master;
+# a relative path is taken as relative to our current directory if the
+# file is there.
+#
+
+# system and time
+import os
+import sys
+import time
+import json                  # json
+
+import zmq                   # ZeroMQ library
+
+from mr_wordcount import job_parser  # the options of a wordcount job
+
+##################################
+# Command line parsing
+##################################
+def parseCmdLineArgs ():
+    # the options of the job, and where the service is
+    parser = job_parser ()
+    parser.add_argument ("-a", "--address", default="127.0.0.1", help="IP address of the master, default 127.0.0.1")
+    args = parser.parse_args ()
+    if (args.datafile is None or args.service):
+        parser.error ("a job needs its datafile, and is not a service")
+
+    return args
+
+##################################
+# submit the job and wait until it is done
+##################################
+def submit (args):
+    """ run a job on the service, returns the reply of the service """
+
+    try:
+        # the spec of the job is its options
+        spec = vars (args).copy ()
+        del spec['address']
+        del spec['service']
+        if (os.path.exists (args.datafile)):
+            spec['datafile'] = os.path.abspath (args.datafile)
+
+        # we ask and the service replies when the job is done, using
+        # the REQ-ROUTER pattern
+        context = zmq.Context().instance ()
+        client = context.socket (zmq.REQ)
+        connect_addr = "tcp://" + args.address + ":" + str (args.masterport + 5)
+        print("Using job submission REQ, connect addr is: ", connect_addr)
+        client.connect (connect_addr)
+
+        start_time = time.time ()
+        client.send_json (spec)
+        reply = client.recv_json ()
+        print("MR::submit - job took ", time.time () - start_time, " secs")
+        client.close ()
+
+        return reply
+
+    except:
+        print("Unexpected error in submit:", sys.exc_info()[0])
+        raise
+
+#------------------------------------------
+# main function
+def main ():
+    """ Main program """
+
+    parsed_args = parseCmdLineArgs ()
+    reply = submit (parsed_args)
+    print("MR::submit - ", json.dumps (reply))
+    if (reply['status'] != "done"):
+        sys.exit (1)
+
+#----------------------------------------------
+if __name__ == '__main__':
+    main ()
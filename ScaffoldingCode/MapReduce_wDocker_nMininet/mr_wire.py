@@ -0,0 +1,239 @@
+#!/usr/bin/python
+#
+# Purpose: Wire format for the intermediate key/val records
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# All messages that carry intermediate key/val records (map results, the
+# p2p shuffle, reduce tasks and reduce results) are built and parsed here.
+# A message comprises a small json header (task id etc.) and zero or more
+# "blocks" of records, each block being a list of (key, val) pairs.
+#
+# Two encodings are supported:
+#
+# json:   the whole message is a single json frame where the blocks are
+#         lists of {'token': key, 'val': val} dictionaries. This is the
+#         original text encoding and is kept as a fallback.
+#
+# binary: the message is multipart. Frame 0 is the json header and every
+#         block then uses three more frames:
+#           keys: the dictionary of unique keys of the block, encoded as
+#                 a uint32 count, count+1 uint32 offsets and the utf-8
+#                 bytes of all the keys back to back (length prefixed via
+#                 the offsets).
+#           ids:  uint32 column of the key id of each record. It is left
+#                 empty when every key appears exactly once in order,
+#                 which is the common case after the combiner.
+#           vals: int64 (or float64) column of the vals.
+#         The columns are sent and received without copies, using
+#         send(copy=False) and recv(copy=False).
+#
+# All the integers are little endian on the wire.
+#
+# A message may end with a "trailer" frame after the frames of its blocks:
+# a json object whose fields are merged into the header on receipt. This
+# lets a sender add fields it only knows once the message is encoded, such
+# as the task metrics (see mr_metrics.py) that include the encoding time
+# and the size of the message.
+#
+# Given a compressor (see mr_compress.py), every frame of a block may be
+# compressed with a codec of its own, which is then listed under 'codecs'
+# in the description of the block. The frames of a compressed block are
+# decompressed into fresh buffers on receipt.
+#
+
+# system and time
+import os
+import sys
+
+import json                  # json
+import struct                # pack the binary headers
+from array import array      # compact numeric columns
+
+from mr_compress import MR_Compressor  # per-block compression
+
+# -----------------------------------------------------------------------
+# return a little endian version of a numeric array
+def _to_wire (arr):
+    if (sys.byteorder != 'little'):
+        arr.byteswap ()
+    return arr
+
+# -----------------------------------------------------------------------
+# turn a received frame (zmq.Frame when received with copy=False, or bytes)
+# into a memoryview without copying it
+def _buffer (frame):
+    if (hasattr (frame, 'buffer')):
+        return frame.buffer
+    # frames we built ourselves may be views of typed arrays
+    return memoryview (frame).cast ('B')
+
+# -----------------------------------------------------------------------
+# interpret a buffer as a column of numbers of the given array typecode
+def _column (buf, typecode):
+    if (sys.byteorder == 'little'):
+        # zero-copy view of the frame
+        return buf.cast (typecode)
+    arr = array (typecode)
+    arr.frombytes (buf)
+    arr.byteswap ()
+    return arr
+
+# -----------------------------------------------------------------------
+# encode one block of (key, val) pairs into its three frames
+def encode_block (pairs):
+    """ returns the block description and its keys, ids and vals frames """
+
+    # dictionary encoding of the keys
+    key_ids = {}
+    ids = array ('I')
+    for k, v in pairs:
+        kid = key_ids.get (k)
+        if (kid is None):
+            kid = len (key_ids)
+            key_ids[k] = kid
+        ids.append (kid)
+
+    encoded = [k.encode ('utf-8') for k in key_ids]
+    offsets = array ('I', [0])
+    for e in encoded:
+        offsets.append (offsets[-1] + len (e))
+    keys_frame = struct.pack ('<I', len (encoded)) + _to_wire (offsets).tobytes () + b''.join (encoded)
+
+    # when each key occurs once in order, the ids are implied
+    dense = (len (key_ids) == len (pairs))
+    ids_frame = b'' if dense else memoryview (_to_wire (ids))
+
+    # the vals are integers unless any of them is not
+    vals = [v for k, v in pairs]
+    typecode = 'q' if all (type (v) is int for v in vals) else 'd'
+    vals_frame = memoryview (_to_wire (array (typecode, vals)))
+
+    desc = {'n': len (pairs), 'dense': dense, 'type': typecode}
+    return desc, [keys_frame, ids_frame, vals_frame]
+
+# -----------------------------------------------------------------------
+# decode the three frames of a block into its columns without building the
+# individual (key, val) pairs
+def decode_block_columns (desc, frames):
+    """ returns the keys, ids (None if dense) and vals columns of a block """
+
+    keys_buf = _buffer (frames[0])
+    nkeys = struct.unpack_from ('<I', keys_buf)[0]
+    offsets = _column (keys_buf[4:4+4*(nkeys+1)], 'I')
+    blob = bytes (keys_buf[4+4*(nkeys+1):])
+
+    # when all the keys are ascii, slicing one decoded string is much
+    # cheaper than decoding every key on its own
+    text = blob.decode ('utf-8')
+    if (len (text) == len (blob)):
+        keys = [text[offsets[i]:offsets[i+1]] for i in range (nkeys)]
+    else:
+        keys = [blob[offsets[i]:offsets[i+1]].decode ('utf-8') for i in range (nkeys)]
+
+    vals = _column (_buffer (frames[2]), desc['type'])
+    if (desc['dense']):
+        return keys, None, vals
+
+    return keys, _column (_buffer (frames[1]), 'I'), vals
+
+# -----------------------------------------------------------------------
+# decode the three frames of a block back into a list of (key, val) pairs
+def decode_block (desc, frames):
+    """ returns the list of (key, val) pairs of a block """
+
+    keys, ids, vals = decode_block_columns (desc, frames)
+    vals = vals.tolist ()
+    if (ids is None):
+        return list (zip (keys, vals))
+
+    return [(keys[i], v) for i, v in zip (ids, vals)]
+
+# the kinds of the frames of a block, for which a compressor picks its
+# codecs separately
+FRAME_KINDS = ["keys", "ids", "vals"]
+
+# -----------------------------------------------------------------------
+# decompress a frame of a received block. Without a compressor of our own
+# (which counts the bytes), any codec we have will do.
+def _decompress (compressor, codec, frame):
+    if (compressor is None):
+        compressor = MR_Compressor ("none")
+    return compressor.decompress (codec, _buffer (frame))
+
+# -----------------------------------------------------------------------
+# build the frames of a message
+def encode_message (header, blocks, wire, compressor=None):
+    """ returns the list of frames to send for a header and blocks """
+
+    if (wire == "binary"):
+        descs = []
+        frames = []
+        for pairs in blocks:
+            desc, block_frames = encode_block (pairs)
+            if (compressor is not None):
+                packed = [compressor.compress (frame, kind) for frame, kind in zip (block_frames, FRAME_KINDS)]
+                desc['codecs'] = [codec for codec, frame in packed]
+                block_frames = [frame for codec, frame in packed]
+            descs.append (desc)
+            frames.extend (block_frames)
+        header = dict (header, wire="binary", blocks=descs)
+        return [json.dumps (header).encode ('utf-8')] + frames
+
+    # the json fallback
+    msg = dict (header, blocks=[[{'token': k, 'val': v} for k, v in pairs] for pairs in blocks])
+    return [json.dumps (msg).encode ('utf-8')]
+
+# -----------------------------------------------------------------------
+# the trailer frame with the given fields, to be appended to the frames of
+# a message
+def encode_trailer (fields):
+    """ returns the trailer frame of a message """
+    return json.dumps (fields).encode ('utf-8')
+
+# -----------------------------------------------------------------------
+# parse the frames of a message
+def decode_message (frames, columns=False, compressor=None):
+    """ returns the header and the list of blocks of a message """
+
+    # with columns, each block is returned as its (keys, ids, vals)
+    # columns, as given by decode_block_columns, instead of a list of pairs
+    decode = decode_block_columns if columns else decode_block
+
+    header = json.loads (bytes (_buffer (frames[0])))
+    num_frames = 1 + 3 * len (header['blocks']) if header.get ('wire') == "binary" else 1
+    if (len (frames) > num_frames):
+        header.update (json.loads (bytes (_buffer (frames[num_frames]))))
+
+    # the compressor may depend on the message, e.g., on the job it is of
+    if (callable (compressor)):
+        compressor = compressor (header)
+
+    if (header.get ('wire') == "binary"):
+        blocks = []
+        for b in range (len (header['blocks'])):
+            desc = header['blocks'][b]
+            block_frames = frames[1+3*b:4+3*b]
+            if ('codecs' in desc):
+                block_frames = [_decompress (compressor, codec, frame) for codec, frame in zip (desc['codecs'], block_frames)]
+            blocks.append (decode (desc, block_frames))
+        return header, blocks
+
+    # the json fallback
+    blocks = [[(e['token'], e['val']) for e in block] for block in header.pop ('blocks', [])]
+    if (columns):
+        blocks = [([k for k, v in pairs], None, [v for k, v in pairs]) for pairs in blocks]
+    return header, blocks
+
+# -----------------------------------------------------------------------
+# send and receive a message on a socket
+def send_message (socket, header, blocks, wire, compressor=None):
+    """ send a header and blocks of records """
+    socket.send_multipart (encode_message (header, blocks, wire, compressor), copy=False)
+
+def recv_message (socket, columns=False, compressor=None):
+    """ receive a header and blocks of records """
+    return decode_message (socket.recv_multipart (copy=False), columns, compressor)
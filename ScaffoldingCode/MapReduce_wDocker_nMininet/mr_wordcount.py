@@ -23,6 +23,8 @@ import argparse   # argument parser
 import re          # regular expression
 
 from mr_framework import MR_Framework # our wordcount MR framework
+from mr_service import MR_Service  # the master service for many jobs
+from mr_compress import available_codecs  # the codecs we have
 
 #/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\
 # @NOTE@:  Clearly, this file is specifically for wordcount and so you will
@@ -36,23 +38,54 @@ from mr_framework import MR_Framework # our wordcount MR framework
 ##################################
 # Command line parsing
 ##################################
-def parseCmdLineArgs ():
-    # parse the command line
+# the options of a wordcount job, which mr_submit.py also uses
+def job_parser ():
+    # the command line parser
     parser = argparse.ArgumentParser ()
 
     # add optional arguments
     parser.add_argument ("-i", "--iters", type=int, default=20, help="Number of iterations, default 20")
     parser.add_argument ("-f", "--metricsfile", default="metrics.csv", help="Output file to collect metrics, default metrics.csv")
-    parser.add_argument ("-M", "--map", type=int, default=10, help="Number of Map jobs, default 10")
+    parser.add_argument ("-m", "--reportfile", default="report.json", help="Output file of the per-iteration report of the task metrics (json lines), default report.json")
+    parser.add_argument ("-e", "--engine", choices=["distributed", "local"], default="distributed", help="Run on ZeroMQ map and reduce workers, or on a local process pool with no workers needed, default distributed")
+    parser.add_argument ("-j", "--procs", type=int, default=0, help="Number of processes of the local engine, default the number of cores")
+    parser.add_argument ("-M", "--map", type=int, default=10, help="Number of Map workers, default 10")
+    parser.add_argument ("-S", "--splits", type=int, default=0, help="Number of map tasks (input chunks) handed out on demand, default 4 times the number of Map workers")
+    parser.add_argument ("-X", "--specfactor", type=float, default=2.0, help="Back up a straggling map or reduce task once it runs this many times longer than a typical task (0 disables), default 2.0")
+    parser.add_argument ("-T", "--tasktimeout", type=float, default=60.0, help="Re-execute a map or reduce task on another worker once it runs this many seconds (0 disables), default 60")
     parser.add_argument ("-R", "--reduce", type=int, default=3, help="Number of Reduce jobs, default 3")
     parser.add_argument ("-p", "--masterport", type=int, default=5556, help="Master node port, default 5556")
+    parser.add_argument ("-P", "--partitioner", choices=["hash", "range", "skew"], default="hash", help="Partitioning of keys among reducers; range gives globally sorted results, skew balances the records of the reducers and splits hot keys across several, default hash")
+    parser.add_argument ("-A", "--aggregate", choices=["sum", "min", "max", "mean", "count"], default="sum", help="Aggregation of the vals of a key by the reducers, default sum")
+    parser.add_argument ("-C", "--combiner", choices=["sum", "none"], default="sum", help="Map-side combiner; none sends every occurrence, default sum")
+    parser.add_argument ("-s", "--shuffle", choices=["master", "p2p"], default="master", help="Shuffle via the master, or p2p where reducers pull directly from map workers, default master")
+    parser.add_argument ("-z", "--compress", choices=["auto"] + available_codecs (), default="auto", help="Compression of the intermediate frames and spill files; auto picks a codec per block by its measured ratio and CPU cost, default auto")
+    parser.add_argument ("-B", "--bandwidth", type=float, default=100.0, help="Network bandwidth in Mbps assumed by the auto compression, default 100")
+    parser.add_argument ("-w", "--wire", choices=["binary", "json"], default="binary", help="Wire format of the intermediate records, default binary")
+    parser.add_argument ("-F", "--sharedfs", action="store_true", help="Workers share our file system, so send them (path, offset, length) of their chunk instead of the bytes")
+    parser.add_argument ("-Q", "--pipeline", action="store_true", help="Pipeline the phases: shuffle map results as they arrive and send each partition to a reducer as soon as it is ready")
+    parser.add_argument ("-K", "--cachedir", default="", help="Directory of the job cache of map outputs and results, reused across iterations and runs while the input is unchanged, default no cache")
+    parser.add_argument ("-k", "--cachesize", type=int, default=1024, help="Size budget of the job cache in MB; the least recently used entries are evicted beyond it, default 1024")
+    parser.add_argument ("-I", "--incremental", default="", help="State file of the incremental mode, which maps only the bytes appended to the datafile since the last run and merges them into the stored results, default off")
+    parser.add_argument ("-b", "--shufflemem", type=int, default=64, help="Memory budget of the shuffle sort in MB, default 64")
+    parser.add_argument ("-W", "--weight", type=float, default=1.0, help="Share of the workers the job gets when the job service runs it along with other jobs, default 1")
+    parser.add_argument ("-t", "--topology", default="", help="Topology file (json) giving the hosts of every rack, with which the tasks are placed on the rack of their input, default no topology")
+    parser.add_argument ("-g", "--rackagg", action="store_true", help="Send the map results through the rack aggregators (mr_aggregator.py) that are up, which merge them before they reach the master (master shuffle mode only), default off")
+    parser.add_argument ("-L", "--localitywait", type=float, default=0.5, help="Secs a task waits for a worker on the rack of its input before it runs on another rack (with -t), default 0.5")
+    parser.add_argument ("-J", "--service", action="store_true", help="Run as a job service on the -M map and -R reduce workers, which runs the jobs submitted with mr_submit.py at the same time; no datafile is needed")
     
     # add positional arguments in that order
     # parser.add_argument ("addrfile", help="File of host ip addresses")
-    parser.add_argument ("datafile", help="Big data file")
+    parser.add_argument ("datafile", nargs="?", help="Big data file")
+
+    return parser
 
-    # parse the args
+def parseCmdLineArgs ():
+    # parse the command line
+    parser = job_parser ()
     args = parser.parse_args ()
+    if (args.datafile is None and not args.service):
+        parser.error ("the datafile is required unless we run as a job service (-J)")
 
     return args
     
@@ -63,6 +96,11 @@ def main ():
 
     print("MapReduce Wordcount Main program")
     parsed_args = parseCmdLineArgs ()
+
+    # as a job service, we run the jobs the clients submit, forever
+    if (parsed_args.service):
+        MR_Service (parsed_args, new_job=MR_Framework).run ()
+        return
     
     # now invoke the mapreduce framework. Notice we have slightly changed the way the
     # constructor works and the arguments it takes. 
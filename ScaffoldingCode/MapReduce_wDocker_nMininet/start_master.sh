@@ -17,8 +17,9 @@
 # Due to problems getting the federated container to even ping the master
 # container when the swarm is federated, we are now mapping host port to
 # container port. The assumption is that we will run the master on 5556 as
-# its base, and then four additional ports from the base are used by the
-# master. All of these are mapped using the -p option.
+# its base, and then five additional ports from the base are used by the
+# master (the last one only by the job service). All of these are mapped
+# using the -p option.
 #
 # This assumes that we have already created a swarm-wide network
-docker service create --replicas 1 --name MyMR_Master --constraint 'node.hostname == asg-ubuntu-vm' -t --network MyMR_Network -p 5556:5556 -p 5557:5557 -p 5558:5558 -p 5559:5559 -p 5560:5560 129.59.107.155:5000/vu_mr_master /bin/bash
+docker service create --replicas 1 --name MyMR_Master --constraint 'node.hostname == asg-ubuntu-vm' -t --network MyMR_Network -p 5556:5556 -p 5557:5557 -p 5558:5558 -p 5559:5559 -p 5560:5560 -p 5561:5561 129.59.107.155:5000/vu_mr_master /bin/bash
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+#
+# Purpose: Regression tests of the content-addressed job cache
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# A cache key must change with everything that decides the output it
+# names, and only with that, and the least recently used entries must go
+# first once the cache is over its budget. Run it as
+#
+#   python -m pytest test_mr_cache.py
+#
+
+# system and time
+import os
+import sys
+import time
+import tempfile              # the cache directory
+import unittest              # the test cases
+
+from mr_cache import MR_JobCache, TMP_SUFFIX, key_digest  # the cache under test
+from mr_split import MR_InputSplitter  # splits of a data file
+
+# ------------------------------------------------
+# The keys of the cache
+#
+class TestCacheKeys (unittest.TestCase):
+    """ The keys name the outputs """
+
+    def setUp (self):
+        self.tmpdir = tempfile.TemporaryDirectory ()
+        self.cache = MR_JobCache (self.tmpdir.name, 1 << 20)
+
+    def tearDown (self):
+        self.tmpdir.cleanup ()
+
+    # -----------------------------------------------------------------------
+    def test_map_key (self):
+        """ the key of a map output changes with each of its inputs only """
+        partitioner = {'type': "hash", 'R': 2}
+        key = self.cache.map_key ("abc", partitioner, "sum")
+        self.assertEqual (key_digest (key), key_digest (self.cache.map_key ("abc", {'R': 2, 'type': "hash"}, "sum")))
+        others = [self.cache.map_key ("abd", partitioner, "sum"),
+                  self.cache.map_key ("abc", {'type': "hash", 'R': 3}, "sum"),
+                  self.cache.map_key ("abc", partitioner, "none"),
+                  self.cache.map_key ("abc", partitioner, "sum", form="blocks")]
+        digests = set (key_digest (k) for k in [key] + others)
+        self.assertEqual (len (digests), len (others) + 1)
+
+    def test_result_key (self):
+        """ the key of the results changes with the splits, R and the aggregation """
+        key = self.cache.result_key (["a", "b"], 2, {}, "sum", "sum")
+        others = [self.cache.result_key (["a", "c"], 2, {}, "sum", "sum"),
+                  self.cache.result_key (["b", "a"], 2, {}, "sum", "sum"),
+                  self.cache.result_key (["a", "b"], 3, {}, "sum", "sum"),
+                  self.cache.result_key (["a", "b"], 2, {}, "sum", "max")]
+        digests = set (key_digest (k) for k in [key] + others)
+        self.assertEqual (len (digests), len (others) + 1)
+
+    def test_code (self):
+        """ the code of the job functions is part of the keys """
+        key = self.cache.map_key ("abc", {}, "sum")
+        self.cache.code = "other"
+        self.assertNotEqual (key_digest (key), key_digest (self.cache.map_key ("abc", {}, "sum")))
+
+    # -----------------------------------------------------------------------
+    def test_fingerprint (self):
+        """ the split hashes follow the contents of the data file """
+        datafile = os.path.join (self.tmpdir.name, "data.txt")
+        cache = MR_JobCache (os.path.join (self.tmpdir.name, "cache"), 1 << 20)
+
+        def fingerprint ():
+            splitter = MR_InputSplitter (datafile, 2)
+            splitter.open ()
+            try:
+                return cache.fingerprint (splitter)
+            finally:
+                splitter.close ()
+
+        with open (datafile, "w") as f:
+            f.write ("one two three\nfour five six\n")
+        first = fingerprint ()
+        self.assertEqual (fingerprint (), first)
+        # a rewrite of the same size is told by its modification time
+        mtime = os.stat (datafile).st_mtime_ns
+        with open (datafile, "w") as f:
+            f.write ("one two three\nfour five sox\n")
+        os.utime (datafile, ns=(mtime + 10**9, mtime + 10**9))
+        second = fingerprint ()
+        self.assertEqual (second[0], first[0])
+        self.assertNotEqual (second[1], first[1])
+
+# ------------------------------------------------
+# The size budget of the cache
+#
+class TestCacheEviction (unittest.TestCase):
+    """ The least recently used entries are evicted first """
+
+    def setUp (self):
+        self.tmpdir = tempfile.TemporaryDirectory ()
+
+    def tearDown (self):
+        self.tmpdir.cleanup ()
+
+    # -----------------------------------------------------------------------
+    def put (self, cache, key):
+        """ cache a file of 100 bytes under key """
+        cache.store (key, lambda tmp: open (tmp, "wb").write (b"x" * 100))
+        time.sleep (0.01)
+
+    def test_lru (self):
+        cache = MR_JobCache (self.tmpdir.name, 250)
+        self.put (cache, "a")
+        self.put (cache, "b")
+        self.assertIsNotNone (cache.lookup ("a"))
+        time.sleep (0.01)
+        self.put (cache, "c")
+        self.assertEqual (cache.evictions, 1)
+        self.assertIsNone (cache.lookup ("b"))
+        self.assertIsNotNone (cache.lookup ("a"))
+        self.assertIsNotNone (cache.lookup ("c"))
+        self.assertLessEqual (cache.total_bytes (), 250)
+        self.assertEqual (len (os.listdir (self.tmpdir.name)), 2)
+
+    def test_too_big (self):
+        """ an entry bigger than the budget is not kept """
+        cache = MR_JobCache (self.tmpdir.name, 50)
+        self.put (cache, "a")
+        self.assertIsNone (cache.lookup ("a"))
+        self.assertEqual (os.listdir (self.tmpdir.name), [])
+
+    def test_reopen (self):
+        """ a later run finds the entries and their last use, but no half written file """
+        cache = MR_JobCache (self.tmpdir.name, 250)
+        cache.put ("a", {'x': 1})
+        open (os.path.join (self.tmpdir.name, "junk" + TMP_SUFFIX), "w").close ()
+        cache = MR_JobCache (self.tmpdir.name, 250)
+        self.assertEqual (cache.get ("a"), {'x': 1})
+        self.assertEqual (len (os.listdir (self.tmpdir.name)), 1)
+
+if __name__ == "__main__":
+    unittest.main ()
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+#
+# Purpose: Regression tests of the bounded map-side combiner
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# With a small max_keys, the combiner spills its table into the buckets
+# and the buckets as sorted runs to disk, which it merges back at the
+# end. Whatever the cap, the output must be the same as that of the
+# entries aggregated without a combiner, with one entry per key. Run it as
+#
+#   python -m pytest test_mr_combiner.py
+#
+
+# system and time
+import os
+import sys
+import tempfile              # the temporary directory of the runs
+import functools             # reduce
+import unittest              # the test cases
+
+from mr_combiner import MR_Combiner, COMBINE_FUNCS  # the combiner under test
+from mr_partitioner import MR_HashPartitioner  # decides the reducer of a key
+
+# the entries added: many keys, repeated and with various vals
+ENTRIES = [("w" + str (i % 37), (i * 7) % 11 + 1) for i in range (1000)]
+R = 3
+
+# ------------------------------------------------
+# The combiner with and without its spills
+#
+class TestCombinerSpill (unittest.TestCase):
+    """ A spilling combiner gives what no combiner would """
+
+    # -----------------------------------------------------------------------
+    def combine (self, combiner, max_keys):
+        """ (buckets, num of runs) of the entries under a cap """
+        with tempfile.TemporaryDirectory () as tmpdir:
+            comb = MR_Combiner (MR_HashPartitioner (R), combiner, max_keys, tmpdir)
+            for key, val in ENTRIES:
+                comb.add (key, val)
+            buckets = comb.results ()
+            self.assertEqual (os.listdir (tmpdir), [])
+            self.assertEqual (comb.records_in, len (ENTRIES))
+            return buckets, comb.num_runs
+
+    # -----------------------------------------------------------------------
+    def aggregate (self, buckets, func):
+        """ the per key aggregate of the entries of the buckets """
+        keys = {}
+        for r, bucket in enumerate (buckets):
+            for key, val in bucket:
+                self.assertEqual (MR_HashPartitioner (R).partition (key), r)
+                keys.setdefault (key, []).append (val)
+        return {key: functools.reduce (func, vals) for key, vals in keys.items ()}
+
+    # -----------------------------------------------------------------------
+    def check (self, combiner):
+        """ a cap of 5 spills runs, and gives the same as no combiner """
+        func = COMBINE_FUNCS[combiner]
+        reference, runs = self.combine ("none", 1000000)
+        self.assertEqual (runs, 0)
+        for max_keys in [1000000, 5]:
+            buckets, runs = self.combine (combiner, max_keys)
+            if (max_keys == 5):
+                self.assertGreater (runs, 0)
+            self.assertEqual (sum (len (b) for b in buckets), 37)
+            self.assertEqual (self.aggregate (buckets, func), self.aggregate (reference, func))
+
+    def test_sum (self):
+        self.check ("sum")
+
+    def test_min (self):
+        self.check ("min")
+
+    def test_max (self):
+        self.check ("max")
+
+    def test_none (self):
+        """ without a combine function, every entry comes out as is """
+        buckets, runs = self.combine ("none", 5)
+        self.assertGreater (runs, 0)
+        self.assertEqual (sorted (e for b in buckets for e in b), sorted (ENTRIES))
+
+if __name__ == "__main__":
+    unittest.main ()
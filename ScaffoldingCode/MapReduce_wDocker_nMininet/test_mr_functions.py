@@ -0,0 +1,97 @@
+#!/usr/bin/python
+#
+# Purpose: Regression tests of the wordcount map function
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The map function counts the words of a chunk in a hashed counter before
+# they reach the combiner when the vals are added up. Its entries must
+# still be counted one by one, the min and max must be those of the vals
+# of the occurrences, and the output must not depend on the cap of the
+# combiner. Run it as
+#
+#   python -m pytest test_mr_functions.py
+#
+
+# system and time
+import os
+import sys
+import unittest              # the test cases
+import tempfile              # the directory of a job
+import subprocess            # run a job
+
+from mr_functions import map_func, find_words  # the map function under test
+from mr_combiner import MR_Combiner  # map-side pre-aggregation
+from mr_partitioner import MR_HashPartitioner  # decides the reducer of a key
+
+# a chunk with repeated words, a few of them many times
+CHUNK = b"the cat and the hat, the bat and the rat; a cat's hat " * 50 + b"x1 y2 don't stop\n"
+R = 2
+
+# ------------------------------------------------
+# The map function with the combiner
+#
+class TestMapFunc (unittest.TestCase):
+    """ The map function feeds the combiner as asked """
+
+    # -----------------------------------------------------------------------
+    def map (self, combiner, max_keys=1000000):
+        """ (combiner, {key: val}) of the chunk """
+        comb = MR_Combiner (MR_HashPartitioner (R), combiner, max_keys)
+        map_func (CHUNK, comb)
+        entries = {}
+        for bucket in comb.results ():
+            for key, val in bucket:
+                entries.setdefault (key, []).append (val)
+        return comb, entries
+
+    # -----------------------------------------------------------------------
+    def test_records_in (self):
+        """ every occurrence counts as an entry in, whatever the cap """
+        num_words = len (find_words (CHUNK))
+        for combiner in ["sum", "none"]:
+            for max_keys in [1000000, 3]:
+                comb, entries = self.map (combiner, max_keys)
+                self.assertEqual (comb.records_in, num_words)
+
+    def test_sum (self):
+        """ the counts do not depend on the cap """
+        comb, entries = self.map ("sum")
+        comb, capped = self.map ("sum", 3)
+        self.assertEqual (entries, capped)
+        self.assertEqual (entries['the'], [200])
+
+    def test_max (self):
+        """ the max of the vals is that of no combiner, i.e., 1 """
+        for combiner in ["max", "min"]:
+            for max_keys in [1000000, 3]:
+                comb, entries = self.map (combiner, max_keys)
+                comb, reference = self.map ("none")
+                self.assertEqual (entries, {key: [1] for key in reference})
+
+# ------------------------------------------------
+# A whole job on the local engine
+#
+class TestLocalJob (unittest.TestCase):
+    """ -A max gives what it gives without a combiner """
+
+    # -----------------------------------------------------------------------
+    def run_job (self, tmpdir, *options):
+        """ the results of the job over the chunk, as {key: val} """
+        wordcount = os.path.join (os.path.dirname (os.path.abspath (__file__)), "mr_wordcount.py")
+        subprocess.run ([sys.executable, wordcount, "-e", "local", "-R", "2", "-j", "2", "-S", "4", "-i", "1"] + list (options) + ["data.txt"],
+                        cwd=tmpdir, check=True, stdout=subprocess.DEVNULL)
+        with open (os.path.join (tmpdir, "results.csv"), "r") as f:
+            return dict (line.rstrip ("\n").rsplit (",", 1) for line in f)
+
+    def test_max (self):
+        with tempfile.TemporaryDirectory () as tmpdir:
+            with open (os.path.join (tmpdir, "data.txt"), "wb") as f:
+                f.write (CHUNK * 20)
+            self.assertEqual (self.run_job (tmpdir, "-A", "max"), self.run_job (tmpdir, "-A", "max", "-C", "none"))
+
+if __name__ == "__main__":
+    unittest.main ()
@@ -0,0 +1,77 @@
+#!/usr/bin/python
+#
+# Purpose: Regression tests of the out-of-core reduce input
+#
+# Vanderbilt University Computer Science
+# Author: Aniruddha Gokhale
+# Course: CS4287-5287 Principles of Cloud Computing
+# Created: Oct 2026
+#
+# The reduce input spills its entries as csv runs once it goes over its
+# memory budget, and the runs are read back for the merge. The vals must
+# come back as they went in, floats included (e.g., energy data), and the
+# results must be those of the in-memory path. Run it as
+#
+#   python -m pytest test_mr_reduceinput.py
+#
+
+# system and time
+import os
+import sys
+import tempfile              # the temporary directory of the runs
+import unittest              # the test cases
+
+import numpy as np           # the columns of a block
+
+from mr_reduceinput import MR_ReduceInput  # the reduce input under test
+
+# the keys, key ids and float vals of a block, added a few times over
+KEYS = ['a', 'b', 'c']
+IDS = np.array ([0, 1, 2, 0], dtype=np.int64)
+VALS = np.array ([1.5, 2.25, 3.0, 0.5])
+NUM_BLOCKS = 5
+
+# ------------------------------------------------
+# The reduce input with float vals
+#
+class TestReduceInputFloats (unittest.TestCase):
+    """ The spilled and the in-memory reduce of float vals agree """
+
+    # -----------------------------------------------------------------------
+    def reduce (self, aggregate, mem_budget):
+        """ (results, num of spills) of the blocks under a budget """
+        with tempfile.TemporaryDirectory () as tmpdir:
+            rinput = MR_ReduceInput (mem_budget, 0, aggregate, None, tmpdir)
+            try:
+                for _ in range (NUM_BLOCKS):
+                    rinput.add_block (KEYS, IDS, VALS)
+                return rinput.results (), rinput.num_spills
+            finally:
+                rinput.close ()
+
+    # -----------------------------------------------------------------------
+    def check (self, aggregate, expected):
+        """ a budget of 0 spills every block, and gives the same results """
+        in_memory, spills = self.reduce (aggregate, 1 << 30)
+        self.assertEqual (spills, 0)
+        spilled, spills = self.reduce (aggregate, 0)
+        self.assertEqual (spills, NUM_BLOCKS)
+        self.assertEqual ([k for k, v in spilled], KEYS)
+        for (k, v), (k2, v2), e in zip (spilled, in_memory, expected):
+            self.assertAlmostEqual (v, e)
+            self.assertAlmostEqual (v2, e)
+
+    def test_sum (self):
+        self.check ("sum", [10.0, 11.25, 15.0])
+
+    def test_mean (self):
+        self.check ("mean", [1.0, 2.25, 3.0])
+
+    def test_count (self):
+        self.check ("count", [10, 5, 5])
+
+    def test_max (self):
+        self.check ("max", [1.5, 2.25, 3.0])
+
+if __name__ == "__main__":
+    unittest.main ()